@@ -1,16 +1,48 @@
 let dashboardData = null;
 let riskChart = null;
 let predictionsChart = null;
+let trendChart = null;
+let trendData = null;
 
 const chartColors = ['#1FB8CD', '#FFC185', '#B4413C', '#ECEBD5', '#5D878F', '#DB4545', '#D2BA4C', '#964325', '#944454', '#13343B'];
 
 const API_BASE_URL = 'http://localhost:8000';
 const API_ENDPOINT = '/api/analises/gerar_relatorio_analises/';
+const REPORT_CACHE_KEY = 'relatorioAnalisesCache';
+const TREND_ENDPOINT = '/api/analises/tendencia_risco/';
 
 function apiUrl(path) {
   return `${API_BASE_URL}${path}`;
 }
 
+function readReportCache() {
+  try {
+    return JSON.parse(localStorage.getItem(REPORT_CACHE_KEY));
+  } catch (e) {
+    return null;
+  }
+}
+
+function writeReportCache(response, data) {
+  const etag = response.headers.get('ETag');
+  const lastModified = response.headers.get('Last-Modified');
+  if (!etag && !lastModified) return;
+  try {
+    localStorage.setItem(REPORT_CACHE_KEY, JSON.stringify({ etag, lastModified, data }));
+  } catch (e) {
+    console.warn('Não foi possível guardar o relatório em cache:', e);
+  }
+}
+
+function conditionalHeaders(cached) {
+  const headers = { 'Accept': 'application/json' };
+  if (cached && cached.data) {
+    if (cached.etag) headers['If-None-Match'] = cached.etag;
+    if (cached.lastModified) headers['If-Modified-Since'] = cached.lastModified;
+  }
+  return headers;
+}
+
 function formatDateBR(d = new Date()) {
   return d.toLocaleDateString('pt-BR', { day: '2-digit', month: 'long', year: 'numeric' });
 }
@@ -57,7 +89,10 @@ async function loadDashboardData() {
             });
             console.log('📤 POST analisar_todos_estudantes status:', postResponse.status);
             
-            if (!postResponse.ok) {
+            // 429/503: análise em andamento ou servidor ocupado; o relatório atual ainda é carregado
+            if (postResponse.status === 429 || postResponse.status === 503) {
+                console.warn('⏳ Análise não disparada agora:', postResponse.status, postResponse.headers.get('Retry-After'));
+            } else if (!postResponse.ok) {
                 const postErrorText = await postResponse.text();
                 console.error('❌ Erro no POST:', postResponse.status, postErrorText);
                 throw new Error(`Erro ao analisar estudantes: ${postResponse.status}: ${postErrorText}`);
@@ -68,9 +103,10 @@ async function loadDashboardData() {
         }
 
         
+        const cachedReport = readReportCache();
         const response = await fetch(apiUrl(API_ENDPOINT), {
             method: 'GET',
-            headers: { 'Accept': 'application/json' },
+            headers: conditionalHeaders(cachedReport),
             credentials: 'omit',
             signal: controller.signal,
             cache: 'no-store'
@@ -82,6 +118,13 @@ async function loadDashboardData() {
         console.log('📡 Headers da resposta:', Object.fromEntries(response.headers));
         console.log('📡 URL final:', response.url);
 
+        if (response.status === 304 && cachedReport) {
+            console.log('♻️ Relatório não modificado, usando versão em cache');
+            dashboardData = cachedReport.data;
+            ensureShape(dashboardData);
+            return;
+        }
+
         if (!response.ok) {
             const errorText = await response.text();
             console.error('❌ Erro HTTP:', response.status, errorText);
@@ -101,6 +144,7 @@ async function loadDashboardData() {
             throw new Error(`Resposta não é JSON válido: ${jsonError.message}`);
         }
 
+        writeReportCache(response, data);
         ensureShape(data);
         dashboardData = data;
         console.log('✅ Dados finais processados:', dashboardData);
@@ -112,11 +156,29 @@ async function loadDashboardData() {
         dashboardData = fallbackData;
         console.log('🔄 Usando dados de fallback');
     } finally {
+        await loadTrendData();
         hideLoadingState();
         updateDashboard();
     }
 }
 
+async function loadTrendData() {
+  // a tendência é complementar ao relatório: se falhar, o gráfico fica vazio e o resto do painel segue
+  try {
+    const response = await fetch(apiUrl(TREND_ENDPOINT), {
+      method: 'GET',
+      headers: { 'Accept': 'application/json' },
+      credentials: 'omit',
+      cache: 'no-store'
+    });
+    if (!response.ok) throw new Error(`API retornou ${response.status}`);
+    trendData = await response.json();
+  } catch (error) {
+    console.warn('Não foi possível carregar a tendência de risco:', error);
+    trendData = null;
+  }
+}
+
 function ensureShape(data) {
   data.mensagem ??= '';
   data.resumo_geral ??= {};
@@ -153,6 +215,7 @@ function updateDashboard() {
   setTimeout(() => {
     initializeRiskChart();
     initializePredictionsChart();
+    initializeTrendChart();
     animateProgressBar();
     setupInteractiveElements();
   }, 100);
@@ -320,6 +383,78 @@ function initializePredictionsChart() {
   predictionsChart = new Chart(chartCtx, config);
 }
 
+function initializeTrendChart() {
+  if (trendChart) trendChart.destroy();
+  trendChart = null;
+
+  const ctx = document.getElementById('trendChart');
+  if (!ctx || !trendData || !Array.isArray(trendData.dias)) return;
+
+  const dias = trendData.dias;
+  const serie = (label, campo, cor) => ({
+    label,
+    data: dias.map(d => d[campo]),
+    borderColor: cor,
+    backgroundColor: cor,
+    pointRadius: 0,
+    tension: 0.2
+  });
+
+  const config = {
+    type: 'line',
+    data: {
+      labels: dias.map(d => new Date(`${d.data}T00:00:00`).toLocaleDateString('pt-BR', { day: '2-digit', month: '2-digit' })),
+      datasets: [
+        serie('Alto Risco', 'risco_alto', '#B4413C'),
+        serie('Médio Risco', 'risco_medio', '#FFC185'),
+        serie('Baixo Risco', 'risco_baixo', '#1FB8CD')
+      ]
+    },
+    options: {
+      responsive: true,
+      maintainAspectRatio: false,
+      interaction: { mode: 'index', intersect: false },
+      plugins: {
+        legend: {
+          position: 'bottom',
+          labels: { usePointStyle: true, font: { family: 'FKGroteskNeue, Inter, sans-serif' } }
+        },
+        tooltip: {
+          callbacks: {
+            label: function (context) {
+              const value = context.raw;
+              return `${context.dataset.label}: ${value} aluno${value !== 1 ? 's' : ''}`;
+            },
+            footer: function (items) {
+              const dia = dias[items[0].dataIndex];
+              const media = dia.probabilidade_media == null ? '-' : (dia.probabilidade_media * 100).toFixed(1) + '%';
+              return `Probabilidade média: ${media} • Avaliados no dia: ${dia.estudantes_avaliados}`;
+            }
+          }
+        }
+      },
+      scales: {
+        y: {
+          beginAtZero: true,
+          ticks: { precision: 0, font: { family: 'FKGroteskNeue, Inter, sans-serif' } },
+          grid: { color: 'rgba(0, 0, 0, 0.1)' }
+        },
+        x: {
+          ticks: { maxTicksLimit: 12, font: { family: 'FKGroteskNeue, Inter, sans-serif' } },
+          grid: { display: false }
+        }
+      },
+      animation: { duration: 1000 }
+    }
+  };
+
+  try {
+    trendChart = new Chart(ctx.getContext('2d'), config);
+  } catch (error) {
+    console.error('Erro ao criar gráfico de tendência:', error);
+  }
+}
+
 function animateProgressBar() {
   if (!dashboardData) return;
   const progressFill = document.querySelector('.progress-fill');
@@ -1,3 +1,60 @@
 from django.contrib import admin
+from app.contagem_estimada import PaginadorEstimado
+from .models import PredicaoEvasao, ReavaliacaoSolicitada
 
-# Register your models here.
+
+@admin.action(description='Reavaliar os estudantes das predições selecionadas (em segundo plano)',
+              permissions=['reavaliar'])
+def reavaliar_estudantes(modeladmin, request, queryset):
+    total = ReavaliacaoSolicitada.solicitar(
+        queryset.order_by().values_list('estudante_id', flat=True).distinct().iterator(chunk_size=1000)
+    )
+    modeladmin.message_user(
+        request,
+        f'{total} estudantes enfileirados para reavaliação; a fila é processada por manage.py processar_reavaliacoes.'
+    )
+
+
+@admin.register(PredicaoEvasao)
+class PredicaoEvasaoAdmin(admin.ModelAdmin):
+    """Consulta das predições; elas são gravadas só pela análise, então o admin é somente leitura."""
+    list_display = ('id', 'matricula', 'nivel_risco', 'previsao', 'probabilidade', 'mais_recente', 'data_predicao')
+    list_select_related = ('estudante',)
+    list_filter = ('nivel_risco', 'mais_recente', 'estudante__turno_aulas')
+    search_fields = ('estudante__matricula',)
+    search_help_text = 'Matrícula completa do estudante'
+    ordering = ('-id',)
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    raw_id_fields = ('estudante',)
+    actions = [reavaliar_estudantes]
+
+    @admin.display(description='Matrícula', ordering='estudante__matricula')
+    def matricula(self, predicao):
+        return predicao.estudante.matricula
+
+    def get_search_results(self, request, queryset, search_term):
+        termo = search_term.strip()
+        if not termo:
+            return queryset, False
+        return queryset.filter(estudante__matricula=termo), False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_reavaliar_permission(self, request):
+        return request.user.has_perm('analises.solicitar_reavaliacao')
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReavaliacaoSolicitada)
+class ReavaliacaoSolicitadaAdmin(admin.ModelAdmin):
+    list_display = ('estudante_id', 'solicitada_em')
+    ordering = ('id',)
+    paginator = PaginadorEstimado
+    show_full_result_count = False
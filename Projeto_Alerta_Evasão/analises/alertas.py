@@ -0,0 +1,173 @@
+import hashlib
+import json
+import random
+import urllib.request
+from datetime import timedelta
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+from .models import AlertaRisco
+
+TAMANHO_LOTE = 100
+MAX_TENTATIVAS = 8
+ESPERA_BASE_SEGUNDOS = 30
+ESPERA_MAXIMA_SEGUNDOS = 6 * 60 * 60
+# tempo que um lote reservado fica fora da fila; se o despachante morrer durante o envio, os
+# alertas voltam a ser entregues depois desse prazo. Precisa ser maior que o envio mais lento.
+PRAZO_RESERVA_SEGUNDOS = 5 * 60
+
+
+def payload(alerta):
+    return {
+        'chave': alerta.chave,
+        'tipo': alerta.tipo,
+        'estudante_id': alerta.estudante_id,
+        'matricula': alerta.matricula,
+        'predicao_id': alerta.predicao_id,
+        'nivel_anterior': alerta.nivel_anterior or None,
+        'nivel_atual': alerta.nivel_atual,
+        'probabilidade': alerta.probabilidade,
+        'criado_em': alerta.criado_em.isoformat(),
+    }
+
+
+def chave_lote(alertas):
+    """Chave de idempotência do lote: a mesma lista de alertas gera sempre a mesma chave."""
+    return hashlib.sha256('\n'.join(a['chave'] for a in alertas).encode()).hexdigest()[:32]
+
+
+class DestinoWebhook:
+    """POST de {'chave_lote', 'alertas'} em JSON, com a chave do lote no cabeçalho Idempotency-Key."""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def enviar(self, alertas):
+        chave = chave_lote(alertas)
+        requisicao = urllib.request.Request(
+            self.url,
+            data=json.dumps({'chave_lote': chave, 'alertas': alertas}).encode(),
+            method='POST',
+            headers={'Content-Type': 'application/json', 'Idempotency-Key': chave},
+        )
+        # respostas 4xx/5xx levantam HTTPError e o lote volta para a fila
+        with urllib.request.urlopen(requisicao, timeout=self.timeout):
+            pass
+
+
+class DestinoEmail:
+    """
+    Um e-mail por lote pelo EMAIL_BACKEND do Django; em desenvolvimento, o backend de console
+    ou de arquivo substitui o servidor SMTP.
+    """
+
+    def __init__(self, destinatarios, remetente=None):
+        self.destinatarios = destinatarios
+        self.remetente = remetente
+
+    def enviar(self, alertas):
+        entradas = [a for a in alertas if a['tipo'] == 'entrou_alto']
+        linhas = [
+            f"{'ENTROU' if a['tipo'] == 'entrou_alto' else 'SAIU  '} {a['matricula']:<9} "
+            f"{a['nivel_anterior'] or '-':>6} -> {a['nivel_atual']:<6} {a['probabilidade']:.1%}"
+            for a in alertas
+        ]
+        EmailMessage(
+            subject=f'[Alerta Evasão] {len(entradas)} estudante(s) em risco alto, {len(alertas) - len(entradas)} saída(s)',
+            body='\n'.join(linhas),
+            from_email=self.remetente,
+            to=self.destinatarios,
+            headers={'X-Idempotency-Key': chave_lote(alertas)},
+        ).send()
+
+
+class DestinoArquivo:
+    """Acrescenta uma linha JSON por alerta ao arquivo; quem lê descarta chaves repetidas."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    def enviar(self, alertas):
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            for alerta in alertas:
+                f.write(json.dumps(alerta, ensure_ascii=False) + '\n')
+
+
+class DestinoConsole:
+    """Escreve os alertas em uma stream (a saída do comando); substitui os demais destinos em testes locais."""
+
+    def __init__(self, saida):
+        self.saida = saida
+
+    def enviar(self, alertas):
+        for alerta in alertas:
+            self.saida.write(json.dumps(alerta, ensure_ascii=False))
+
+
+def proxima_espera(tentativas):
+    """Backoff exponencial com jitter: 30 s, 60 s, 120 s... até 6 h."""
+    espera = min(ESPERA_BASE_SEGUNDOS * 2 ** (tentativas - 1), ESPERA_MAXIMA_SEGUNDOS)
+    return timedelta(seconds=espera * random.uniform(0.8, 1.2))
+
+
+def despachar_lote(destino, tamanho_lote=TAMANHO_LOTE, max_tentativas=MAX_TENTATIVAS):
+    """
+    Entrega um lote de alertas pendentes ao `destino`, em três passos:
+
+    1. uma transação curta reserva o lote (SKIP LOCKED) adiando `proxima_tentativa_em` por
+       PRAZO_RESERVA_SEGUNDOS, então vários despachantes podem rodar ao mesmo tempo;
+    2. o envio acontece fora de transação, sem travas de linha abertas;
+    3. outra transação curta grava o resultado. Em caso de erro o lote inteiro volta para a fila
+       com backoff, e após `max_tentativas` os alertas ficam como 'falhou'.
+
+    Retorna (entregues, com_erro).
+    """
+    agora = timezone.now()
+    reserva = agora + timedelta(seconds=PRAZO_RESERVA_SEGUNDOS)
+    with transaction.atomic():
+        alertas = list(
+            AlertaRisco.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pendente', proxima_tentativa_em__lte=agora)
+            .order_by('proxima_tentativa_em', 'id')[:tamanho_lote]
+        )
+        if not alertas:
+            return 0, 0
+        ids = [a.id for a in alertas]
+        AlertaRisco.objects.filter(id__in=ids).update(proxima_tentativa_em=reserva)
+
+    try:
+        destino.enviar([payload(a) for a in alertas])
+    except Exception as ex:
+        with transaction.atomic():
+            # com a reserva vencida, outro despachante pode ter assumido o lote; só ele grava o resultado
+            reservados = list(
+                AlertaRisco.objects
+                .select_for_update()
+                .filter(id__in=ids, status='pendente', proxima_tentativa_em=reserva)
+            )
+            for alerta in reservados:
+                alerta.tentativas += 1
+                alerta.ultimo_erro = f'{type(ex).__name__}: {ex}'[:2000]
+                alerta.proxima_tentativa_em = agora + proxima_espera(alerta.tentativas)
+                alerta.status = 'falhou' if alerta.tentativas >= max_tentativas else 'pendente'
+            AlertaRisco.objects.bulk_update(
+                reservados, ['tentativas', 'ultimo_erro', 'proxima_tentativa_em', 'status']
+            )
+        return 0, len(alertas)
+
+    # entregue vale mesmo com a reserva vencida: um reenvio do mesmo alerta é descartado pela chave
+    AlertaRisco.objects.filter(id__in=ids, status='pendente').update(status='entregue', entregue_em=timezone.now())
+    return len(alertas), 0
+
+
+def despachar(destino, tamanho_lote=TAMANHO_LOTE, max_tentativas=MAX_TENTATIVAS):
+    """Esvazia a fila de alertas prontos para envio; para no primeiro lote com erro."""
+    entregues = com_erro = 0
+    while True:
+        lote_entregues, lote_com_erro = despachar_lote(destino, tamanho_lote, max_tentativas)
+        entregues += lote_entregues
+        com_erro += lote_com_erro
+        if lote_com_erro or not lote_entregues:
+            return entregues, com_erro
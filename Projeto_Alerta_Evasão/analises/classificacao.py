@@ -0,0 +1,111 @@
+import hashlib
+import json
+import numpy as np
+from django.db import transaction
+from django.db.models import Case, Max, Min, Q, Value, When
+from estudantes.models import VersaoRecurso
+from .models import AlertaRisco, PredicaoEvasao, ResumoRiscoDiario
+from .tendencia import variacao_reclassificacao
+
+TAMANHO_LOTE = 5000
+
+
+def versao_classificacao(meta):
+    """Identificador curto das faixas de risco e do threshold usados para classificar."""
+    parametros = {
+        'low': meta['risk_bands']['low'],
+        'high': meta['risk_bands']['high'],
+        'threshold': meta['best_threshold'],
+    }
+    return hashlib.sha1(json.dumps(parametros, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def classificar_lote(probabilidades, meta):
+    """Nível de risco e previsão de cada probabilidade de `probabilidades`, como arrays."""
+    faixa_risco = meta['risk_bands']
+    nivel_risco = np.where(
+        probabilidades >= faixa_risco['high'], 'Alto',
+        np.where(probabilidades >= faixa_risco['low'], 'Médio', 'Baixo')
+    )
+    previsao = np.where(probabilidades >= meta['best_threshold'], 'Evasão', 'Não evasão')
+    return nivel_risco, previsao
+
+
+def classificar(probabilidade, meta):
+    # a mesma regra da pontuação em lote, para que a API e o pontuar_arquivo não divirjam
+    nivel_risco, previsao = classificar_lote(np.array([probabilidade]), meta)
+    return str(nivel_risco[0]), str(previsao[0])
+
+
+def reclassificar_predicoes(meta, tamanho_lote=TAMANHO_LOTE, filtro=None):
+    """
+    Recalcula `nivel_risco` e `previsao` de todas as predições a partir das probabilidades já
+    gravadas, com um UPDATE ... CASE por faixa de ids, sem executar o modelo.
+
+    Linhas que já estão na versão de `meta` são puladas, então uma execução interrompida pode
+    ser retomada. `filtro` (um Q sobre PredicaoEvasao) restringe as predições, por exemplo às de
+    um campus. Predições vigentes que entram ou saem do risco Alto geram AlertaRisco, e a mudança
+    nos totais vigentes vai para o ResumoRiscoDiario do dia, na mesma transação do lote. Retorna a quantidade de predições atualizadas.
+    """
+    versao = versao_classificacao(meta)
+    faixa_risco = meta['risk_bands']
+
+    nivel_risco = Case(
+        When(probabilidade__gte=faixa_risco['high'], then=Value('Alto')),
+        When(probabilidade__gte=faixa_risco['low'], then=Value('Médio')),
+        default=Value('Baixo'),
+    )
+    previsao = Case(
+        When(probabilidade__gte=meta['best_threshold'], then=Value('Evasão')),
+        default=Value('Não evasão'),
+    )
+
+    predicoes = PredicaoEvasao.objects.filter(filtro) if filtro is not None else PredicaoEvasao.objects.all()
+
+    limites = predicoes.aggregate(inicio=Min('id'), fim=Max('id'))
+    if limites['inicio'] is None:
+        return 0
+
+    atualizadas = 0
+    for inicio in range(limites['inicio'], limites['fim'] + 1, tamanho_lote):
+        with transaction.atomic():
+            lote = (
+                predicoes
+                .filter(id__gte=inicio, id__lt=inicio + tamanho_lote)
+                .exclude(versao_classificacao=versao)
+            )
+            _registrar_transicoes(lote, nivel_risco, versao)
+            ResumoRiscoDiario.objects.aplicar(variacao_reclassificacao(lote, nivel_risco, previsao))
+            atualizadas += lote.update(nivel_risco=nivel_risco, previsao=previsao, versao_classificacao=versao)
+
+    if atualizadas:
+        VersaoRecurso.incrementar('predicoes')
+    return atualizadas
+
+
+def _registrar_transicoes(lote, nivel_risco, versao):
+    transicoes = (
+        lote
+        .filter(mais_recente=True)
+        .annotate(novo_nivel=nivel_risco)
+        .filter(
+            (Q(nivel_risco='Alto') & ~Q(novo_nivel='Alto'))
+            | (~Q(nivel_risco='Alto') & Q(novo_nivel='Alto'))
+        )
+        .values('id', 'estudante_id', 'estudante__matricula', 'nivel_risco', 'novo_nivel', 'probabilidade')
+    )
+
+    alertas = []
+    for linha in transicoes:
+        tipo = 'entrou_alto' if linha['novo_nivel'] == 'Alto' else 'saiu_alto'
+        alertas.append(AlertaRisco(
+            chave=f"reclassificacao-{versao}-{linha['id']}-{tipo}",
+            tipo=tipo,
+            estudante_id=linha['estudante_id'],
+            matricula=linha['estudante__matricula'],
+            predicao_id=linha['id'],
+            nivel_anterior=linha['nivel_risco'],
+            nivel_atual=linha['novo_nivel'],
+            probabilidade=linha['probabilidade'],
+        ))
+    AlertaRisco.objects.bulk_create(alertas, ignore_conflicts=True)
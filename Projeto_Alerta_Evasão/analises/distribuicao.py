@@ -0,0 +1,134 @@
+import math
+import numpy as np
+from django.db import connection, transaction
+from .models import PredicaoEvasao
+
+QUANTIS = (0.10, 0.50, 0.90, 0.99)
+TAMANHO_LOTE = 5000
+TENTATIVAS = 3
+
+
+def calcular_distribuicao(faixas):
+    """
+    Calcula o histograma de `probabilidade` das predições vigentes (uma por estudante) em
+    `faixas` intervalos iguais entre 0 e 1 e os quantis p10/p50/p90/p99, sem trazer as
+    predições para a aplicação no PostgreSQL.
+    """
+    if connection.vendor == 'postgresql':
+        total, contagens, quantis = _distribuicao_postgresql(faixas)
+    else:
+        total, contagens, quantis = _distribuicao_streaming(faixas)
+
+    return {
+        'total': total,
+        'contagens': contagens,
+        'quantis': {
+            f'p{int(round(q * 100))}': (round(v, 4) if v is not None else None)
+            for q, v in zip(QUANTIS, quantis)
+        },
+    }
+
+
+def _distribuicao_postgresql(faixas):
+    tabela = PredicaoEvasao._meta.db_table
+
+    with connection.cursor() as cursor:
+        # width_bucket devolve faixas + 1 para probabilidade == 1.0; o LEAST joga esse valor na última faixa
+        cursor.execute(
+            f'''
+            SELECT LEAST(width_bucket(probabilidade, 0, 1, %s), %s) AS faixa, COUNT(*)
+            FROM {tabela}
+            WHERE mais_recente
+            GROUP BY faixa
+            ''',
+            [faixas, faixas],
+        )
+        contagens = [0] * faixas
+        for faixa, quantidade in cursor.fetchall():
+            contagens[max(faixa, 1) - 1] += quantidade
+
+        cursor.execute(
+            f'''
+            SELECT percentile_cont(%s::float8[]) WITHIN GROUP (ORDER BY probabilidade)
+            FROM {tabela}
+            WHERE mais_recente
+            ''',
+            [list(QUANTIS)],
+        )
+        quantis = cursor.fetchone()[0] or [None] * len(QUANTIS)
+
+    return sum(contagens), contagens, list(quantis)
+
+
+def _distribuicao_streaming(faixas):
+    """
+    Caminho para bancos sem width_bucket/percentile_cont: percorre as probabilidades em ordem,
+    em lotes de tamanho fixo, acumulando o histograma e interpolando os quantis como o
+    percentile_cont faz (posição q * (n - 1)), com memória limitada ao tamanho do lote.
+
+    A contagem e a leitura ordenada rodam na mesma transação. Se mesmo assim o número de linhas
+    percorridas diferir da contagem (banco sem leitura consistente na transação), a leitura é
+    refeita com as posições dos quantis calculadas sobre o que foi de fato percorrido.
+    """
+    with transaction.atomic():
+        total = PredicaoEvasao.objects.filter(mais_recente=True).count()
+        for _ in range(TENTATIVAS):
+            percorridas, contagens, valores_nos_indices, posicoes = _percorrer(faixas, total)
+            if percorridas == total:
+                break
+            total = percorridas
+
+    if percorridas == 0:
+        return 0, contagens.tolist(), [None] * len(QUANTIS)
+
+    quantis = []
+    for p in posicoes:
+        inferior = valores_nos_indices.get(math.floor(p))
+        superior = valores_nos_indices.get(math.ceil(p))
+        if inferior is None or superior is None:
+            quantis.append(None)
+        else:
+            quantis.append(inferior + (superior - inferior) * (p - math.floor(p)))
+
+    return percorridas, contagens.tolist(), quantis
+
+
+def _percorrer(faixas, total):
+    """Uma leitura ordenada das probabilidades; devolve (linhas percorridas, contagens, valores nos índices, posições)."""
+    contagens = np.zeros(faixas, dtype=np.int64)
+    posicoes = [q * (total - 1) for q in QUANTIS] if total else []
+    indices = sorted({i for p in posicoes for i in (math.floor(p), math.ceil(p))})
+    valores_nos_indices = {}
+
+    valores = (
+        PredicaoEvasao.objects
+        .filter(mais_recente=True)
+        .order_by('probabilidade')
+        .values_list('probabilidade', flat=True)
+        .iterator(chunk_size=TAMANHO_LOTE)
+    )
+
+    inicio = 0
+    lote = []
+    for valor in valores:
+        lote.append(valor)
+        if len(lote) == TAMANHO_LOTE:
+            _acumular_lote(lote, inicio, faixas, contagens, indices, valores_nos_indices)
+            inicio += len(lote)
+            lote = []
+    if lote:
+        _acumular_lote(lote, inicio, faixas, contagens, indices, valores_nos_indices)
+        inicio += len(lote)
+
+    return inicio, contagens, valores_nos_indices, posicoes
+
+
+def _acumular_lote(lote, inicio, faixas, contagens, indices, valores_nos_indices):
+    arr = np.asarray(lote, dtype=np.float64)
+    faixa = np.clip((arr * faixas).astype(np.int64), 0, faixas - 1)
+    contagens += np.bincount(faixa, minlength=faixas)
+
+    fim = inicio + len(arr)
+    for i in indices:
+        if inicio <= i < fim:
+            valores_nos_indices[i] = float(arr[i - inicio])
@@ -0,0 +1,321 @@
+import json
+import math
+import os
+from bisect import bisect_right
+from datetime import datetime, timezone
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from estudantes.models import Estudante
+from .features import MAPA_FEATURES, CAMPOS_ESTUDANTE, features_de_valores
+from .models import FaixaResumoFeatures, ResumoFeatures
+
+NOME_RESUMO = 'producao'
+FAIXAS_REFERENCIA = 10
+TAMANHO_LOTE = 2000
+# limites usuais do PSI: abaixo de 0.1 estável, acima de 0.25 mudança significativa
+PSI_MODERADO = 0.1
+PSI_SIGNIFICATIVO = 0.25
+EPSILON = 1e-4
+
+_referencia = None
+
+
+def caminho_referencia():
+    return os.path.join(settings.BASE_DIR, 'ml_model', 'drift_referencia.json')
+
+
+def carregar_referencia():
+    global _referencia
+    if _referencia is None:
+        caminho = caminho_referencia()
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, 'r') as f:
+            _referencia = json.load(f)
+    return _referencia
+
+
+def gerar_referencia(df):
+    """
+    Monta o snapshot de referência a partir do DataFrame de treino (colunas com os nomes do
+    dataset). As bordas das faixas são os decis de cada feature, e as features binárias
+    ficam com uma borda única em 0.5.
+    """
+    features = {}
+    for feature in MAPA_FEATURES:
+        valores = df[feature].dropna().astype(float).to_numpy()
+        if set(np.unique(valores)) <= {0.0, 1.0}:
+            bordas = [0.5]
+        else:
+            quantis = np.quantile(valores, np.linspace(0, 1, FAIXAS_REFERENCIA + 1)[1:-1])
+            bordas = sorted({round(float(q), 6) for q in quantis})
+        histograma = np.bincount(
+            np.searchsorted(bordas, valores, side='right'), minlength=len(bordas) + 1
+        )
+        features[feature] = {
+            'bordas': bordas,
+            'contagem': int(len(valores)),
+            'soma': float(valores.sum()),
+            'soma_quadrados': float((valores ** 2).sum()),
+            'histograma': histograma.tolist(),
+        }
+
+    return {
+        'gerado_em': datetime.now(timezone.utc).isoformat(),
+        'features': features,
+    }
+
+
+def salvar_referencia(referencia):
+    global _referencia
+    with open(caminho_referencia(), 'w') as f:
+        json.dump(referencia, f, indent=2, ensure_ascii=False)
+    _referencia = referencia
+
+
+def exigir_referencia():
+    referencia = carregar_referencia()
+    if referencia is None:
+        raise FileNotFoundError(
+            f'referência de drift não encontrada em {caminho_referencia()} '
+            '(gere com manage.py monitor_drift --gerar-referencia)'
+        )
+    return referencia
+
+
+def _resumo_vazio(bordas):
+    """Contagem, soma e soma dos quadrados por faixa de cada feature, zeradas; `bordas` por feature."""
+    return {
+        feature: {
+            'bordas': bordas_feature,
+            'contagem': [0] * (len(bordas_feature) + 1),
+            'soma': [0.0] * (len(bordas_feature) + 1),
+            'soma_quadrados': [0.0] * (len(bordas_feature) + 1),
+        }
+        for feature, bordas_feature in bordas.items()
+    }
+
+
+def _bordas(referencia):
+    return {feature: dados['bordas'] for feature, dados in referencia['features'].items()}
+
+
+def _acumular(estatisticas, features, sinal):
+    for feature, valor in features.items():
+        esboco = estatisticas.get(feature)
+        if valor is None or esboco is None:
+            continue
+        valor = float(valor)
+        faixa = bisect_right(esboco['bordas'], valor)
+        esboco['contagem'][faixa] += sinal
+        esboco['soma'][faixa] += sinal * valor
+        esboco['soma_quadrados'][faixa] += sinal * valor * valor
+
+
+def _faixas(resumo, estatisticas):
+    return [
+        FaixaResumoFeatures(
+            resumo=resumo,
+            feature=feature,
+            faixa=faixa,
+            contagem=esboco['contagem'][faixa],
+            soma=esboco['soma'][faixa],
+            soma_quadrados=esboco['soma_quadrados'][faixa],
+        )
+        for feature, esboco in estatisticas.items()
+        for faixa in range(len(esboco['contagem']))
+    ]
+
+
+def _obter_resumo(referencia):
+    """(id, bordas) do resumo de produção, criando-o vazio com as bordas da referência se não existir."""
+    resumo = ResumoFeatures.objects.filter(nome=NOME_RESUMO).values_list('id', 'bordas').first()
+    if resumo is not None:
+        return resumo
+
+    with transaction.atomic():
+        resumo, criado = ResumoFeatures.objects.get_or_create(
+            nome=NOME_RESUMO, defaults={'bordas': _bordas(referencia)}
+        )
+        if criado:
+            FaixaResumoFeatures.objects.bulk_create(_faixas(resumo, _resumo_vazio(resumo.bordas)))
+    return resumo.id, resumo.bordas
+
+
+def aplicar_alteracao(anterior, atual):
+    """
+    Atualiza o resumo de produção em tempo constante: remove os valores `anterior` e soma os
+    valores `atual` (dicts com os campos do Estudante; None em inclusões e remoções).
+
+    As faixas afetadas recebem a variação em um único UPDATE com F() e CASE, e faixas sem
+    variação (campos que não mudaram) ficam de fora; a contagem do resumo só muda em inclusões
+    e remoções. Escritas concorrentes disputam apenas as linhas das mesmas faixas.
+    """
+    referencia = carregar_referencia()
+    if referencia is None:
+        return
+
+    resumo_id, bordas = _obter_resumo(referencia)
+    variacao = _resumo_vazio(bordas)
+    if anterior is not None:
+        _acumular(variacao, features_de_valores(anterior), -1)
+    if atual is not None:
+        _acumular(variacao, features_de_valores(atual), 1)
+
+    faixas = Q()
+    deltas = {'contagem': [], 'soma': [], 'soma_quadrados': []}
+    for feature, esboco in variacao.items():
+        for faixa in range(len(esboco['contagem'])):
+            if not (esboco['contagem'][faixa] or esboco['soma'][faixa] or esboco['soma_quadrados'][faixa]):
+                continue
+            condicao = Q(feature=feature, faixa=faixa)
+            faixas |= condicao
+            for campo, lista in deltas.items():
+                lista.append(When(condicao, then=Value(esboco[campo][faixa])))
+
+    with transaction.atomic():
+        if deltas['contagem']:
+            FaixaResumoFeatures.objects.filter(faixas, resumo_id=resumo_id).update(
+                contagem=F('contagem') + Case(*deltas['contagem'], default=Value(0), output_field=IntegerField()),
+                soma=F('soma') + Case(*deltas['soma'], default=Value(0.0), output_field=FloatField()),
+                soma_quadrados=F('soma_quadrados') + Case(
+                    *deltas['soma_quadrados'], default=Value(0.0), output_field=FloatField()
+                ),
+                atualizada_em=datetime.now(timezone.utc),
+            )
+        if (anterior is None) != (atual is None):
+            ResumoFeatures.objects.filter(id=resumo_id).update(
+                contagem=F('contagem') + (1 if atual is not None else -1)
+            )
+
+
+def recalcular_resumo():
+    """
+    Reconstrói o resumo de produção percorrendo a tabela de estudantes em lotes, com as bordas
+    da referência atual. Levanta FileNotFoundError se a referência não existir.
+    """
+    referencia = exigir_referencia()
+    estatisticas = _resumo_vazio(_bordas(referencia))
+    contagem = 0
+
+    with transaction.atomic():
+        resumo, _ = ResumoFeatures.objects.select_for_update().get_or_create(nome=NOME_RESUMO)
+        # as escritas concorrentes esperam a reconstrução terminar
+        list(FaixaResumoFeatures.objects.select_for_update().filter(resumo=resumo).values_list('id', flat=True))
+        for valores in Estudante.objects.order_by().values(*CAMPOS_ESTUDANTE).iterator(chunk_size=TAMANHO_LOTE):
+            _acumular(estatisticas, features_de_valores(valores), 1)
+            contagem += 1
+
+        resumo.faixas.all().delete()
+        FaixaResumoFeatures.objects.bulk_create(_faixas(resumo, estatisticas))
+        resumo.contagem = contagem
+        resumo.bordas = _bordas(referencia)
+        resumo.save()
+    return contagem
+
+
+def estatisticas_resumo(resumo):
+    """
+    Soma, soma dos quadrados e histograma de cada feature do `resumo`, juntando as suas faixas,
+    e o instante da última atualização. Retorna (estatisticas, atualizado_em).
+    """
+    estatisticas = {
+        feature: {'bordas': bordas, 'soma': 0.0, 'soma_quadrados': 0.0, 'histograma': [0] * (len(bordas) + 1)}
+        for feature, bordas in resumo.bordas.items()
+    }
+    atualizado_em = resumo.atualizado_em
+    faixas = resumo.faixas.values_list('feature', 'faixa', 'contagem', 'soma', 'soma_quadrados', 'atualizada_em')
+    for feature, faixa, contagem, soma, soma_quadrados, atualizada_em in faixas:
+        esboco = estatisticas.get(feature)
+        if esboco is None or faixa >= len(esboco['histograma']):
+            continue
+        esboco['histograma'][faixa] = contagem
+        esboco['soma'] += soma
+        esboco['soma_quadrados'] += soma_quadrados
+        atualizado_em = max(atualizado_em, atualizada_em)
+    return estatisticas, atualizado_em
+
+
+def _media_desvio(contagem, soma, soma_quadrados):
+    if contagem == 0:
+        return None, None
+    media = soma / contagem
+    variancia = max(soma_quadrados / contagem - media * media, 0.0)
+    return media, math.sqrt(variancia)
+
+
+def _proporcoes(histograma):
+    total = sum(histograma)
+    return [max(h / total, EPSILON) for h in histograma]
+
+
+def calcular_drift():
+    """
+    Compara o resumo de produção com a referência de treino: PSI e KS (sobre as faixas) por
+    feature. Lê o resumo e as suas faixas (algumas dezenas de linhas), então o custo não
+    depende do tamanho da tabela.
+    """
+    referencia = exigir_referencia()
+
+    resumo = ResumoFeatures.objects.filter(nome=NOME_RESUMO).first()
+    contagem = resumo.contagem if resumo else 0
+    estatisticas, atualizado_em = estatisticas_resumo(resumo) if resumo else ({}, None)
+
+    features = {}
+    for feature, ref in referencia['features'].items():
+        media_ref, desvio_ref = _media_desvio(ref['contagem'], ref['soma'], ref['soma_quadrados'])
+        resultado = {
+            'campo_estudante': MAPA_FEATURES[feature],
+            'media_referencia': round(media_ref, 4),
+            'desvio_referencia': round(desvio_ref, 4),
+            'media_producao': None,
+            'desvio_producao': None,
+            'psi': None,
+            'ks': None,
+            'situacao': 'sem dados',
+        }
+
+        esboco = estatisticas.get(feature)
+        if esboco and esboco['bordas'] != ref['bordas']:
+            resultado['situacao'] = 'resumo desatualizado'
+        elif esboco and contagem > 0:
+            media, desvio = _media_desvio(contagem, esboco['soma'], esboco['soma_quadrados'])
+            p = _proporcoes(esboco['histograma'])
+            q = _proporcoes(ref['histograma'])
+            psi = sum((pi - qi) * math.log(pi / qi) for pi, qi in zip(p, q))
+            ks = float(np.max(np.abs(np.cumsum(p) - np.cumsum(q))))
+
+            if psi >= PSI_SIGNIFICATIVO:
+                situacao = 'significativo'
+            elif psi >= PSI_MODERADO:
+                situacao = 'moderado'
+            else:
+                situacao = 'estável'
+
+            resultado.update({
+                'media_producao': round(media, 4),
+                'desvio_producao': round(desvio, 4),
+                'psi': round(psi, 4),
+                'ks': round(ks, 4),
+                'situacao': situacao,
+            })
+
+        features[feature] = resultado
+
+    return {
+        'total_producao': contagem,
+        'referencia_gerada_em': referencia['gerado_em'],
+        'atualizado_em': atualizado_em,
+        'features': features,
+    }
+
+
+def carregar_dataset_treino(caminho_csv):
+    """Linhas do dataset original usadas no treino do modelo (mesma divisão do notebook)."""
+    from .treinamento import carregar_dataset, dividir
+
+    X, y = carregar_dataset(caminho_csv)
+    X_treino, _, _, _ = dividir(X, y)
+    return X_treino
@@ -0,0 +1,229 @@
+import time
+import zlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from estudantes.models import Estudante, VersaoRecurso
+from .models import ExecucaoAnalise, PredicaoEvasao, ReavaliacaoSolicitada, TravaExecucao
+from .services import modelo_service
+from .snapshot import colunas_de_estudantes
+
+NOME_TRAVA = 'analisar_todos_estudantes'
+INTERVALO_ESPERA = 0.25
+TAMANHO_LOTE = 500
+
+
+class AnaliseEmAndamento(Exception):
+    """A execução em andamento não terminou dentro do tempo máximo de espera."""
+
+
+class Trava:
+    """
+    Trava entre processos: advisory lock de sessão no PostgreSQL e, nos demais bancos,
+    um UPDATE condicional na tabela TravaExecucao com expiração para processos que morreram.
+    """
+
+    def __init__(self, nome, expiracao=timedelta(minutes=30)):
+        self.nome = nome
+        self.chave = zlib.crc32(nome.encode())
+        self.expiracao = expiracao
+
+    def tentar(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_try_advisory_lock(%s)', [self.chave])
+                return cursor.fetchone()[0]
+
+        agora = timezone.now()
+        TravaExecucao.objects.get_or_create(nome=self.nome)
+        return bool(
+            TravaExecucao.objects
+            .filter(nome=self.nome)
+            .filter(Q(ocupada_desde__isnull=True) | Q(ocupada_desde__lt=agora - self.expiracao))
+            .update(ocupada_desde=agora)
+        )
+
+    def liberar(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [self.chave])
+            return
+
+        TravaExecucao.objects.filter(nome=self.nome).update(ocupada_desde=None)
+
+
+def executar_analise_unica():
+    """
+    Executa a análise de todos os estudantes no máximo uma vez por vez.
+
+    Quem obtém a trava executa; quem chega durante uma execução espera que ela termine e
+    recebe o mesmo resultado, sem repetir o trabalho. Se ANALISE_INTERVALO_MINIMO_SEGUNDOS
+    estiver configurado, uma execução concluída há menos tempo que isso é reaproveitada.
+
+    Retorna (execucao, reaproveitada).
+    """
+    intervalo_minimo = getattr(settings, 'ANALISE_INTERVALO_MINIMO_SEGUNDOS', 0)
+    espera_maxima = getattr(settings, 'ANALISE_ESPERA_MAXIMA_SEGUNDOS', 300)
+
+    chegada = timezone.now()
+    limite_espera = time.monotonic() + espera_maxima
+    trava = Trava(NOME_TRAVA)
+
+    while True:
+        if trava.tentar():
+            try:
+                recente = (
+                    ExecucaoAnalise.objects
+                    .filter(status='concluida', concluida_em__gte=chegada - timedelta(seconds=intervalo_minimo))
+                    .first()
+                )
+                if recente:
+                    return recente, True
+                return _executar(), False
+            finally:
+                trava.liberar()
+
+        if time.monotonic() >= limite_espera:
+            raise AnaliseEmAndamento()
+        time.sleep(INTERVALO_ESPERA)
+
+
+def _executar():
+    execucao = ExecucaoAnalise.objects.create()
+    try:
+        execucao.resultado = analisar_estudantes_sem_predicao()
+        execucao.status = 'concluida'
+    except Exception:
+        execucao.status = 'falhou'
+        raise
+    finally:
+        execucao.concluida_em = timezone.now()
+        execucao.save(update_fields=['status', 'resultado', 'concluida_em'])
+    return execucao
+
+
+def _lotes_por_campus(estudantes, tamanho):
+    """Agrupa estudantes ordenados por campus em lotes de um único campus."""
+    lote = []
+    for estudante in estudantes:
+        if lote and (len(lote) == tamanho or estudante.campus != lote[0].campus):
+            yield lote
+            lote = []
+        lote.append(estudante)
+    if lote:
+        yield lote
+
+
+def _prever_e_registrar(lote, predicoes_criadas, predicoes_com_erro):
+    """Prevê um lote de estudantes do mesmo campus e grava as predições, acumulando o resultado nas listas."""
+    try:
+        ids, colunas = colunas_de_estudantes([estudante.id for estudante in lote])
+        resultados = dict(zip(ids.tolist(), modelo_service.prever_evasao_lote(colunas, lote[0].campus)))
+    except Exception as ex:
+        predicoes_com_erro.extend({'estudante_id': estudante.id, 'erro': str(ex)} for estudante in lote)
+        return
+
+    for estudante in lote:
+        resultado = resultados.get(estudante.id)
+        if resultado is None:
+            # removido depois de selecionado
+            continue
+
+        try:
+            PredicaoEvasao.objects.registrar(estudante, resultado)
+
+            predicoes_criadas.append({
+                'estudante_id': estudante.id,
+                'matricula_estudante': estudante.matricula,
+                'previsao': resultado['previsao'],
+                'nivel_risco': resultado['nivel_risco'],
+                'probabilidade': f"{resultado['probabilidade']:.2%}"
+            })
+
+        except IntegrityError:
+            # outra execução gravou a predição deste estudante primeiro
+            continue
+
+        except Exception as ex:
+            predicoes_com_erro.append({
+                'estudante_id': estudante.id,
+                'erro': str(ex)
+            })
+
+
+def analisar_estudantes_sem_predicao():
+    """
+    Prevê a evasão dos estudantes sem predição em lotes: as features vêm do snapshot colunar
+    e o modelo do campus do lote roda uma vez por lote.
+    """
+    sem_predicao = (
+        Estudante.objects
+        .filter(~Exists(PredicaoEvasao.objects.filter(estudante=OuterRef('pk'))))
+        .only('id', 'matricula', 'campus')
+        .order_by('campus', 'id')
+    )
+
+    predicoes_criadas = []
+    predicoes_com_erro = []
+
+    try:
+        for lote in _lotes_por_campus(sem_predicao.iterator(chunk_size=TAMANHO_LOTE), TAMANHO_LOTE):
+            _prever_e_registrar(lote, predicoes_criadas, predicoes_com_erro)
+    finally:
+        if predicoes_criadas:
+            VersaoRecurso.incrementar('predicoes')
+
+    if len(predicoes_criadas) == 0:
+        return {
+            'mensagem': 'Nenhuma predição foi realizada, pois todos os alunos já possuem predições cadastradas ou não há alunos disponíveis'
+        }
+
+    return {
+        'mensagem': f'{len(predicoes_criadas)} predições criadas',
+        'total_alunos_analisados': Estudante.objects.count(),
+        'predicoes_criadas': len(predicoes_criadas),
+        'predicoes_com_erro': len(predicoes_com_erro),
+        'detalhes_predicoes': predicoes_criadas,
+        'erros': predicoes_com_erro if predicoes_com_erro else None
+    }
+
+
+def processar_reavaliacoes(tamanho_lote=TAMANHO_LOTE):
+    """
+    Reavalia os estudantes da fila ReavaliacaoSolicitada, um lote por transação. Os pedidos do
+    lote são travados com SKIP LOCKED, então vários processos podem consumir a fila, e saem
+    dela junto com a gravação das predições; estudantes já removidos são descartados.
+
+    Retorna (reavaliados, erros), com a lista de erros por estudante.
+    """
+    reavaliados = []
+    erros = []
+    try:
+        while True:
+            with transaction.atomic():
+                pedidos = list(
+                    ReavaliacaoSolicitada.objects
+                    .select_for_update(skip_locked=True)
+                    .order_by('id')
+                    .values_list('id', 'estudante_id')[:tamanho_lote]
+                )
+                if not pedidos:
+                    break
+
+                estudantes = (
+                    Estudante.objects
+                    .filter(id__in=[estudante_id for _, estudante_id in pedidos])
+                    .only('id', 'matricula', 'campus')
+                    .order_by('campus', 'id')
+                )
+                for lote in _lotes_por_campus(estudantes, tamanho_lote):
+                    _prever_e_registrar(lote, reavaliados, erros)
+
+                ReavaliacaoSolicitada.objects.filter(id__in=[id for id, _ in pedidos]).delete()
+    finally:
+        if reavaliados:
+            VersaoRecurso.incrementar('predicoes')
+
+    return reavaliados, erros
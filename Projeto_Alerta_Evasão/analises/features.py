@@ -0,0 +1,29 @@
+# Correspondência entre as features esperadas pelo modelo (nomes do dataset de treino)
+# e os campos do modelo Estudante
+MAPA_FEATURES = {
+    'Age at enrollment': 'idade_ingresso',
+    'Gender': 'genero',
+    'Daytime/evening attendance': 'turno_aulas',
+    'Scholarship holder': 'bolsista',
+    'Educational special needs': 'necessidades_especiais',
+    'Curricular units 1st sem (approved)': 'disciplinas_aprovadas_1per',
+    'Curricular units 1st sem (enrolled)': 'disciplinas_matriculadas_1per',
+    'Curricular units 1st sem (grade)': 'nota_media_1per',
+    'Curricular units 2nd sem (approved)': 'disciplinas_aprovadas_2per',
+    'Curricular units 2nd sem (enrolled)': 'disciplinas_matriculadas_2per',
+    'Curricular units 2nd sem (grade)': 'nota_media_2per',
+}
+
+CAMPOS_ESTUDANTE = tuple(MAPA_FEATURES.values())
+
+
+def valor_para_modelo(valor):
+    return int(valor) if isinstance(valor, bool) else valor
+
+
+def features_de_valores(valores):
+    """Converte um dict com os campos do Estudante no dict de features do modelo."""
+    return {
+        feature: valor_para_modelo(valores[campo])
+        for feature, campo in MAPA_FEATURES.items()
+    }
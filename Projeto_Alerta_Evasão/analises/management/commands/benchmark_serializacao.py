@@ -0,0 +1,100 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from app.renderers import JSONRapidoRenderer, MessagePackRenderer, ColunarRenderer
+from app.serializacao_rapida import serializar_rapido
+from estudantes.models import Estudante
+from estudantes.serializers import EstudanteSerializer
+from analises.models import PredicaoEvasao
+from analises.serializers import PredicaoEvasaoSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mede CPU por 10 mil linhas e tamanho da resposta de cada caminho de serialização e formato'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=10000, help='Quantidade de linhas geradas (padrão 10000)')
+        parser.add_argument('--repeticoes', type=int, default=3, help='Execuções por medição; vale a melhor')
+
+    def handle(self, *args, **options):
+        self.linhas = options['linhas']
+        self.repeticoes = options['repeticoes']
+
+        # os dados sintéticos são criados dentro de uma transação desfeita ao final
+        try:
+            with transaction.atomic():
+                self._popular()
+                self._medir()
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _popular(self):
+        estudantes = Estudante.objects.bulk_create([
+            Estudante(
+                matricula=f'B{i:08d}',
+                idade_ingresso=18 + i % 30,
+                genero=i % 2,
+                turno_aulas=(i // 2) % 2,
+                bolsista=i % 3 == 0,
+                necessidades_especiais=i % 50 == 0,
+                disciplinas_aprovadas_1per=i % 7,
+                disciplinas_matriculadas_1per=6,
+                nota_media_1per=(i % 100) / 10,
+                disciplinas_aprovadas_2per=i % 6,
+                disciplinas_matriculadas_2per=6,
+                nota_media_2per=(i % 90) / 10,
+            )
+            for i in range(self.linhas)
+        ], batch_size=2000)
+        if estudantes[0].pk is None:
+            estudantes = list(Estudante.objects.filter(matricula__startswith='B'))
+
+        PredicaoEvasao.objects.bulk_create([
+            PredicaoEvasao(
+                estudante=estudante,
+                probabilidade=(i % 1000) / 1000,
+                previsao='Evasão' if i % 3 == 0 else 'Não evasão',
+                nivel_risco=('Baixo', 'Médio', 'Alto')[i % 3],
+            )
+            for i, estudante in enumerate(estudantes)
+        ], batch_size=2000)
+
+    def _cpu(self, funcao):
+        melhor = None
+        for _ in range(self.repeticoes):
+            inicio = time.process_time()
+            resultado = funcao()
+            duracao = time.process_time() - inicio
+            melhor = duracao if melhor is None else min(melhor, duracao)
+        return melhor * 10000 / self.linhas * 1000, resultado
+
+    def _medir(self):
+        casos = [
+            ('predicoes', PredicaoEvasao.objects.order_by('-data_predicao'), PredicaoEvasaoSerializer),
+            ('estudantes', Estudante.objects.all(), EstudanteSerializer),
+        ]
+        formatos = [
+            ('json (padrão DRF)', JSONRenderer()),
+            ('json (orjson)', JSONRapidoRenderer()),
+            ('msgpack', MessagePackRenderer()),
+            ('colunar', ColunarRenderer()),
+        ]
+
+        for nome, queryset, serializer_class in casos:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{nome}: ms de CPU por 10 mil linhas'))
+
+            ms, _ = self._cpu(lambda: serializer_class(queryset.all(), many=True).data)
+            self.stdout.write(f'  ModelSerializer          {ms:9.1f}')
+            ms, dados = self._cpu(lambda: serializar_rapido(queryset.all(), serializer_class))
+            self.stdout.write(f'  serializar_rapido        {ms:9.1f}')
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{nome}: renderização'))
+            for formato, renderer in formatos:
+                ms, corpo = self._cpu(lambda: renderer.render(dados))
+                self.stdout.write(f'  {formato:<24} {ms:9.1f} ms  {len(corpo) / 1024:9.1f} KiB')
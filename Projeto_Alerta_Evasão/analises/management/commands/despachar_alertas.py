@@ -0,0 +1,47 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from analises import alertas
+
+
+class Command(BaseCommand):
+    help = 'Entrega em lotes os alertas de risco alto pendentes (outbox) ao destino escolhido'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--destino', choices=['webhook', 'email', 'arquivo', 'console'], default='console',
+                            help='Para onde os alertas são enviados (padrão: console)')
+        parser.add_argument('--url', help='URL do webhook (destino webhook)')
+        parser.add_argument('--para', nargs='+', help='Destinatários (destino email)')
+        parser.add_argument('--arquivo', default=str(settings.BASE_DIR / 'alertas.jsonl'),
+                            help='Arquivo JSON Lines (destino arquivo; padrão: alertas.jsonl)')
+        parser.add_argument('--lote', type=int, default=alertas.TAMANHO_LOTE, help='Alertas por envio')
+        parser.add_argument('--max-tentativas', type=int, default=alertas.MAX_TENTATIVAS,
+                            help='Tentativas antes de o alerta ficar como falhou')
+        parser.add_argument('--continuo', action='store_true', help='Continua rodando e verifica a fila periodicamente')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre verificações com --continuo')
+
+    def _destino(self, options):
+        if options['destino'] == 'webhook':
+            if not options['url']:
+                raise CommandError('informe --url para o destino webhook')
+            return alertas.DestinoWebhook(options['url'])
+        if options['destino'] == 'email':
+            if not options['para']:
+                raise CommandError('informe --para para o destino email')
+            return alertas.DestinoEmail(options['para'])
+        if options['destino'] == 'arquivo':
+            return alertas.DestinoArquivo(options['arquivo'])
+        return alertas.DestinoConsole(self.stdout)
+
+    def handle(self, *args, **options):
+        destino = self._destino(options)
+
+        while True:
+            entregues, com_erro = alertas.despachar(destino, options['lote'], options['max_tentativas'])
+            if entregues or com_erro:
+                estilo = self.style.WARNING if com_erro else self.style.SUCCESS
+                self.stderr.write(estilo(f'{entregues} alertas entregues, {com_erro} com erro (voltam para a fila)'))
+
+            if not options['continuo']:
+                return
+            time.sleep(options['intervalo'])
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from app.schema import gerar_schema
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera o schema OpenAPI servido em /api/schema/ e grava em SCHEMA_OPENAPI_ARQUIVO; '
+        'com --verificar, falha se o arquivo gravado estiver desatualizado em relação ao código'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true',
+                            help='Não grava; termina com erro se o schema gravado for diferente do gerado')
+
+    def handle(self, *args, **options):
+        caminho = settings.SCHEMA_OPENAPI_ARQUIVO
+        schema = gerar_schema()
+
+        if options['verificar']:
+            if not caminho.exists():
+                raise CommandError(f'schema não encontrado: {caminho}. Execute manage.py gerar_schema')
+            if caminho.read_bytes() != schema:
+                raise CommandError(f'schema desatualizado: {caminho}. Execute manage.py gerar_schema')
+            self.stdout.write(self.style.SUCCESS(f'Schema atualizado: {caminho}'))
+            return
+
+        caminho.write_bytes(schema)
+        self.stdout.write(self.style.SUCCESS(f'Schema gravado em {caminho} ({len(schema)} bytes)'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from analises.models import PredicaoEvasao
+
+
+class Command(BaseCommand):
+    help = (
+        'Deixa como vigente (mais_recente) só a última predição de cada estudante; executar em bancos '
+        'com predições antigas antes de criar a constraint predicao_vigente_unica'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Estudantes por transação (padrão: 1000)')
+
+    def handle(self, *args, **options):
+        desmarcadas = PredicaoEvasao.objects.marcar_vigentes(options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'{desmarcadas} predições antigas deixaram de ser vigentes'))
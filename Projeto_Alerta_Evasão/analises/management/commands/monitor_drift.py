@@ -0,0 +1,42 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from analises import drift
+
+
+class Command(BaseCommand):
+    help = 'Gera a referência de drift a partir do dataset de treino e/ou recalcula o resumo de produção'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--gerar-referencia',
+            nargs='?',
+            const=os.path.join(settings.BASE_DIR.parent, 'Aprendizado_de_Máquina', 'dataset.csv'),
+            metavar='CSV',
+            help='Gera ml_model/drift_referencia.json a partir do CSV de treino (padrão: dataset.csv do notebook)'
+        )
+        parser.add_argument(
+            '--recalcular',
+            action='store_true',
+            help='Reconstrói o resumo de produção percorrendo toda a tabela de estudantes'
+        )
+
+    def handle(self, *args, **options):
+        if not options['gerar_referencia'] and not options['recalcular']:
+            self.stderr.write('Informe --gerar-referencia e/ou --recalcular')
+            return
+
+        if options['gerar_referencia']:
+            treino = drift.carregar_dataset_treino(options['gerar_referencia'])
+            drift.salvar_referencia(drift.gerar_referencia(treino))
+            self.stdout.write(self.style.SUCCESS(
+                f'Referência gerada com {len(treino)} linhas em {drift.caminho_referencia()}'
+            ))
+
+        # bordas novas invalidam o resumo de produção, que precisa ser reconstruído
+        if options['recalcular'] or options['gerar_referencia']:
+            try:
+                total = drift.recalcular_resumo()
+            except FileNotFoundError as ex:
+                raise CommandError(str(ex))
+            self.stdout.write(self.style.SUCCESS(f'Resumo de produção recalculado com {total} estudantes'))
@@ -0,0 +1,63 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from analises import pontuacao_offline
+from analises.services import campi_com_modelo, modelo_service
+
+
+class Command(BaseCommand):
+    help = (
+        'Pontua um extrato CSV ou Parquet com as colunas originais do dataset (nomes em inglês) e grava '
+        'probabilidade, previsão e nível de risco em CSV ou Parquet, sem usar o banco de dados'
+    )
+    # não consulta o banco nem as URLs; roda mesmo sem o PostgreSQL disponível
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('entrada', help='Arquivo .csv ou .parquet com as features de features_expected')
+        parser.add_argument('saida', help='Arquivo .csv ou .parquet de saída')
+        parser.add_argument('--campus', default='',
+                            help='Usa o modelo deste campus, que precisa existir (padrão: o modelo padrão)')
+        parser.add_argument('--lote', type=int, default=pontuacao_offline.TAMANHO_LOTE,
+                            help=f'Linhas lidas e pontuadas por vez (padrão {pontuacao_offline.TAMANHO_LOTE})')
+        parser.add_argument('--processos', type=int, default=1,
+                            help='Processos em paralelo; 0 usa todos os núcleos (padrão 1)')
+        parser.add_argument('--manter', nargs='+', default=[], metavar='COLUNA',
+                            help='Colunas da entrada copiadas para a saída, por exemplo um identificador')
+        parser.add_argument('--formato-entrada', choices=['csv', 'parquet'], help='Padrão: pela extensão')
+        parser.add_argument('--formato-saida', choices=['csv', 'parquet'], help='Padrão: pela extensão')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['entrada']):
+            raise CommandError(f"arquivo não encontrado: {options['entrada']}")
+        if options['lote'] < 1:
+            raise CommandError('--lote deve ser maior que zero')
+        if options['processos'] < 0:
+            raise CommandError('--processos deve ser zero (todos os núcleos) ou maior')
+        # a API cai no modelo padrão para campi sem modelo; aqui um campus pedido explicitamente tem que existir
+        if options['campus'] and options['campus'] not in campi_com_modelo():
+            raise CommandError(f"campus sem modelo em ml_model/campi/: {options['campus']}")
+
+        processos = options['processos'] or os.cpu_count()
+        carregado = modelo_service.modelo_do_campus(options['campus'])
+
+        def progresso(linhas, segundos):
+            if options['verbosity'] >= 2:
+                self.stderr.write(f'{linhas} linhas ({linhas / segundos:,.0f} linhas/s)')
+
+        try:
+            linhas, segundos = pontuacao_offline.pontuar_arquivo(
+                options['entrada'], options['saida'], carregado,
+                tamanho_lote=options['lote'],
+                processos=processos,
+                manter=options['manter'],
+                formato_entrada=options['formato_entrada'],
+                formato_saida=options['formato_saida'],
+                progresso=progresso,
+            )
+        except (KeyError, pontuacao_offline.FormatoNaoSuportado) as ex:
+            raise CommandError(ex.args[0])
+
+        taxa = linhas / segundos if segundos else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{linhas} linhas pontuadas em {segundos:.2f} s ({taxa:,.0f} linhas/s) -> {options['saida']}"
+        ))
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from analises.execucao import processar_reavaliacoes, TAMANHO_LOTE
+
+
+class Command(BaseCommand):
+    help = 'Reavalia em lotes os estudantes enfileirados pelas ações de reavaliação do admin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help='Estudantes por transação')
+        parser.add_argument('--continuo', action='store_true', help='Continua rodando e verifica a fila periodicamente')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre verificações com --continuo')
+
+    def handle(self, *args, **options):
+        while True:
+            reavaliados, erros = processar_reavaliacoes(options['lote'])
+            if reavaliados or erros:
+                estilo = self.style.WARNING if erros else self.style.SUCCESS
+                self.stderr.write(estilo(f'{len(reavaliados)} estudantes reavaliados, {len(erros)} com erro'))
+                for erro in erros[:10]:
+                    self.stderr.write(f"  estudante {erro['estudante_id']}: {erro['erro']}")
+
+            if not options['continuo']:
+                return
+            time.sleep(options['intervalo'])
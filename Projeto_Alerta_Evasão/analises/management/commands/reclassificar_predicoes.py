@@ -0,0 +1,51 @@
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from analises.classificacao import reclassificar_predicoes, versao_classificacao
+from analises.services import campi_com_modelo, diretorio_modelos
+from analises.treinamento import NOME_META
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula nivel_risco e previsao de todas as predições com as faixas de risco e o threshold '
+        'do model_meta.json, usando as probabilidades já gravadas (o modelo não é executado)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meta',
+            help='Arquivo de meta com risk_bands e best_threshold (padrão: o model_meta.json do campus)'
+        )
+        parser.add_argument(
+            '--campus',
+            default='',
+            help='Reclassifica só as predições deste campus; sem ele, as dos campi que usam o modelo padrão'
+        )
+        parser.add_argument('--lote', type=int, default=5000, help='Predições por UPDATE (padrão 5000)')
+
+    def handle(self, *args, **options):
+        caminho_meta = options['meta'] or os.path.join(diretorio_modelos(options['campus']), NOME_META)
+        if not os.path.exists(caminho_meta):
+            raise CommandError(f"meta não encontrado: {caminho_meta}")
+
+        with open(caminho_meta, 'r') as f:
+            meta = json.load(f)
+
+        faixa_risco = meta['risk_bands']
+        if not 0 < faixa_risco['low'] < faixa_risco['high'] < 1:
+            raise CommandError('as faixas de risco devem satisfazer 0 < low < high < 1')
+
+        if options['campus']:
+            filtro = Q(estudante__campus=options['campus'])
+        else:
+            filtro = ~Q(estudante__campus__in=campi_com_modelo())
+
+        atualizadas = reclassificar_predicoes(meta, options['lote'], filtro)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{atualizadas} predições reclassificadas (versão {versao_classificacao(meta)}: "
+            f"low={faixa_risco['low']}, high={faixa_risco['high']}, threshold={meta['best_threshold']})"
+        ))
+        self.stdout.write('Reinicie a aplicação para que novas predições usem o mesmo meta.')
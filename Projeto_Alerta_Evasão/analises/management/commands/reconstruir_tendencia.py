@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from analises.tendencia import reconstruir_tendencia
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói o rollup diário de risco (ResumoRiscoDiario) a partir do histórico de predições, '
+        'por exemplo na primeira implantação ou depois de alterações feitas direto no banco'
+    )
+
+    def handle(self, *args, **options):
+        dias = reconstruir_tendencia()
+        self.stdout.write(self.style.SUCCESS(f'Rollup diário reconstruído com {dias} dias'))
@@ -0,0 +1,70 @@
+import os
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_slug
+from analises import treinamento
+from analises.services import diretorio_modelos
+
+
+class Command(BaseCommand):
+    help = 'Treina o modelo de evasão e grava o par gradient_boosting_dropout.pkl + model_meta.json'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset',
+            default=os.path.join(settings.BASE_DIR.parent, 'Aprendizado_de_Máquina', 'dataset.csv'),
+            help='CSV de treino com as colunas originais (padrão: dataset.csv do notebook)'
+        )
+        parser.add_argument(
+            '--saida',
+            help='Diretório onde o modelo e o meta são gravados (padrão: ml_model, ou ml_model/campi/<campus> com --campus)'
+        )
+        parser.add_argument('--campus', default='', help='Treina o modelo próprio deste campus')
+        parser.add_argument('--algoritmo', choices=['gb', 'hgb'], default='gb',
+                            help='gb = GradientBoosting (notebook), hgb = HistGradientBoosting')
+        parser.add_argument('--busca', choices=['halving', 'grid'], default='halving',
+                            help='halving = successive halving, grid = grade completa como no notebook')
+        parser.add_argument('--cv', type=int, default=5, help='Número de folds (padrão 5)')
+        parser.add_argument('--n-jobs', type=int, default=-1, help='Processos da busca (padrão: todos os núcleos)')
+        parser.add_argument('--random-state', type=int, default=42)
+        parser.add_argument('--faixa-baixa', type=float, default=0.3, help='Início da banda de risco médio')
+        parser.add_argument('--faixa-alta', type=float, default=0.7, help='Início da banda de risco alto')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['dataset']):
+            raise CommandError(f"dataset não encontrado: {options['dataset']}")
+        try:
+            validate_slug(options['campus'] or 'padrao')
+        except ValidationError:
+            raise CommandError('o campus deve conter apenas letras, números, - e _')
+        if not 0 < options['faixa_baixa'] < options['faixa_alta'] < 1:
+            raise CommandError('as faixas de risco devem satisfazer 0 < baixa < alta < 1')
+
+        modelo, meta = treinamento.treinar(
+            options['dataset'],
+            algoritmo=options['algoritmo'],
+            busca=options['busca'],
+            cv=options['cv'],
+            n_jobs=options['n_jobs'],
+            random_state=options['random_state'],
+            faixas_risco={'low': options['faixa_baixa'], 'high': options['faixa_alta']},
+        )
+        saida = options['saida'] or diretorio_modelos(options['campus'])
+        caminho_modelo, caminho_meta = treinamento.salvar(modelo, meta, saida)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Métricas (conjunto de teste)'))
+        for nome, valor in meta['metrics'].items():
+            self.stdout.write(f'  {nome:<12} {valor:.4f}')
+        self.stdout.write(f"  {'Threshold':<12} {meta['best_threshold']:.4f}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Tempo de treino'))
+        self.stdout.write(f"  busca        {meta['training_time_seconds']['search']:.2f} s")
+        self.stdout.write(f"  total        {meta['training_time_seconds']['total']:.2f} s")
+        self.stdout.write(f"  parâmetros   {meta['training']['best_params']}")
+
+        self.stdout.write(self.style.SUCCESS(f'Modelo gravado em {caminho_modelo} e {caminho_meta}'))
+        if options['campus']:
+            self.stdout.write('Processos que já carregaram o modelo deste campus precisam ser reiniciados para usar o novo.')
+        else:
+            self.stdout.write('Reinicie a aplicação para que o ModeloPredicaoService carregue o novo modelo.')
@@ -1,6 +1,84 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
 from estudantes.models import Estudante
 
+class PredicaoEvasaoManager(models.Manager):
+    # disponível nos modelos históricos, para chamar marcar_vigentes em um RunPython
+    use_in_migrations = True
+
+    def marcar_vigentes(self, tamanho_lote=1000):
+        """
+        Deixa `mais_recente` só na última predição de cada estudante (maior data_predicao, depois
+        maior id), em lotes de `tamanho_lote` estudantes, cada um na sua transação. Necessário em
+        bancos com predições anteriores ao campo, que nascem todas vigentes, antes de criar a
+        constraint predicao_vigente_unica.
+
+        Retorna quantas predições deixaram de ser vigentes.
+        """
+        ultima = (
+            self.model.objects
+            .filter(estudante_id=OuterRef('estudante_id'))
+            .order_by('-data_predicao', '-id')
+            .values('id')[:1]
+        )
+        estudantes = (
+            self.filter(mais_recente=True)
+            .order_by('estudante_id')
+            .values_list('estudante_id', flat=True)
+            .distinct()
+        )
+
+        desmarcadas = 0
+        inicio = None
+        while True:
+            lote = estudantes if inicio is None else estudantes.filter(estudante_id__gt=inicio)
+            ids = list(lote[:tamanho_lote])
+            if not ids:
+                return desmarcadas
+            with transaction.atomic():
+                desmarcadas += (
+                    self.filter(estudante_id__in=ids, mais_recente=True)
+                    .exclude(id=Subquery(ultima))
+                    .update(mais_recente=False)
+                )
+                self.filter(estudante_id__in=ids, mais_recente=False, id=Subquery(ultima)).update(mais_recente=True)
+            inicio = ids[-1]
+
+    def registrar(self, estudante, resultado):
+        """
+        Grava uma nova predição para o estudante e a marca como a mais recente,
+        desmarcando as anteriores na mesma transação. Entradas e saídas do risco Alto
+        geram um AlertaRisco na mesma transação, para o despacho posterior, e a troca da
+        predição vigente é somada ao ResumoRiscoDiario do dia.
+
+        Quem grava predições deve chamar VersaoRecurso.incrementar('predicoes') ao final do lote,
+        para invalidar as respostas condicionais.
+        """
+        with transaction.atomic():
+            anterior = self.filter(estudante=estudante, mais_recente=True).values_list('id', 'nivel_risco', 'previsao', 'probabilidade').first()
+            if anterior:
+                self.filter(id=anterior[0]).update(mais_recente=False)
+
+            predicao = self.create(
+                estudante=estudante,
+                probabilidade=resultado['probabilidade'],
+                previsao=resultado['previsao'],
+                nivel_risco=resultado['nivel_risco'],
+                versao_classificacao=resultado.get('versao_classificacao', ''),
+                mais_recente=True
+            )
+            AlertaRisco.objects.registrar_transicao(
+                predicao, estudante.matricula, anterior[1] if anterior else None
+            )
+
+            variacao = variacao_predicao(predicao.nivel_risco, predicao.previsao, predicao.probabilidade)
+            variacao['estudantes_avaliados'] = 1
+            if anterior:
+                variacao = somar_variacoes(variacao, variacao_predicao(*anterior[1:], sinal=-1))
+            ResumoRiscoDiario.objects.aplicar(variacao)
+            return predicao
+
 class PredicaoEvasao(models.Model):
     estudante = models.ForeignKey(Estudante, on_delete=models.CASCADE, related_name='predicoes')
     probabilidade = models.FloatField()
@@ -11,11 +89,314 @@ class PredicaoEvasao(models.Model):
         ('Alto', 'Alto'),
     ])
     data_predicao = models.DateTimeField(auto_now_add=True)
+    mais_recente = models.BooleanField(default=True)
+    versao_classificacao = models.CharField(max_length=16, blank=True, default='')
+
+    objects = PredicaoEvasaoManager()
 
     class Meta:
         verbose_name = "Predição de Evasão"
         verbose_name_plural = "Predições de Evasão"
         ordering = ['-data_predicao']
+        indexes = [
+            # ranking de estudantes_em_risco: cobrem as colunas da predição que o endpoint lê;
+            # matrícula e perfil vêm da junção com estudante pela chave primária
+            models.Index(
+                fields=['-probabilidade', '-id'],
+                name='predicao_recente_prob_idx',
+                condition=Q(mais_recente=True),
+                include=['estudante', 'nivel_risco', 'previsao', 'data_predicao'],
+            ),
+            models.Index(
+                fields=['nivel_risco', '-probabilidade', '-id'],
+                name='predicao_recente_risco_idx',
+                condition=Q(mais_recente=True),
+                include=['estudante', 'previsao', 'data_predicao'],
+            ),
+            # filtro por nível de risco do admin, na ordem da listagem
+            models.Index(fields=['nivel_risco', '-id'], name='predicao_risco_id_idx'),
+        ]
+        constraints = [
+            # no máximo uma predição vigente por estudante, mesmo com análises concorrentes
+            models.UniqueConstraint(
+                fields=['estudante'],
+                condition=Q(mais_recente=True),
+                name='predicao_vigente_unica',
+            ),
+        ]
     
     def __str__(self):
-        return f"Predição {self.estudante} - {self.nivel_risco}"
\ No newline at end of file
+        return f"Predição {self.estudante} - {self.nivel_risco}"
+
+class ResumoFeatures(models.Model):
+    """
+    Esboço incremental da distribuição das features dos estudantes cadastrados: contagem de
+    estudantes e bordas das faixas de cada feature. As contagens e somas por faixa ficam em
+    FaixaResumoFeatures, atualizadas a cada inclusão, alteração ou remoção de Estudante.
+    """
+    nome = models.CharField(max_length=30, unique=True)
+    contagem = models.BigIntegerField(default=0)
+    bordas = models.JSONField(default=dict)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumo de Features"
+        verbose_name_plural = "Resumos de Features"
+
+    def __str__(self):
+        return f"Resumo {self.nome} ({self.contagem} estudantes)"
+
+
+class FaixaResumoFeatures(models.Model):
+    """
+    Uma faixa do histograma de uma feature no ResumoFeatures: quantos valores caem nela e a
+    soma e a soma dos quadrados desses valores. Cada escrita em Estudante soma a variação com
+    F() só nas faixas afetadas, sem travar o resumo inteiro.
+    """
+    resumo = models.ForeignKey(ResumoFeatures, on_delete=models.CASCADE, related_name='faixas')
+    feature = models.CharField(max_length=60)
+    faixa = models.PositiveSmallIntegerField()
+    contagem = models.BigIntegerField(default=0)
+    soma = models.FloatField(default=0)
+    soma_quadrados = models.FloatField(default=0)
+    atualizada_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Faixa do Resumo de Features"
+        verbose_name_plural = "Faixas do Resumo de Features"
+        constraints = [
+            models.UniqueConstraint(fields=['resumo', 'feature', 'faixa'], name='faixa_resumo_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.feature} faixa {self.faixa} ({self.contagem})"
+
+
+class ExecucaoAnalise(models.Model):
+    """Registro de cada execução da análise de todos os estudantes e do seu resultado."""
+    status = models.CharField(max_length=15, choices=[
+        ('em_andamento', 'Em andamento'),
+        ('concluida', 'Concluída'),
+        ('falhou', 'Falhou'),
+    ], default='em_andamento')
+    iniciada_em = models.DateTimeField(auto_now_add=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Execução de Análise"
+        verbose_name_plural = "Execuções de Análise"
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"Execução {self.id} - {self.status}"
+
+
+class TravaExecucao(models.Model):
+    """
+    Trava nomeada para bancos sem advisory locks: quem consegue preencher `ocupada_desde`
+    com um UPDATE condicional detém a trava até liberá-la ou até ela expirar.
+    """
+    nome = models.CharField(max_length=50, primary_key=True)
+    ocupada_desde = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Trava de Execução"
+        verbose_name_plural = "Travas de Execução"
+
+    def __str__(self):
+        return self.nome
+
+
+class AlteracaoEstudante(models.Model):
+    """
+    Log de escritas em Estudante (inclusão, alteração ou remoção), lido pelo snapshot de
+    features de cada processo para atualizar só as linhas alteradas.
+    """
+    estudante_id = models.BigIntegerField()
+    registrada_em = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Alteração de Estudante"
+        verbose_name_plural = "Alterações de Estudantes"
+
+    def __str__(self):
+        return f"Alteração {self.id} - estudante {self.estudante_id}"
+
+
+class ReavaliacaoSolicitada(models.Model):
+    """
+    Fila de estudantes a reavaliar, preenchida pelas ações do admin e consumida em lotes pelo
+    comando processar_reavaliacoes. Um estudante aparece no máximo uma vez na fila.
+    """
+    estudante_id = models.BigIntegerField(unique=True)
+    solicitada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Reavaliação Solicitada"
+        verbose_name_plural = "Reavaliações Solicitadas"
+        ordering = ['id']
+        # a reavaliação grava predições, alertas e o rollup diário
+        permissions = [('solicitar_reavaliacao', 'Pode solicitar a reavaliação de estudantes')]
+
+    def __str__(self):
+        return f"Reavaliação do estudante {self.estudante_id}"
+
+    @classmethod
+    def solicitar(cls, estudante_ids, tamanho_lote=1000):
+        """
+        Enfileira os estudantes de `estudante_ids` (um iterável); os que já estão na fila são
+        ignorados. Retorna quantos entraram na fila.
+        """
+        def enfileirar(lote):
+            na_fila = set(cls.objects.filter(estudante_id__in=lote).values_list('estudante_id', flat=True))
+            novos = [cls(estudante_id=estudante_id) for estudante_id in lote if estudante_id not in na_fila]
+            # ignore_conflicts cobre quem entrou na fila entre a consulta e a inclusão
+            cls.objects.bulk_create(novos, ignore_conflicts=True)
+            return len(novos)
+
+        total = 0
+        lote = []
+        for estudante_id in estudante_ids:
+            lote.append(estudante_id)
+            if len(lote) == tamanho_lote:
+                total += enfileirar(lote)
+                lote = []
+        if lote:
+            total += enfileirar(lote)
+        return total
+
+
+class AlertaRiscoManager(models.Manager):
+    def registrar_transicao(self, predicao, matricula, nivel_anterior, chave=None):
+        """Registra o alerta se a predição entrou ou saiu do risco Alto; senão não faz nada."""
+        if (nivel_anterior == 'Alto') == (predicao.nivel_risco == 'Alto'):
+            return None
+
+        tipo = 'entrou_alto' if predicao.nivel_risco == 'Alto' else 'saiu_alto'
+        return self.create(
+            chave=chave or f'predicao-{predicao.id}-{tipo}',
+            tipo=tipo,
+            estudante_id=predicao.estudante_id,
+            matricula=matricula,
+            predicao_id=predicao.id,
+            nivel_anterior=nivel_anterior or '',
+            nivel_atual=predicao.nivel_risco,
+            probabilidade=predicao.probabilidade,
+        )
+
+
+class AlertaRisco(models.Model):
+    """
+    Outbox de alertas de risco alto: cada linha é gravada na transação da predição que a
+    originou e entregue depois pelo comando despachar_alertas. `chave` identifica o alerta
+    de forma única e é repassada aos destinos para que descartem entregas repetidas.
+    """
+    chave = models.CharField(max_length=80, unique=True)
+    tipo = models.CharField(max_length=15, choices=[
+        ('entrou_alto', 'Entrou em risco alto'),
+        ('saiu_alto', 'Saiu do risco alto'),
+    ])
+    estudante_id = models.BigIntegerField()
+    matricula = models.CharField(max_length=9)
+    predicao_id = models.BigIntegerField()
+    nivel_anterior = models.CharField(max_length=10, blank=True, default='')
+    nivel_atual = models.CharField(max_length=10)
+    probabilidade = models.FloatField()
+    criado_em = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=10, choices=[
+        ('pendente', 'Pendente'),
+        ('entregue', 'Entregue'),
+        ('falhou', 'Falhou'),
+    ], default='pendente')
+    tentativas = models.IntegerField(default=0)
+    proxima_tentativa_em = models.DateTimeField(default=timezone.now)
+    entregue_em = models.DateTimeField(null=True, blank=True)
+    ultimo_erro = models.TextField(blank=True, default='')
+
+    objects = AlertaRiscoManager()
+
+    class Meta:
+        verbose_name = "Alerta de Risco"
+        verbose_name_plural = "Alertas de Risco"
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['proxima_tentativa_em', 'id'],
+                name='alerta_pendente_idx',
+                condition=Q(status='pendente'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Alerta {self.chave} - {self.status}"
+
+
+CAMPO_NIVEL = {'Alto': 'risco_alto', 'Médio': 'risco_medio', 'Baixo': 'risco_baixo'}
+CAMPO_PREVISAO = {'Evasão': 'evasao_prevista', 'Não evasão': 'nao_evasao_prevista'}
+
+
+def variacao_predicao(nivel_risco, previsao, probabilidade, sinal=1):
+    """Variação dos totais de ResumoRiscoDiario ao incluir (sinal=1) ou retirar (sinal=-1) uma predição vigente."""
+    variacao = {'soma_probabilidade': sinal * probabilidade}
+    if nivel_risco in CAMPO_NIVEL:
+        variacao[CAMPO_NIVEL[nivel_risco]] = sinal
+    if previsao in CAMPO_PREVISAO:
+        variacao[CAMPO_PREVISAO[previsao]] = sinal
+    return variacao
+
+
+def somar_variacoes(*variacoes):
+    total = {}
+    for variacao in variacoes:
+        for campo, valor in variacao.items():
+            total[campo] = total.get(campo, 0) + valor
+    return total
+
+
+class ResumoRiscoDiarioManager(models.Manager):
+    def aplicar(self, variacao, data=None):
+        """Soma `variacao` (campo -> valor) à linha do dia, criando-a se ainda não existir."""
+        variacao = {campo: valor for campo, valor in variacao.items() if valor}
+        if not variacao:
+            return
+        data = data or timezone.localdate()
+        incrementos = {campo: F(campo) + valor for campo, valor in variacao.items()}
+
+        if self.filter(data=data).update(**incrementos):
+            return
+        try:
+            with transaction.atomic():
+                self.create(data=data, **variacao)
+        except IntegrityError:
+            # outro processo criou a linha do dia entre o UPDATE e o INSERT
+            self.filter(data=data).update(**incrementos)
+
+
+class ResumoRiscoDiario(models.Model):
+    """
+    Rollup diário das predições vigentes. Os campos de nível de risco, previsão e soma das
+    probabilidades guardam a variação do dia, então o total vigente em uma data é a soma das
+    linhas até ela; `estudantes_avaliados` conta as predições gravadas no dia.
+
+    É atualizado na transação de cada predição, reclassificação ou remoção, e reconstruído a
+    partir do histórico de PredicaoEvasao com `manage.py reconstruir_tendencia`.
+    """
+    data = models.DateField(unique=True)
+    risco_alto = models.IntegerField(default=0)
+    risco_medio = models.IntegerField(default=0)
+    risco_baixo = models.IntegerField(default=0)
+    evasao_prevista = models.IntegerField(default=0)
+    nao_evasao_prevista = models.IntegerField(default=0)
+    soma_probabilidade = models.FloatField(default=0)
+    estudantes_avaliados = models.IntegerField(default=0)
+
+    objects = ResumoRiscoDiarioManager()
+
+    class Meta:
+        verbose_name = "Resumo de Risco Diário"
+        verbose_name_plural = "Resumos de Risco Diários"
+        ordering = ['data']
+
+    def __str__(self):
+        return f"Resumo de risco {self.data}"
@@ -0,0 +1,161 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from .classificacao import classificar_lote
+
+TAMANHO_LOTE = 50000
+
+# modelo usado pelos processos filhos; herdado do processo pai no fork, sem serialização
+_carregado = None
+
+
+class FormatoNaoSuportado(Exception):
+    """Extensão de arquivo sem leitor/escritor, ou Parquet sem o pyarrow instalado."""
+
+
+def formato_do_arquivo(caminho, formato=None):
+    formato = formato or os.path.splitext(caminho)[1].lower().lstrip('.')
+    if formato not in ('csv', 'parquet'):
+        raise FormatoNaoSuportado(f'formato não suportado: {caminho} (use .csv ou .parquet)')
+    return formato
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise FormatoNaoSuportado('arquivos Parquet exigem o pacote pyarrow (pip install pyarrow)')
+    return pyarrow
+
+
+def colunas_do_arquivo(caminho, formato):
+    if formato == 'parquet':
+        return list(_pyarrow().parquet.ParquetFile(caminho).schema_arrow.names)
+    # o dataset.csv do notebook começa com BOM
+    return list(pd.read_csv(caminho, nrows=0, encoding='utf-8-sig').columns)
+
+
+def ler_lotes(caminho, formato, colunas, tamanho_lote=TAMANHO_LOTE):
+    """Lê só as `colunas` do arquivo em DataFrames de até `tamanho_lote` linhas."""
+    if formato == 'parquet':
+        arquivo = _pyarrow().parquet.ParquetFile(caminho)
+        for lote in arquivo.iter_batches(batch_size=tamanho_lote, columns=colunas):
+            yield lote.to_pandas()
+        return
+
+    yield from pd.read_csv(caminho, usecols=colunas, chunksize=tamanho_lote, encoding='utf-8-sig')
+
+
+class EscritorCsv:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.cabecalho = True
+
+    def escrever(self, df):
+        df.to_csv(self.caminho, mode='w' if self.cabecalho else 'a', header=self.cabecalho, index=False)
+        self.cabecalho = False
+
+    def fechar(self):
+        if self.cabecalho:
+            # entrada vazia: grava só o cabeçalho
+            pd.DataFrame(columns=['probabilidade', 'previsao', 'nivel_risco']).to_csv(self.caminho, index=False)
+
+
+class EscritorParquet:
+    def __init__(self, caminho):
+        self.pyarrow = _pyarrow()
+        self.caminho = caminho
+        self.escritor = None
+
+    def escrever(self, df):
+        tabela = self.pyarrow.Table.from_pandas(df, preserve_index=False)
+        if self.escritor is None:
+            self.escritor = self.pyarrow.parquet.ParquetWriter(self.caminho, tabela.schema)
+        self.escritor.write_table(tabela)
+
+    def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+
+
+def escritor_para(caminho, formato):
+    return EscritorParquet(caminho) if formato == 'parquet' else EscritorCsv(caminho)
+
+
+def pontuar(df, carregado, manter=()):
+    """
+    Probabilidade, previsão e nível de risco de cada linha de `df`, com as features na ordem de
+    `features_expected` do meta e as colunas de `manter` copiadas na frente.
+    """
+    features = carregado.meta['features_expected']
+    probabilidades = carregado.modelo.predict_proba(df[features])[:, 1]
+    nivel_risco, previsao = classificar_lote(probabilidades, carregado.meta)
+
+    resultado = df[list(manter)].reset_index(drop=True)
+    resultado['probabilidade'] = probabilidades
+    resultado['previsao'] = previsao
+    resultado['nivel_risco'] = nivel_risco
+    return resultado
+
+
+def _pontuar_no_processo(df, manter):
+    return pontuar(df, _carregado, manter)
+
+
+def pontuar_arquivo(entrada, saida, carregado, tamanho_lote=TAMANHO_LOTE, processos=1, manter=(),
+                    formato_entrada=None, formato_saida=None, progresso=None):
+    """
+    Pontua `entrada` lote a lote e grava em `saida`, na mesma ordem das linhas. A memória fica
+    limitada a alguns lotes: com `processos` > 1, no máximo dois lotes por processo ficam em
+    andamento. O paralelismo usa fork para herdar o modelo já carregado; onde não há fork
+    (Windows), roda em um processo só.
+
+    `progresso(linhas, segundos)` é chamada a cada lote gravado. Retorna (linhas, segundos).
+    """
+    global _carregado
+
+    formato_entrada = formato_do_arquivo(entrada, formato_entrada)
+    formato_saida = formato_do_arquivo(saida, formato_saida)
+
+    features = carregado.meta['features_expected']
+    disponiveis = colunas_do_arquivo(entrada, formato_entrada)
+    ausentes = [coluna for coluna in [*features, *manter] if coluna not in disponiveis]
+    if ausentes:
+        raise KeyError(f"colunas ausentes no arquivo de entrada: {', '.join(ausentes)}")
+
+    colunas = list(dict.fromkeys([*manter, *features]))
+    lotes = ler_lotes(entrada, formato_entrada, colunas, tamanho_lote)
+    escritor = escritor_para(saida, formato_saida)
+    linhas = 0
+    inicio = time.perf_counter()
+
+    def gravar(resultado):
+        nonlocal linhas
+        escritor.escrever(resultado)
+        linhas += len(resultado)
+        if progresso:
+            progresso(linhas, time.perf_counter() - inicio)
+
+    try:
+        if processos <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            for df in lotes:
+                gravar(pontuar(df, carregado, manter))
+        else:
+            _carregado = carregado
+            pendentes = deque()
+            with ProcessPoolExecutor(processos, mp_context=multiprocessing.get_context('fork')) as executor:
+                for df in lotes:
+                    pendentes.append(executor.submit(_pontuar_no_processo, df, manter))
+                    if len(pendentes) >= 2 * processos:
+                        gravar(pendentes.popleft().result())
+                while pendentes:
+                    gravar(pendentes.popleft().result())
+    finally:
+        _carregado = None
+        escritor.fechar()
+
+    return linhas, time.perf_counter() - inicio
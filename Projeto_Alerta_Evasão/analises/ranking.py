@@ -0,0 +1,88 @@
+import base64
+import json
+from django.db.models import F, Q
+from .models import PredicaoEvasao
+
+CAMPOS_RANKING = (
+    'id',
+    'probabilidade',
+    'nivel_risco',
+    'previsao',
+    'data_predicao',
+    'estudante_id',
+    'estudante__matricula',
+    'estudante__turno_aulas',
+    'estudante__bolsista',
+    'estudante__genero',
+)
+
+
+class TokenContinuacaoInvalido(ValueError):
+    pass
+
+
+def codificar_continuacao(probabilidade, predicao_id):
+    bruto = json.dumps([probabilidade, predicao_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip('=')
+
+
+def decodificar_continuacao(token):
+    try:
+        bruto = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        probabilidade, predicao_id = json.loads(bruto)
+        return float(probabilidade), int(predicao_id)
+    except (ValueError, TypeError):
+        raise TokenContinuacaoInvalido('Token de continuação inválido')
+
+
+def listar_estudantes_em_risco(filtros, limite, continuacao=None):
+    """
+    Retorna até `limite` estudantes ordenados pela probabilidade da predição mais recente
+    (maior primeiro) e o token para a página seguinte.
+
+    A paginação é por chave (probabilidade, id): cada página continua exatamente do ponto
+    em que a anterior parou, percorrendo os índices parciais de `mais_recente` sem OFFSET.
+    """
+    predicoes = PredicaoEvasao.objects.filter(mais_recente=True)
+
+    if 'nivel_risco' in filtros:
+        predicoes = predicoes.filter(nivel_risco=filtros['nivel_risco'])
+    for campo in ('turno_aulas', 'bolsista', 'genero'):
+        if campo in filtros:
+            predicoes = predicoes.filter(**{f'estudante__{campo}': filtros[campo]})
+
+    if continuacao:
+        probabilidade, predicao_id = decodificar_continuacao(continuacao)
+        predicoes = predicoes.filter(
+            Q(probabilidade__lt=probabilidade) |
+            Q(probabilidade=probabilidade, id__lt=predicao_id)
+        )
+
+    linhas = list(
+        predicoes
+        .order_by(F('probabilidade').desc(), F('id').desc())
+        .values(*CAMPOS_RANKING)[:limite + 1]
+    )
+
+    proxima = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        ultima = linhas[-1]
+        proxima = codificar_continuacao(ultima['probabilidade'], ultima['id'])
+
+    resultados = [
+        {
+            'estudante_id': linha['estudante_id'],
+            'matricula': linha['estudante__matricula'],
+            'probabilidade': linha['probabilidade'],
+            'nivel_risco': linha['nivel_risco'],
+            'previsao': linha['previsao'],
+            'turno_aulas': linha['estudante__turno_aulas'],
+            'bolsista': linha['estudante__bolsista'],
+            'genero': linha['estudante__genero'],
+            'data_predicao': linha['data_predicao'],
+        }
+        for linha in linhas
+    ]
+
+    return resultados, proxima
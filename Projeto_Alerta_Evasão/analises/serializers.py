@@ -1,20 +1,23 @@
 from rest_framework import serializers
 from estudantes.models import Estudante
+from estudantes.serializers import LIMITES_CAMPOS_INTEIROS
 from .models import PredicaoEvasao
 
 class EstudanteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Estudante
         fields = '__all__'
+        extra_kwargs = LIMITES_CAMPOS_INTEIROS
 
 class EstudanteResumoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Estudante
         fields = ['id', 'matricula', 'idade_ingresso', 'genero', 'turno_aulas']
+        extra_kwargs = LIMITES_CAMPOS_INTEIROS
 
 class PredicaoEvasaoSerializer(serializers.ModelSerializer):
     estudante_dados = EstudanteResumoSerializer(source='estudante', read_only=True) 
 
     class Meta:
         model = PredicaoEvasao
-        fields = ['id', 'probabilidade', 'previsao', 'nivel_risco', 'data_predicao', 'estudante', 'estudante_dados']
+        fields = ['id', 'probabilidade', 'previsao', 'nivel_risco', 'versao_classificacao', 'data_predicao', 'estudante', 'estudante_dados']
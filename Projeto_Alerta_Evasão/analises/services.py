@@ -1,62 +1,193 @@
 import os
 import json
+import threading
+from collections import OrderedDict
 import joblib
 import pandas as pd
 import numpy as np
 from django.conf import settings
+from .features import MAPA_FEATURES, valor_para_modelo
+from .classificacao import classificar, versao_classificacao
+from .treinamento import NOME_MODELO, NOME_META
+
+
+def diretorio_modelos(campus=''):
+    """ml_model/ para o modelo padrão e ml_model/campi/<campus>/ para o modelo de cada campus."""
+    if campus:
+        return os.path.join(settings.BASE_DIR, 'ml_model', 'campi', campus)
+    return os.path.join(settings.BASE_DIR, 'ml_model')
+
+
+def campi_com_modelo():
+    diretorio = os.path.join(settings.BASE_DIR, 'ml_model', 'campi')
+    if not os.path.isdir(diretorio):
+        return []
+    return sorted(
+        campus for campus in os.listdir(diretorio)
+        if os.path.exists(os.path.join(diretorio, campus, NOME_MODELO))
+    )
+
+
+class ModeloCarregado:
+    """Par modelo + meta de um diretório, com o tamanho do arquivo como estimativa de memória."""
+
+    def __init__(self, diretorio):
+        modelo_path = os.path.join(diretorio, NOME_MODELO)
+        meta_path = os.path.join(diretorio, NOME_META)
+
+        if not os.path.exists(modelo_path):
+            raise FileNotFoundError(f"modelo não encontrado")
+
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"meta dados não encontrados")
+
+        self.modelo = joblib.load(modelo_path)
+
+        with open(meta_path, 'r') as f:
+            self.meta = json.load(f)
+
+        self.versao_classificacao = versao_classificacao(self.meta)
+        self.tamanho_bytes = os.path.getsize(modelo_path)
+
+
+class CacheModelos:
+    """
+    Cache LRU de modelos por campus limitado por MODELOS_MEMORIA_MAXIMA_MB: ao carregar um
+    modelo além do orçamento, os usados há mais tempo são descartados e recarregados do disco
+    quando voltarem a ser pedidos.
+    """
+
+    def __init__(self):
+        self._modelos = OrderedDict()
+        self._trava = threading.Lock()
+        # uma trava por campus: a leitura de um modelo do disco não bloqueia os demais campi
+        self._travas_carga = {}
+        self._existe_modelo = {}
+        self.acertos = 0
+        self.carregamentos = 0
+        self.descartes = 0
+
+    def _memoria_maxima(self):
+        return getattr(settings, 'MODELOS_MEMORIA_MAXIMA_MB', 512) * 1024 * 1024
+
+    def tem_modelo(self, campus):
+        """Se o campus tem modelo próprio; o resultado fica guardado para não ir ao disco a cada predição."""
+        with self._trava:
+            existe = self._existe_modelo.get(campus)
+        if existe is None:
+            existe = os.path.exists(os.path.join(diretorio_modelos(campus), NOME_MODELO))
+            with self._trava:
+                self._existe_modelo[campus] = existe
+        return existe
+
+    def _em_cache(self, campus):
+        carregado = self._modelos.get(campus)
+        if carregado is not None:
+            self._modelos.move_to_end(campus)
+            self.acertos += 1
+        return carregado
+
+    def obter(self, campus):
+        with self._trava:
+            carregado = self._em_cache(campus)
+            if carregado is not None:
+                return carregado
+            trava_carga = self._travas_carga.setdefault(campus, threading.Lock())
+
+        with trava_carga:
+            # outra thread pode ter carregado o mesmo campus enquanto esta esperava
+            with self._trava:
+                carregado = self._em_cache(campus)
+                if carregado is not None:
+                    return carregado
+
+            carregado = ModeloCarregado(diretorio_modelos(campus))
+
+            with self._trava:
+                self.carregamentos += 1
+                memoria = sum(m.tamanho_bytes for m in self._modelos.values()) + carregado.tamanho_bytes
+                while self._modelos and memoria > self._memoria_maxima():
+                    _, descartado = self._modelos.popitem(last=False)
+                    memoria -= descartado.tamanho_bytes
+                    self.descartes += 1
+
+                self._modelos[campus] = carregado
+                return carregado
+
+    def metricas(self):
+        with self._trava:
+            return {
+                'campi_carregados': list(self._modelos),
+                'campi_sem_modelo': sorted(c for c, existe in self._existe_modelo.items() if not existe),
+                'memoria_bytes': sum(m.tamanho_bytes for m in self._modelos.values()),
+                'memoria_maxima_bytes': self._memoria_maxima(),
+                'acertos': self.acertos,
+                'carregamentos': self.carregamentos,
+                'descartes': self.descartes,
+            }
+
 
 class ModeloPredicaoService:
     def __init__(self):
         self.modelo = None
         self.meta = None
+        self.versao_classificacao = None
+        self.modelos_campi = CacheModelos()
         self._carregar_modelo()
 
     def _carregar_modelo(self):
         try:
-            modelo_path = os.path.join(settings.BASE_DIR, 'ml_model', 'gradient_boosting_dropout.pkl')
-            meta_path = os.path.join(settings.BASE_DIR, 'ml_model', 'model_meta.json')
-
-            if not os.path.exists(modelo_path):
-                raise FileNotFoundError(f"modelo não encontrado")
-            
-            if not os.path.exists(meta_path):
-                raise FileNotFoundError(f"meta dados não encontrados")
-            
-            self.modelo = joblib.load(modelo_path)
-
-            with open(meta_path, 'r') as f:
-                self.meta = json.load(f)
+            # o modelo padrão fica sempre em memória; é usado pelos campi sem modelo próprio
+            self.padrao = ModeloCarregado(diretorio_modelos())
+            self.modelo = self.padrao.modelo
+            self.meta = self.padrao.meta
+            self.versao_classificacao = self.padrao.versao_classificacao
 
         except Exception as ex:
             raise
 
+    def modelo_do_campus(self, campus):
+        if not campus or not self.modelos_campi.tem_modelo(campus):
+            return self.padrao
+        return self.modelos_campi.obter(campus)
+
     def _converter_estudante_para_modelo(self, estudante):
         return {
-            'Age at enrollment': estudante.idade_ingresso,
-            'Gender': estudante.genero,
-            'Daytime/evening attendance': estudante.turno_aulas,
-            'Scholarship holder': int(estudante.bolsista),
-            'Educational special needs': int(estudante.necessidades_especiais),
-            'Curricular units 1st sem (approved)': estudante.disciplinas_aprovadas_1per,
-            'Curricular units 1st sem (enrolled)': estudante.disciplinas_matriculadas_1per,
-            'Curricular units 1st sem (grade)': estudante.nota_media_1per,
-            'Curricular units 2nd sem (approved)': estudante.disciplinas_aprovadas_2per,
-            'Curricular units 2nd sem (enrolled)': estudante.disciplinas_matriculadas_2per,
-            'Curricular units 2nd sem (grade)': estudante.nota_media_2per,
+            feature: valor_para_modelo(getattr(estudante, campo))
+            for feature, campo in MAPA_FEATURES.items()
         }
-    
+
     def prever_evasao_estudante(self, estudante):
         if not self.modelo or not self.meta:
             raise Exception("Modelo não carregado")
-        
+
         dados_modelo = self._converter_estudante_para_modelo(estudante)
 
-        return self._executar_predicao(dados_modelo)
-    
-    def _executar_predicao(self, dados_modelo):
+        return self._executar_predicao(dados_modelo, self.modelo_do_campus(estudante.campus))
+
+    def prever_evasao_lote(self, colunas, campus=''):
+        """
+        Predições para várias linhas do mesmo campus de uma vez, a partir de um dict
+        feature -> array.
+        """
+        if not self.modelo or not self.meta:
+            raise Exception("Modelo não carregado")
+
+        carregado = self.modelo_do_campus(campus)
+        df = pd.DataFrame(colunas)
+
+        for i in carregado.meta['features_expected']:
+            if i not in df.columns:
+                df[i] = np.nan
+
+        probabilidades = carregado.modelo.predict_proba(df[carregado.meta['features_expected']])[:, 1]
+
+        return [self._resultado(probabilidade, carregado) for probabilidade in probabilidades.tolist()]
+
+    def _executar_predicao(self, dados_modelo, carregado):
         df = pd.DataFrame([dados_modelo])
 
-        features_esperadas = self.meta['features_expected']
+        features_esperadas = carregado.meta['features_expected']
 
         for i in features_esperadas:
             if i not in df.columns:
@@ -64,23 +195,18 @@ class ModeloPredicaoService:
 
         df = df[features_esperadas]
 
-        probabilidade = float(self.modelo.predict_proba(df)[:, 1][0])
+        probabilidade = float(carregado.modelo.predict_proba(df)[:, 1][0])
 
-        faixa_risco = self.meta['risk_bands']
-        if probabilidade >= faixa_risco['high']:
-            nivel_risco = 'Alto'
-        elif probabilidade >= faixa_risco['low']:
-            nivel_risco = 'Médio'
-        else:
-            nivel_risco = 'Baixo'
+        return self._resultado(probabilidade, carregado)
 
-        threshold = self.meta['best_threshold']
-        previsao = 'Evasão' if probabilidade >= threshold else 'Não evasão'
+    def _resultado(self, probabilidade, carregado):
+        nivel_risco, previsao = classificar(probabilidade, carregado.meta)
 
         return {
             'previsao': previsao,
             'probabilidade': probabilidade,
             'nivel_risco': nivel_risco,
+            'versao_classificacao': carregado.versao_classificacao,
         }
 
-modelo_service = ModeloPredicaoService()
\ No newline at end of file
+modelo_service = ModeloPredicaoService()
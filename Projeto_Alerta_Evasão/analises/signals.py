@@ -0,0 +1,53 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from estudantes.models import Estudante
+from .features import CAMPOS_ESTUDANTE
+from .models import AlteracaoEstudante, PredicaoEvasao
+from . import drift, tendencia
+
+
+def _valores(estudante):
+    return {campo: getattr(estudante, campo) for campo in CAMPOS_ESTUDANTE}
+
+
+def _valores_travados(pk):
+    # a trava da linha vale até o fim da transação do save/delete: edições concorrentes do
+    # mesmo estudante esperam e leem o valor já alterado, sem descontar o mesmo valor duas vezes
+    return Estudante.objects.select_for_update().filter(pk=pk).values(*CAMPOS_ESTUDANTE).first()
+
+
+# Os sinais cobrem Estudante.save() e delete(); bulk_create, QuerySet.update e escritas direto no
+# banco não os disparam, e depois delas o resumo precisa de `manage.py monitor_drift --recalcular`.
+@receiver(pre_save, sender=Estudante)
+def guardar_valores_anteriores(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        instance._valores_drift_anteriores = None
+        return
+    instance._valores_drift_anteriores = _valores_travados(instance.pk)
+
+
+@receiver(post_save, sender=Estudante)
+def atualizar_resumo_features(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    drift.aplicar_alteracao(getattr(instance, '_valores_drift_anteriores', None), _valores(instance))
+    AlteracaoEstudante.objects.create(estudante_id=instance.pk)
+
+
+@receiver(post_delete, sender=Estudante)
+def remover_do_resumo_features(sender, instance, **kwargs):
+    anteriores = getattr(instance, '_valores_drift_anteriores', None)
+    drift.aplicar_alteracao(anteriores if anteriores is not None else _valores(instance), None)
+    AlteracaoEstudante.objects.create(estudante_id=instance.pk)
+
+
+@receiver(pre_delete, sender=Estudante)
+def guardar_valores_removidos(sender, instance, **kwargs):
+    # a remoção já roda em uma transação do Collector; o resumo desconta o valor gravado
+    instance._valores_drift_anteriores = _valores_travados(instance.pk)
+
+
+@receiver(pre_delete, sender=Estudante)
+def remover_da_tendencia(sender, instance, **kwargs):
+    # as predições saem em cascata sem sinais próprios; a remoção roda na mesma transação
+    tendencia.remover_predicoes(PredicaoEvasao.objects.filter(estudante=instance, mais_recente=True))
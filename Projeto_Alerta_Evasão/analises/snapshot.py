@@ -0,0 +1,261 @@
+import threading
+import time
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+from estudantes.models import Estudante
+from .features import MAPA_FEATURES, CAMPOS_ESTUDANTE
+from .models import AlteracaoEstudante
+
+FEATURES = list(MAPA_FEATURES)
+TAMANHO_LOTE = 5000
+CAPACIDADE_INICIAL = 1024
+# um float64 por feature mais o id de cada linha
+BYTES_POR_LINHA = (len(FEATURES) + 1) * 8
+# ids do log são reservados na inserção mas ficam visíveis no commit, então uma alteração pode
+# aparecer depois de outra com id maior; a janela relê as alterações recentes (reaplicar é seguro)
+JANELA_RELEITURA = timedelta(seconds=5)
+
+
+class SnapshotIndisponivel(Exception):
+    """A tabela de estudantes não cabe no orçamento de memória do snapshot."""
+
+
+class Latencia:
+    def __init__(self):
+        self.quantidade = 0
+        self.total = 0.0
+        self.ultima = 0.0
+        self.maxima = 0.0
+
+    def registrar(self, segundos):
+        self.quantidade += 1
+        self.total += segundos
+        self.ultima = segundos
+        self.maxima = max(self.maxima, segundos)
+
+    def resumo(self):
+        return {
+            'quantidade': self.quantidade,
+            'media_ms': round(self.total / self.quantidade * 1000, 3) if self.quantidade else None,
+            'ultima_ms': round(self.ultima * 1000, 3),
+            'maxima_ms': round(self.maxima * 1000, 3),
+        }
+
+
+class SnapshotFeatures:
+    """
+    Matriz de features dos estudantes em colunas numpy (uma por feature do modelo, na ordem
+    de MAPA_FEATURES) com um índice id -> linha, para leituras em lote sem instanciar objetos
+    do ORM.
+
+    A carga completa usa values_list; a cada leitura as linhas registradas em
+    AlteracaoEstudante desde a última verificação são relidas ou removidas. As colunas
+    devolvidas são cópias, então continuam válidas depois de atualizações concorrentes.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._limpar()
+        self.leituras = Latencia()
+        self.atualizacoes = Latencia()
+        self.recargas = Latencia()
+        self.linhas_atualizadas = 0
+
+    def _limpar(self):
+        self._ids = None
+        self._colunas = None
+        self._indice = {}
+        self._total = 0
+        self._cursor = 0
+        self._verificado_em = None
+        self._carregado_em = None
+
+    def _memoria_maxima(self):
+        return getattr(settings, 'SNAPSHOT_MEMORIA_MAXIMA_MB', 64) * 1024 * 1024
+
+    def _reservar(self, capacidade):
+        if capacidade * BYTES_POR_LINHA > self._memoria_maxima():
+            self._limpar()
+            raise SnapshotIndisponivel('estudantes excedem SNAPSHOT_MEMORIA_MAXIMA_MB')
+
+        ids = np.zeros(capacidade, dtype=np.int64)
+        colunas = {feature: np.zeros(capacidade, dtype=np.float64) for feature in FEATURES}
+        if self._ids is not None:
+            ids[:self._total] = self._ids[:self._total]
+            for feature in FEATURES:
+                colunas[feature][:self._total] = self._colunas[feature][:self._total]
+        self._ids = ids
+        self._colunas = colunas
+
+    def _gravar_linha(self, linha, valores):
+        self._ids[linha] = valores[0]
+        for feature, valor in zip(FEATURES, valores[1:]):
+            self._colunas[feature][linha] = valor
+
+    def _inserir_ou_atualizar(self, valores):
+        linha = self._indice.get(valores[0])
+        if linha is None:
+            if self._total == len(self._ids):
+                limite = self._memoria_maxima() // BYTES_POR_LINHA
+                self._reservar(min(self._total * 2, max(limite, self._total + 1)))
+            linha = self._total
+            self._indice[valores[0]] = linha
+            self._total += 1
+        self._gravar_linha(linha, valores)
+
+    def _remover(self, estudante_id):
+        linha = self._indice.pop(estudante_id, None)
+        if linha is None:
+            return
+        # a última linha ocupa o lugar da removida para as colunas continuarem contíguas
+        ultima = self._total - 1
+        if linha != ultima:
+            movido = int(self._ids[ultima])
+            self._ids[linha] = movido
+            for coluna in self._colunas.values():
+                coluna[linha] = coluna[ultima]
+            self._indice[movido] = linha
+        self._total -= 1
+
+    def _carregar(self):
+        inicio = time.perf_counter()
+        self._limpar()
+        agora = timezone.now()
+        # alterações gravadas durante a carga ficam acima do cursor e são reaplicadas depois
+        cursor = AlteracaoEstudante.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+
+        self._reservar(max(Estudante.objects.count(), CAPACIDADE_INICIAL))
+        consulta = Estudante.objects.order_by().values_list('id', *CAMPOS_ESTUDANTE)
+        for valores in consulta.iterator(chunk_size=TAMANHO_LOTE):
+            self._inserir_ou_atualizar(valores)
+
+        self._cursor = cursor
+        self._verificado_em = agora
+        self._carregado_em = agora
+
+        # nenhum processo precisa de alterações mais antigas que a idade máxima do snapshot
+        AlteracaoEstudante.objects.filter(registrada_em__lt=agora - 2 * self._idade_maxima()).delete()
+        self.recargas.registrar(time.perf_counter() - inicio)
+
+    def _atualizar(self):
+        agora = timezone.now()
+        alteracoes = list(
+            AlteracaoEstudante.objects
+            .filter(Q(id__gt=self._cursor) | Q(registrada_em__gte=self._verificado_em - JANELA_RELEITURA))
+            .values_list('id', 'estudante_id')
+        )
+        self._verificado_em = agora
+        if not alteracoes:
+            return
+
+        inicio = time.perf_counter()
+        alterados = sorted({estudante_id for _, estudante_id in alteracoes})
+        encontrados = set()
+        for i in range(0, len(alterados), TAMANHO_LOTE):
+            consulta = (
+                Estudante.objects
+                .filter(id__in=alterados[i:i + TAMANHO_LOTE])
+                .order_by()
+                .values_list('id', *CAMPOS_ESTUDANTE)
+            )
+            for valores in consulta:
+                self._inserir_ou_atualizar(valores)
+                encontrados.add(valores[0])
+
+        for estudante_id in alterados:
+            if estudante_id not in encontrados:
+                self._remover(estudante_id)
+
+        self._cursor = max(self._cursor, max(id_alteracao for id_alteracao, _ in alteracoes))
+        self.linhas_atualizadas += len(alterados)
+        self.atualizacoes.registrar(time.perf_counter() - inicio)
+
+    def _idade_maxima(self):
+        return timedelta(seconds=getattr(settings, 'SNAPSHOT_IDADE_MAXIMA_SEGUNDOS', 3600))
+
+    def _sincronizar(self):
+        if self._carregado_em is None or timezone.now() - self._carregado_em > self._idade_maxima():
+            self._carregar()
+        else:
+            self._atualizar()
+
+    def colunas(self, ids=None):
+        """
+        Devolve (ids, colunas): os ids dos estudantes e um dict feature -> array float64 com
+        as linhas correspondentes. Com `ids`, só os estudantes pedidos que existem, na ordem
+        pedida. Levanta SnapshotIndisponivel se a tabela não couber no orçamento de memória.
+        """
+        inicio = time.perf_counter()
+        with self._trava:
+            self._sincronizar()
+            if ids is None:
+                linhas = slice(0, self._total)
+            else:
+                linhas = np.fromiter(
+                    (self._indice[i] for i in ids if i in self._indice), dtype=np.int64
+                )
+            resultado = (
+                self._ids[linhas].copy(),
+                {feature: coluna[linhas].copy() for feature, coluna in self._colunas.items()},
+            )
+        self.leituras.registrar(time.perf_counter() - inicio)
+        return resultado
+
+    def invalidar(self):
+        with self._trava:
+            self._limpar()
+
+    def metricas(self):
+        with self._trava:
+            return {
+                'linhas': self._total,
+                'capacidade': len(self._ids) if self._ids is not None else 0,
+                'memoria_bytes': len(self._ids) * BYTES_POR_LINHA if self._ids is not None else 0,
+                'memoria_maxima_bytes': self._memoria_maxima(),
+                'carregado_em': self._carregado_em,
+                'verificado_em': self._verificado_em,
+                'leituras': self.leituras.resumo(),
+                'atualizacoes_incrementais': self.atualizacoes.resumo(),
+                'linhas_atualizadas': self.linhas_atualizadas,
+                'recargas_completas': self.recargas.resumo(),
+            }
+
+
+snapshot_features = SnapshotFeatures()
+
+
+def _colunas_pelo_orm(ids):
+    valores = Estudante.objects.filter(id__in=list(ids)).order_by().values_list('id', *CAMPOS_ESTUDANTE)
+    por_id = {linha[0]: linha[1:] for linha in valores}
+    encontrados = [i for i in ids if i in por_id]
+    return (
+        np.array(encontrados, dtype=np.int64),
+        {
+            feature: np.array([por_id[i][posicao] for i in encontrados], dtype=np.float64)
+            for posicao, feature in enumerate(FEATURES)
+        },
+    )
+
+
+def colunas_de_estudantes(ids):
+    """
+    Colunas de features dos estudantes `ids` lidas do snapshot. Os que ainda não estão nele
+    (gravados no instante da leitura) e o caso de a tabela não caber na memória são lidos pelo ORM.
+    """
+    try:
+        encontrados, colunas = snapshot_features.colunas(ids)
+    except SnapshotIndisponivel:
+        return _colunas_pelo_orm(ids)
+
+    faltando = set(ids).difference(encontrados.tolist())
+    if not faltando:
+        return encontrados, colunas
+
+    extras, colunas_extras = _colunas_pelo_orm([i for i in ids if i in faltando])
+    return (
+        np.concatenate([encontrados, extras]),
+        {feature: np.concatenate([colunas[feature], colunas_extras[feature]]) for feature in FEATURES},
+    )
@@ -0,0 +1,120 @@
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from .models import (
+    CAMPO_NIVEL, CAMPO_PREVISAO, PredicaoEvasao, ResumoRiscoDiario, somar_variacoes, variacao_predicao,
+)
+
+CAMPOS_ACUMULADOS = [*CAMPO_NIVEL.values(), *CAMPO_PREVISAO.values(), 'soma_probabilidade']
+TAMANHO_LOTE = 2000
+DIAS_PADRAO = 90
+DIAS_MAXIMO = 731
+
+
+def _contagens(nivel='nivel_risco', previsao='previsao', prefixo=''):
+    agregados = {
+        prefixo + campo: Count('id', filter=Q(**{nivel: valor})) for valor, campo in CAMPO_NIVEL.items()
+    }
+    agregados.update({
+        prefixo + campo: Count('id', filter=Q(**{previsao: valor})) for valor, campo in CAMPO_PREVISAO.items()
+    })
+    return agregados
+
+
+def variacao_reclassificacao(lote, nivel_risco, previsao):
+    """Variação dos totais vigentes quando as predições de `lote` passam às expressões `nivel_risco` e `previsao`."""
+    totais = (
+        lote
+        .filter(mais_recente=True)
+        .annotate(novo_nivel=nivel_risco, nova_previsao=previsao)
+        .aggregate(**_contagens(prefixo='antes_'), **_contagens('novo_nivel', 'nova_previsao', 'depois_'))
+    )
+    campos = [*CAMPO_NIVEL.values(), *CAMPO_PREVISAO.values()]
+    return {campo: totais[f'depois_{campo}'] - totais[f'antes_{campo}'] for campo in campos}
+
+
+def remover_predicoes(vigentes):
+    """Retira do rollup do dia as predições vigentes prestes a ser removidas; chamar na transação da remoção."""
+    totais = vigentes.aggregate(**_contagens(), soma_probabilidade=Sum('probabilidade'))
+    ResumoRiscoDiario.objects.aplicar({campo: -(valor or 0) for campo, valor in totais.items()})
+
+
+def reconstruir_tendencia():
+    """
+    Recalcula todo o rollup a partir do histórico de PredicaoEvasao: em cada dia, cada predição
+    gravada entra nos totais e a predição anterior do mesmo estudante sai deles. Predições já
+    removidas não fazem parte do histórico, e as antigas contam com a classificação atual.
+
+    A leitura do histórico e a regravação ficam na mesma transação. No PostgreSQL a tabela do
+    rollup é travada antes da leitura (EXCLUSIVE: leituras continuam, escritas esperam): uma
+    predição já somada ao rollup faz a reconstrução esperar o seu commit e entra na leitura,
+    e uma predição que ainda não chegou ao rollup só soma a sua variação depois da regravação.
+
+    Retorna a quantidade de dias gravados.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {ResumoRiscoDiario._meta.db_table} IN EXCLUSIVE MODE')
+
+        variacoes = {}
+        anterior = None
+        historico = (
+            PredicaoEvasao.objects
+            .order_by('estudante_id', 'data_predicao', 'id')
+            .values_list('estudante_id', 'data_predicao', 'nivel_risco', 'previsao', 'probabilidade')
+            .iterator(chunk_size=TAMANHO_LOTE)
+        )
+        for estudante_id, data_predicao, *predicao in historico:
+            data = timezone.localdate(data_predicao)
+            variacao = variacao_predicao(*predicao)
+            variacao['estudantes_avaliados'] = 1
+            if anterior and anterior[0] == estudante_id:
+                variacao = somar_variacoes(variacao, variacao_predicao(*anterior[2:], sinal=-1))
+            variacoes[data] = somar_variacoes(variacoes.get(data, {}), variacao)
+            anterior = (estudante_id, data_predicao, *predicao)
+
+        ResumoRiscoDiario.objects.all().delete()
+        ResumoRiscoDiario.objects.bulk_create(
+            [ResumoRiscoDiario(data=data, **variacao) for data, variacao in sorted(variacoes.items())],
+            batch_size=TAMANHO_LOTE,
+        )
+    return len(variacoes)
+
+
+def calcular_tendencia(inicio, fim):
+    """
+    Totais vigentes de cada dia entre `inicio` e `fim` (inclusive), lendo uma linha por dia do
+    rollup mais a soma das linhas anteriores ao período. Dias sem linha repetem o dia anterior.
+    """
+    base = ResumoRiscoDiario.objects.filter(data__lt=inicio).aggregate(
+        **{campo: Sum(campo) for campo in CAMPOS_ACUMULADOS}
+    )
+    acumulado = {campo: base[campo] or 0 for campo in CAMPOS_ACUMULADOS}
+    linhas = {
+        linha['data']: linha
+        for linha in ResumoRiscoDiario.objects.filter(data__gte=inicio, data__lte=fim).values()
+    }
+
+    dias = []
+    for deslocamento in range((fim - inicio).days + 1):
+        data = inicio + timedelta(days=deslocamento)
+        linha = linhas.get(data)
+        if linha:
+            for campo in CAMPOS_ACUMULADOS:
+                acumulado[campo] += linha[campo]
+
+        total = acumulado['risco_alto'] + acumulado['risco_medio'] + acumulado['risco_baixo']
+        dias.append({
+            'data': data.isoformat(),
+            'risco_alto': acumulado['risco_alto'],
+            'risco_medio': acumulado['risco_medio'],
+            'risco_baixo': acumulado['risco_baixo'],
+            'total_vigentes': total,
+            'evasao_prevista': acumulado['evasao_prevista'],
+            'nao_evasao_prevista': acumulado['nao_evasao_prevista'],
+            'probabilidade_media': round(acumulado['soma_probabilidade'] / total, 4) if total else None,
+            'estudantes_avaliados': linha['estudantes_avaliados'] if linha else 0,
+        })
+    return dias
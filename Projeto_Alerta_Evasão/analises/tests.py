@@ -1,3 +1,1022 @@
-from django.test import TestCase
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.management import call_command, CommandError
+from django.db import IntegrityError, connection
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import json
+import msgpack
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from django.contrib.auth.models import Permission, User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from app import schema
+from app.contagem_estimada import contagem_estimada
+from app.admissao import Vagas, liberar
+from app.serializacao_rapida import serializar_rapido
+from estudantes.models import Estudante
+from .models import AlertaRisco, PredicaoEvasao, ReavaliacaoSolicitada, ResumoFeatures, ResumoRiscoDiario
+from . import alertas
+from . import pontuacao_offline
+from . import tendencia
+from . import drift
+from . import treinamento
+from .execucao import Trava, NOME_TRAVA
+from .classificacao import classificar, classificar_lote, reclassificar_predicoes, versao_classificacao
+from .distribuicao import calcular_distribuicao
+from .services import modelo_service, CacheModelos, ModeloCarregado, ModeloPredicaoService
+from .execucao import analisar_estudantes_sem_predicao, processar_reavaliacoes
+from .snapshot import snapshot_features, colunas_de_estudantes, SnapshotIndisponivel, FEATURES
+from .serializers import PredicaoEvasaoSerializer
 
-# Create your tests here.
+
+def criar_estudante(matricula, **campos):
+    dados = {
+        'matricula': matricula,
+        'idade_ingresso': 18,
+        'genero': 1,
+        'turno_aulas': 1,
+        'bolsista': False,
+        'necessidades_especiais': False,
+        'disciplinas_aprovadas_1per': 5,
+        'disciplinas_matriculadas_1per': 6,
+        'nota_media_1per': 8.5,
+        'disciplinas_aprovadas_2per': 4,
+        'disciplinas_matriculadas_2per': 5,
+        'nota_media_2per': 7.8,
+    }
+    dados.update(campos)
+    return Estudante.objects.create(**dados)
+
+
+class DistribuicaoProbabilidadesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        probabilidades = [0.05, 0.15, 0.25, 0.35, 0.45, 0.55, 0.65, 0.75, 0.85, 1.0]
+        for i, probabilidade in enumerate(probabilidades):
+            estudante = criar_estudante(f'20230{i:04d}')
+            PredicaoEvasao.objects.create(
+                estudante=estudante,
+                probabilidade=probabilidade,
+                previsao='Evasão' if probabilidade >= 0.5 else 'Não evasão',
+                nivel_risco='Alto' if probabilidade >= 0.7 else 'Baixo'
+            )
+
+    def test_histograma_e_quantis(self):
+        distribuicao = calcular_distribuicao(10)
+
+        self.assertEqual(distribuicao['total'], 10)
+        self.assertEqual(distribuicao['contagens'], [1, 1, 1, 1, 1, 1, 1, 1, 1, 1])
+        self.assertAlmostEqual(distribuicao['quantis']['p50'], 0.5)
+        self.assertAlmostEqual(distribuicao['quantis']['p10'], 0.14)
+
+    def test_predicoes_removidas_entre_contagem_e_leitura(self):
+        # contagem desatualizada: a leitura é refeita com o total efetivamente percorrido
+        with mock.patch.object(QuerySet, 'count', return_value=12):
+            distribuicao = calcular_distribuicao(10)
+
+        self.assertEqual(distribuicao['total'], 10)
+        self.assertAlmostEqual(distribuicao['quantis']['p50'], 0.5)
+
+    def test_endpoint_inclui_limites_do_modelo(self):
+        response = APIClient().get(reverse('distribuicao_probabilidades'), {'faixas': 4})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(response.data['contagens']), 10)
+        self.assertEqual(len(response.data['contagens']), 4)
+        self.assertIn('threshold_evasao', response.data['limites'])
+
+    def test_faixas_invalidas(self):
+        response = APIClient().get(reverse('distribuicao_probabilidades'), {'faixas': 0})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class EstudantesEmRiscoTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estudantes = []
+        for i, (probabilidade, turno, bolsista) in enumerate([
+            (0.95, 0, True), (0.90, 0, False), (0.80, 1, True), (0.40, 0, True), (0.10, 1, False)
+        ]):
+            estudante = criar_estudante(f'20240{i:04d}', turno_aulas=turno, bolsista=bolsista)
+            PredicaoEvasao.objects.registrar(estudante, {
+                'probabilidade': probabilidade,
+                'previsao': 'Evasão' if probabilidade >= 0.6 else 'Não evasão',
+                'nivel_risco': 'Alto' if probabilidade >= 0.7 else 'Baixo'
+            })
+            cls.estudantes.append(estudante)
+
+    def test_usa_apenas_predicao_mais_recente(self):
+        PredicaoEvasao.objects.registrar(self.estudantes[0], {
+            'probabilidade': 0.2, 'previsao': 'Não evasão', 'nivel_risco': 'Baixo'
+        })
+
+        response = APIClient().get(reverse('estudantes_em_risco'))
+
+        self.assertEqual(response.status_code, 200)
+        probabilidades = [r['probabilidade'] for r in response.data['resultados']]
+        self.assertEqual(probabilidades, [0.90, 0.80, 0.40, 0.2, 0.10])
+
+    def test_paginacao_por_continuacao(self):
+        client = APIClient()
+        vistos = []
+        params = {'limite': 2}
+        while True:
+            response = client.get(reverse('estudantes_em_risco'), params)
+            vistos += [r['estudante_id'] for r in response.data['resultados']]
+            if not response.data['proxima_pagina']:
+                break
+            params['continuacao'] = response.data['proxima_pagina']
+
+        self.assertEqual(vistos, [e.id for e in self.estudantes])
+
+    def test_filtros(self):
+        response = APIClient().get(reverse('estudantes_em_risco'), {
+            'turno_aulas': 0, 'bolsista': 'true', 'nivel_risco': 'Alto'
+        })
+
+        self.assertEqual([r['estudante_id'] for r in response.data['resultados']], [self.estudantes[0].id])
+
+    def test_continuacao_invalida(self):
+        response = APIClient().get(reverse('estudantes_em_risco'), {'continuacao': '###'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class RelatorioCondicionalTest(TestCase):
+
+    def test_relatorio_revalidado_apos_limpeza(self):
+        estudante = criar_estudante('202500001')
+        PredicaoEvasao.objects.registrar(estudante, {
+            'probabilidade': 0.8, 'previsao': 'Evasão', 'nivel_risco': 'Alto'
+        })
+        client = APIClient()
+        etag = client.get(reverse('gerar_relatorio_analises'))['ETag']
+
+        self.assertEqual(client.get(reverse('gerar_relatorio_analises'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        client.delete(reverse('remover_todas_analises'))
+        response = client.get(reverse('gerar_relatorio_analises'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['resumo_geral']['total_analises_realizadas'], 0)
+
+    def test_vary_accept_tambem_no_304(self):
+        client = APIClient()
+        response = client.get(reverse('gerar_relatorio_analises'), HTTP_ACCEPT='application/msgpack')
+        revalidada = client.get(
+            reverse('gerar_relatorio_analises'),
+            HTTP_ACCEPT='application/msgpack', HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+
+        self.assertEqual(revalidada.status_code, 304)
+        self.assertIn('Accept', response['Vary'])
+        self.assertIn('Accept', revalidada['Vary'])
+
+    def test_listagem_revalidada_apos_edicao_do_estudante(self):
+        estudante = criar_estudante('202500002')
+        PredicaoEvasao.objects.registrar(estudante, {
+            'probabilidade': 0.8, 'previsao': 'Evasão', 'nivel_risco': 'Alto'
+        })
+        client = APIClient()
+        etag = client.get(reverse('listar_todas_analises'))['ETag']
+
+        estudante.matricula = '202500003'
+        estudante.save()
+        response = client.get(reverse('listar_todas_analises'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['estudante_dados']['matricula'], '202500003')
+
+
+class SerializacaoRapidaTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            estudante = criar_estudante(f'20260{i:04d}', genero=i % 2)
+            PredicaoEvasao.objects.registrar(estudante, {
+                'probabilidade': 0.3 * i, 'previsao': 'Não evasão', 'nivel_risco': 'Baixo'
+            })
+
+    def test_mesma_saida_do_serializer(self):
+        predicoes = PredicaoEvasao.objects.order_by('-data_predicao')
+
+        self.assertEqual(
+            serializar_rapido(predicoes, PredicaoEvasaoSerializer),
+            json.loads(json.dumps(PredicaoEvasaoSerializer(predicoes, many=True).data))
+        )
+
+    def test_formatos_msgpack_e_colunar(self):
+        client = APIClient()
+        json_padrao = client.get(reverse('listar_todas_analises')).json()
+
+        resposta_msgpack = client.get(reverse('listar_todas_analises'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(resposta_msgpack['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(resposta_msgpack.content), json_padrao)
+
+        colunar = json.loads(client.get(reverse('listar_todas_analises'), {'format': 'colunar'}).content)
+        self.assertEqual(colunar['total'], 3)
+        self.assertEqual(colunar['colunas']['probabilidade'], [p['probabilidade'] for p in json_padrao])
+        self.assertEqual(
+            colunar['colunas']['estudante_dados.matricula'],
+            [p['estudante_dados']['matricula'] for p in json_padrao]
+        )
+
+
+class DriftFeaturesTest(TestCase):
+
+    def test_resumo_incremental_igual_ao_recalculado(self):
+        estudantes = [criar_estudante(f'20270{i:04d}', idade_ingresso=18 + i) for i in range(4)]
+        estudantes[0].nota_media_1per = 12.5
+        estudantes[0].save()
+        estudantes[1].delete()
+
+        resumo = ResumoFeatures.objects.get(nome=drift.NOME_RESUMO)
+        incremental, _ = drift.estatisticas_resumo(resumo)
+        drift.recalcular_resumo()
+        resumo.refresh_from_db()
+        recalculado, _ = drift.estatisticas_resumo(resumo)
+
+        self.assertEqual(ResumoFeatures.objects.get(nome=drift.NOME_RESUMO).contagem, 3)
+        for feature, esboco in recalculado.items():
+            self.assertEqual(incremental[feature]['histograma'], esboco['histograma'])
+            self.assertAlmostEqual(incremental[feature]['soma'], esboco['soma'])
+
+    def test_edicao_atualiza_so_as_faixas_alteradas(self):
+        estudante = criar_estudante('202700100', nota_media_1per=8.0)
+        with CaptureQueriesContext(connection) as consultas:
+            estudante.nota_media_1per = 12.5
+            estudante.save()
+
+        atualizacoes = [q['sql'] for q in consultas.captured_queries if 'faixaresumofeatures' in q['sql'].lower()]
+        # um UPDATE para as duas faixas (a que o valor deixa e a que ele ocupa), sem travar o resumo
+        self.assertEqual(len(atualizacoes), 1)
+        self.assertFalse(any('FOR UPDATE' in sql for sql in atualizacoes))
+        resumo, _ = drift.estatisticas_resumo(ResumoFeatures.objects.get(nome=drift.NOME_RESUMO))
+        self.assertAlmostEqual(resumo['Curricular units 1st sem (grade)']['soma'], 12.5)
+
+    def test_recalcular_sem_referencia(self):
+        with mock.patch.object(drift, 'carregar_referencia', return_value=None):
+            with self.assertRaisesMessage(CommandError, 'referência de drift não encontrada'):
+                call_command('monitor_drift', '--recalcular', stdout=StringIO())
+
+    def test_endpoint_drift(self):
+        for i in range(5):
+            criar_estudante(f'20280{i:04d}', nota_media_1per=8.0 + i)
+
+        response = APIClient().get(reverse('drift_features'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_producao'], 5)
+        self.assertEqual(len(response.data['features']), 11)
+        self.assertEqual(response.data['features']['Curricular units 1st sem (grade)']['media_producao'], 10.0)
+        self.assertIsNotNone(response.data['features']['Age at enrollment']['psi'])
+
+
+class ReclassificacaoTest(TestCase):
+
+    def test_reclassifica_com_novas_faixas(self):
+        for i, probabilidade in enumerate([0.1, 0.35, 0.5, 0.65, 0.9]):
+            PredicaoEvasao.objects.registrar(criar_estudante(f'20290{i:04d}'), {
+                'probabilidade': probabilidade, 'previsao': 'Não evasão', 'nivel_risco': 'Baixo'
+            })
+        meta = {'risk_bands': {'low': 0.4, 'high': 0.6}, 'best_threshold': 0.5}
+
+        atualizadas = reclassificar_predicoes(meta, tamanho_lote=2)
+
+        self.assertEqual(atualizadas, 5)
+        linhas = list(PredicaoEvasao.objects.order_by('probabilidade').values_list(
+            'nivel_risco', 'previsao', 'versao_classificacao'
+        ))
+        versao = versao_classificacao(meta)
+        self.assertEqual(linhas, [
+            ('Baixo', 'Não evasão', versao),
+            ('Baixo', 'Não evasão', versao),
+            ('Médio', 'Evasão', versao),
+            ('Alto', 'Evasão', versao),
+            ('Alto', 'Evasão', versao),
+        ])
+        self.assertEqual(reclassificar_predicoes(meta), 0)
+
+
+class AnaliseExecucaoUnicaTest(TestCase):
+
+    def setUp(self):
+        snapshot_features.invalidar()
+        for i in range(3):
+            criar_estudante(f'20300{i:04d}', nota_media_1per=2.0 * i)
+        self.client = APIClient()
+
+    def test_segunda_chamada_nao_duplica_predicoes(self):
+        primeira = self.client.post(reverse('analisar_todos'))
+        segunda = self.client.post(reverse('analisar_todos'))
+
+        self.assertEqual(primeira.data['predicoes_criadas'], 3)
+        self.assertNotIn('predicoes_criadas', segunda.data)
+        self.assertEqual(PredicaoEvasao.objects.count(), 3)
+
+    @override_settings(ANALISE_INTERVALO_MINIMO_SEGUNDOS=60)
+    def test_intervalo_minimo_reaproveita_execucao(self):
+        primeira = self.client.post(reverse('analisar_todos'))
+        segunda = self.client.post(reverse('analisar_todos'))
+
+        self.assertEqual(segunda['X-Execucao-Reaproveitada'], 'true')
+        self.assertEqual(segunda['X-Execucao-Analise'], primeira['X-Execucao-Analise'])
+        self.assertEqual(segunda.data, primeira.data)
+
+    @override_settings(ANALISE_ESPERA_MAXIMA_SEGUNDOS=0)
+    def test_execucao_em_andamento_retorna_503(self):
+        trava = Trava(NOME_TRAVA)
+        self.assertTrue(trava.tentar())
+        try:
+            response = self.client.post(reverse('analisar_todos'))
+        finally:
+            trava.liberar()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(PredicaoEvasao.objects.count(), 0)
+
+    def test_uma_predicao_vigente_por_estudante(self):
+        estudante = Estudante.objects.first()
+        dados = {'probabilidade': 0.5, 'previsao': 'Não evasão', 'nivel_risco': 'Médio'}
+        PredicaoEvasao.objects.create(estudante=estudante, mais_recente=True, **dados)
+
+        with self.assertRaises(IntegrityError):
+            PredicaoEvasao.objects.create(estudante=estudante, mais_recente=True, **dados)
+
+    def test_marcar_vigentes_deixa_so_a_ultima(self):
+        # estado de um banco anterior à constraint: a predição vigente não é a mais nova
+        estudante = Estudante.objects.first()
+        dados = {'probabilidade': 0.5, 'previsao': 'Não evasão', 'nivel_risco': 'Médio'}
+        antiga = PredicaoEvasao.objects.create(estudante=estudante, mais_recente=True, **dados)
+        nova = PredicaoEvasao.objects.create(estudante=estudante, mais_recente=False, **dados)
+        PredicaoEvasao.objects.filter(id=antiga.id).update(data_predicao=timezone.now() - timedelta(days=1))
+
+        saida = StringIO()
+        call_command('marcar_predicoes_vigentes', '--lote', '1', stdout=saida)
+
+        self.assertIn('1 predições antigas', saida.getvalue())
+        self.assertEqual(
+            list(PredicaoEvasao.objects.filter(mais_recente=True).values_list('id', flat=True)), [nova.id]
+        )
+
+
+class SnapshotFeaturesTest(TestCase):
+
+    def setUp(self):
+        # o snapshot é do processo e não acompanha o rollback de cada teste
+        snapshot_features.invalidar()
+        self.estudantes = [criar_estudante(f'20310{i:04d}', idade_ingresso=18 + i) for i in range(4)]
+
+    def test_atualizacao_incremental_igual_a_recarga(self):
+        snapshot_features.colunas()
+
+        self.estudantes[0].nota_media_1per = 3.25
+        self.estudantes[0].bolsista = True
+        self.estudantes[0].save()
+        self.estudantes[1].delete()
+        novo = criar_estudante('203109999', idade_ingresso=40)
+
+        ids, colunas = snapshot_features.colunas([novo.id, self.estudantes[1].id, self.estudantes[0].id])
+        self.assertEqual(ids.tolist(), [novo.id, self.estudantes[0].id])
+        self.assertEqual(colunas['Age at enrollment'].tolist(), [40.0, 18.0])
+        self.assertEqual(colunas['Curricular units 1st sem (grade)'].tolist()[1], 3.25)
+        self.assertEqual(colunas['Scholarship holder'].tolist()[1], 1.0)
+
+        ids_incremental, incremental = snapshot_features.colunas()
+        snapshot_features.invalidar()
+        ids_recarga, recarga = snapshot_features.colunas()
+        ordem_incremental, ordem_recarga = ids_incremental.argsort(), ids_recarga.argsort()
+        self.assertEqual(ids_incremental[ordem_incremental].tolist(), ids_recarga[ordem_recarga].tolist())
+        for feature in FEATURES:
+            self.assertEqual(incremental[feature][ordem_incremental].tolist(), recarga[feature][ordem_recarga].tolist())
+
+        metricas = snapshot_features.metricas()
+        self.assertEqual(metricas['linhas'], 4)
+        self.assertGreaterEqual(metricas['atualizacoes_incrementais']['quantidade'], 1)
+
+    @override_settings(SNAPSHOT_MEMORIA_MAXIMA_MB=0)
+    def test_acima_do_orcamento_le_pelo_orm(self):
+        with self.assertRaises(SnapshotIndisponivel):
+            snapshot_features.colunas()
+
+        ids, colunas = colunas_de_estudantes([e.id for e in self.estudantes])
+        self.assertEqual(ids.tolist(), [e.id for e in self.estudantes])
+        self.assertEqual(colunas['Age at enrollment'].tolist(), [18.0, 19.0, 20.0, 21.0])
+
+    def test_predicao_em_lote_igual_a_individual(self):
+        _, colunas = snapshot_features.colunas([e.id for e in self.estudantes])
+
+        lote = modelo_service.prever_evasao_lote(colunas)
+        individuais = [modelo_service.prever_evasao_estudante(e) for e in self.estudantes]
+
+        self.assertEqual(lote, individuais)
+
+    def test_endpoint_metricas(self):
+        snapshot_features.colunas()
+
+        response = APIClient().get(reverse('snapshot_features'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['linhas'], 4)
+        self.assertGreaterEqual(response.data['recargas_completas']['quantidade'], 1)
+
+
+class ModelosPorCampusTest(TestCase):
+
+    def setUp(self):
+        snapshot_features.invalidar()
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        origem = os.path.join(settings.BASE_DIR, 'ml_model')
+        with open(os.path.join(origem, 'model_meta.json')) as f:
+            meta = json.load(f)
+
+        # mesmo modelo com faixas que classificam todos como risco alto
+        self.meta_norte = dict(meta, risk_bands={'low': 0.0, 'high': 0.0})
+        for campus, meta_campus in [('norte', self.meta_norte), ('sul', meta)]:
+            destino = os.path.join(self.base_dir, 'ml_model', 'campi', campus)
+            os.makedirs(destino)
+            shutil.copy(os.path.join(origem, 'gradient_boosting_dropout.pkl'), destino)
+            with open(os.path.join(destino, 'model_meta.json'), 'w') as f:
+                json.dump(meta_campus, f)
+
+    def test_lote_usa_o_modelo_do_campus(self):
+        for i in range(3):
+            criar_estudante(f'20320{i:04d}', campus='norte', nota_media_1per=15.0)
+            criar_estudante(f'20321{i:04d}', nota_media_1per=15.0)
+        criar_estudante('203220000', campus='sem-modelo', nota_media_1per=15.0)
+
+        self.addCleanup(setattr, modelo_service, 'modelos_campi', CacheModelos())
+        modelo_service.modelos_campi = CacheModelos()
+        with self.settings(BASE_DIR=self.base_dir):
+            resultado = analisar_estudantes_sem_predicao()
+
+        self.assertEqual(resultado['predicoes_criadas'], 7)
+        norte = PredicaoEvasao.objects.filter(estudante__campus='norte')
+        self.assertEqual(set(norte.values_list('nivel_risco', flat=True)), {'Alto'})
+        self.assertEqual(set(norte.values_list('versao_classificacao', flat=True)), {versao_classificacao(self.meta_norte)})
+        outros = PredicaoEvasao.objects.exclude(estudante__campus='norte')
+        self.assertEqual(set(outros.values_list('versao_classificacao', flat=True)), {modelo_service.versao_classificacao})
+        self.assertEqual(modelo_service.modelos_campi.metricas()['carregamentos'], 1)
+
+        response = APIClient().get(reverse('modelos_campi'))
+        self.assertEqual(response.data['campi_carregados'], ['norte'])
+        self.assertEqual(response.data['campi_sem_modelo'], ['sem-modelo'])
+
+    def test_existencia_do_modelo_fica_em_cache(self):
+        cache = CacheModelos()
+        with self.settings(BASE_DIR=self.base_dir), mock.patch('analises.services.os.path.exists', wraps=os.path.exists) as exists:
+            self.assertTrue(cache.tem_modelo('norte'))
+            self.assertTrue(cache.tem_modelo('norte'))
+            self.assertFalse(cache.tem_modelo('sem-modelo'))
+            self.assertFalse(cache.tem_modelo('sem-modelo'))
+
+        self.assertEqual(exists.call_count, 2)
+
+    def test_carga_de_um_campus_nao_bloqueia_os_outros(self):
+        cache = CacheModelos()
+        liberar_norte = threading.Event()
+        original = ModeloCarregado
+
+        def carregar(diretorio):
+            if diretorio.endswith('norte'):
+                liberar_norte.wait(5)
+            return original(diretorio)
+
+        with self.settings(BASE_DIR=self.base_dir), mock.patch('analises.services.ModeloCarregado', side_effect=carregar):
+            norte = threading.Thread(target=cache.obter, args=('norte',))
+            norte.start()
+            try:
+                cache.obter('sul')
+                self.assertEqual(cache.metricas()['campi_carregados'], ['sul'])
+            finally:
+                liberar_norte.set()
+                norte.join()
+
+        self.assertEqual(cache.metricas()['campi_carregados'], ['sul', 'norte'])
+
+    def test_cache_descarta_o_menos_usado(self):
+        cache = CacheModelos()
+        with self.settings(BASE_DIR=self.base_dir, MODELOS_MEMORIA_MAXIMA_MB=0.5):
+            cache.obter('norte')
+            cache.obter('sul')
+            cache.obter('sul')
+            cache.obter('norte')
+
+        metricas = cache.metricas()
+        self.assertEqual(metricas['campi_carregados'], ['norte'])
+        self.assertEqual(metricas['carregamentos'], 3)
+        self.assertEqual(metricas['descartes'], 2)
+        self.assertEqual(metricas['acertos'], 1)
+
+
+class SchemaOpenApiTest(TestCase):
+
+    def setUp(self):
+        schema.limpar_cache()
+        self.addCleanup(schema.limpar_cache)
+
+    def test_schema_gravado_esta_atualizado(self):
+        # falha quando views ou serializers mudam sem `manage.py gerar_schema`
+        call_command('gerar_schema', '--verificar', stdout=StringIO(), stderr=StringIO())
+
+    def test_schema_com_etag_forte_e_304(self):
+        client = APIClient()
+
+        response = client.get(reverse('schema'), {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, settings.SCHEMA_OPENAPI_ARQUIVO.read_bytes())
+        self.assertFalse(response['ETag'].startswith('W/'))
+
+        revalidada = client.get(reverse('schema'), {'format': 'json'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidada.status_code, 304)
+        self.assertIn('Accept', revalidada['Vary'])
+
+        yaml = client.get(reverse('schema'))
+        self.assertTrue(yaml['Content-Type'].startswith('application/vnd.oai.openapi;'))
+        self.assertNotEqual(yaml['ETag'], response['ETag'])
+
+
+class AdmissaoTest(TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        self.client = APIClient()
+
+    def _limites(self, **relatorios):
+        limites = {
+            'relatorios': dict({'global': 1, 'por_cliente': 1, 'fila': 0, 'espera_segundos': 1}, **relatorios),
+            'crud': {'global': 1, 'por_cliente': 1, 'fila': 0, 'espera_segundos': 1},
+            'analise': {'global': 2, 'por_cliente': 1, 'fila': 0, 'espera_segundos': 1},
+        }
+        return self.settings(ADMISSAO_DIRETORIO=self.diretorio, ADMISSAO_LIMITES=limites)
+
+    def _ocupar(self, prefixo):
+        vaga = Vagas(prefixo, 1).ocupar()
+        self.assertIsNotNone(vaga)
+        self.addCleanup(liberar, vaga)
+
+    def test_limite_por_cliente_retorna_429(self):
+        with self._limites():
+            self._ocupar(f"relatorios-cliente-{hashlib.sha256(b'ip:127.0.0.1').hexdigest()}")
+            response = self.client.get(reverse('gerar_relatorio_analises'))
+            outro_cliente = self.client.get(reverse('gerar_relatorio_analises'), REMOTE_ADDR='10.0.0.7')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(outro_cliente.status_code, 200)
+
+    def test_fila_cheia_retorna_503(self):
+        with self._limites():
+            self._ocupar('relatorios-global')
+            response = self.client.get(reverse('gerar_relatorio_analises'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+    def test_espera_esgotada_retorna_503(self):
+        with self._limites(fila=1, espera_segundos=0.2):
+            self._ocupar('relatorios-global')
+            response = self.client.get(reverse('gerar_relatorio_analises'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('espera esgotado', json.loads(response.content)['erro'])
+
+    def test_crud_tem_orcamento_proprio(self):
+        with self._limites():
+            self._ocupar('relatorios-global')
+            relatorio = self.client.get(reverse('gerar_relatorio_analises'))
+            estudantes = self.client.get('/api/estudantes/estudantes/')
+
+        self.assertEqual(relatorio.status_code, 503)
+        self.assertEqual(estudantes.status_code, 200)
+
+    def test_revalidacao_da_listagem_antes_da_admissao(self):
+        with self._limites():
+            etag = self.client.get('/api/estudantes/estudantes/')['ETag']
+            self._ocupar('crud-global')
+            revalidada = self.client.get('/api/estudantes/estudantes/', HTTP_IF_NONE_MATCH=etag)
+            completa = self.client.get('/api/estudantes/estudantes/')
+
+        self.assertEqual(revalidada.status_code, 304)
+        self.assertEqual(completa.status_code, 503)
+
+    def test_analise_tem_orcamento_proprio(self):
+        criar_estudante('203100001')
+        with self._limites():
+            self._ocupar('relatorios-global')
+            response = self.client.post(reverse('analisar_todos'))
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_analise_limita_chamadas_aguardando(self):
+        criar_estudante('203100001')
+        with self._limites():
+            self._ocupar(f"analise-cliente-{hashlib.sha256(b'ip:127.0.0.1').hexdigest()}")
+            mesmo_cliente = self.client.post(reverse('analisar_todos'))
+            globais = Vagas('analise-global', 2)
+            for _ in range(2):
+                vaga = globais.ocupar()
+                self.addCleanup(liberar, vaga)
+            servidor_ocupado = self.client.post(reverse('analisar_todos'), REMOTE_ADDR='10.0.0.7')
+
+        self.assertEqual(mesmo_cliente.status_code, 429)
+        self.assertIn('Retry-After', mesmo_cliente)
+        self.assertEqual(servidor_ocupado.status_code, 503)
+        self.assertIn('Retry-After', servidor_ocupado)
+
+
+class AlertasRiscoTest(TestCase):
+
+    def setUp(self):
+        self.estudante = criar_estudante('203300000')
+
+    def _registrar(self, nivel, probabilidade):
+        return PredicaoEvasao.objects.registrar(self.estudante, {
+            'probabilidade': probabilidade, 'previsao': 'Evasão', 'nivel_risco': nivel
+        })
+
+    def test_transicoes_de_risco_alto_vao_para_o_outbox(self):
+        self._registrar('Baixo', 0.1)
+        entrada = self._registrar('Alto', 0.8)
+        self._registrar('Alto', 0.9)
+        saida = self._registrar('Médio', 0.5)
+
+        self.assertEqual(
+            list(AlertaRisco.objects.values_list('tipo', 'predicao_id', 'nivel_anterior', 'nivel_atual')),
+            [('entrou_alto', entrada.id, 'Baixo', 'Alto'), ('saiu_alto', saida.id, 'Alto', 'Médio')]
+        )
+        self.assertEqual(AlertaRisco.objects.first().matricula, '203300000')
+
+    def test_reclassificacao_gera_alertas(self):
+        predicao = self._registrar('Médio', 0.65)
+        meta = {'risk_bands': {'low': 0.3, 'high': 0.6}, 'best_threshold': 0.5}
+
+        reclassificar_predicoes(meta)
+        reclassificar_predicoes(meta)
+
+        alerta = AlertaRisco.objects.get()
+        self.assertEqual((alerta.tipo, alerta.predicao_id), ('entrou_alto', predicao.id))
+
+    def test_despacho_em_arquivo(self):
+        self._registrar('Alto', 0.8)
+        self._registrar('Baixo', 0.2)
+        caminho = os.path.join(tempfile.mkdtemp(), 'alertas.jsonl')
+        self.addCleanup(shutil.rmtree, os.path.dirname(caminho))
+
+        entregues, com_erro = alertas.despachar(alertas.DestinoArquivo(caminho), tamanho_lote=1)
+
+        self.assertEqual((entregues, com_erro), (2, 0))
+        with open(caminho) as f:
+            linhas = [json.loads(linha) for linha in f]
+        self.assertEqual([l['tipo'] for l in linhas], ['entrou_alto', 'saiu_alto'])
+        self.assertEqual(len({l['chave'] for l in linhas}), 2)
+        self.assertFalse(AlertaRisco.objects.filter(status='pendente').exists())
+
+    def test_falha_reagenda_com_backoff_e_desiste(self):
+        class DestinoFora:
+            def enviar(self, lote):
+                raise ConnectionError('destino fora do ar')
+
+        self._registrar('Alto', 0.8)
+
+        self.assertEqual(alertas.despachar(DestinoFora(), max_tentativas=2), (0, 1))
+        alerta = AlertaRisco.objects.get()
+        self.assertEqual((alerta.status, alerta.tentativas), ('pendente', 1))
+        self.assertGreater(alerta.proxima_tentativa_em, alerta.criado_em)
+        self.assertIn('destino fora do ar', alerta.ultimo_erro)
+        # ainda não chegou a hora da nova tentativa
+        self.assertEqual(alertas.despachar(DestinoFora(), max_tentativas=2), (0, 0))
+
+        AlertaRisco.objects.update(proxima_tentativa_em=alerta.criado_em)
+        alertas.despachar(DestinoFora(), max_tentativas=2)
+        self.assertEqual(AlertaRisco.objects.get().status, 'falhou')
+
+    def test_envio_fora_de_transacao_com_lote_reservado(self):
+        teste = self
+        blocos_fora = len(connection.atomic_blocks)
+
+        class DestinoObservador:
+            def enviar(self, lote):
+                teste.assertEqual(len(connection.atomic_blocks), blocos_fora)
+                teste.assertGreater(AlertaRisco.objects.get().proxima_tentativa_em, timezone.now())
+                # o lote reservado não é entregue de novo por outro despachante
+                teste.assertEqual(alertas.despachar_lote(alertas.DestinoConsole(StringIO())), (0, 0))
+
+        self._registrar('Alto', 0.8)
+
+        self.assertEqual(alertas.despachar_lote(DestinoObservador()), (1, 0))
+        self.assertEqual(AlertaRisco.objects.get().status, 'entregue')
+
+    def test_falha_com_reserva_vencida_nao_sobrescreve_outro_despachante(self):
+        class DestinoLento:
+            def enviar(self, lote):
+                # a reserva venceu e outro despachante assumiu o lote
+                AlertaRisco.objects.update(proxima_tentativa_em=timezone.now() + timedelta(hours=1))
+                raise ConnectionError('tempo esgotado')
+
+        self._registrar('Alto', 0.8)
+
+        self.assertEqual(alertas.despachar_lote(DestinoLento()), (0, 1))
+        alerta = AlertaRisco.objects.get()
+        self.assertEqual((alerta.status, alerta.tentativas, alerta.ultimo_erro), ('pendente', 0, ''))
+
+
+class TendenciaRiscoTest(TestCase):
+
+    def _totais_vigentes(self):
+        vigentes = PredicaoEvasao.objects.filter(mais_recente=True)
+        return {
+            'risco_alto': vigentes.filter(nivel_risco='Alto').count(),
+            'risco_medio': vigentes.filter(nivel_risco='Médio').count(),
+            'risco_baixo': vigentes.filter(nivel_risco='Baixo').count(),
+            'evasao_prevista': vigentes.filter(previsao='Evasão').count(),
+        }
+
+    def _hoje(self):
+        hoje = timezone.localdate()
+        dia = tendencia.calcular_tendencia(hoje, hoje)[0]
+        return {campo: dia[campo] for campo in ('risco_alto', 'risco_medio', 'risco_baixo', 'evasao_prevista')}
+
+    def test_rollup_incremental_acompanha_as_predicoes_vigentes(self):
+        estudantes = [criar_estudante(f'20340{i:04d}') for i in range(4)]
+        for estudante, probabilidade in zip(estudantes, [0.1, 0.4, 0.75, 0.9]):
+            PredicaoEvasao.objects.registrar(estudante, {
+                'probabilidade': probabilidade, 'previsao': 'Não evasão', 'nivel_risco': 'Baixo'
+            })
+        PredicaoEvasao.objects.registrar(estudantes[0], {
+            'probabilidade': 0.8, 'previsao': 'Evasão', 'nivel_risco': 'Alto'
+        })
+        reclassificar_predicoes({'risk_bands': {'low': 0.3, 'high': 0.7}, 'best_threshold': 0.5}, tamanho_lote=2)
+        estudantes[3].delete()
+
+        self.assertEqual(self._hoje(), self._totais_vigentes())
+        self.assertEqual(self._hoje(), {'risco_alto': 2, 'risco_medio': 1, 'risco_baixo': 0, 'evasao_prevista': 2})
+        self.assertEqual(ResumoRiscoDiario.objects.get().estudantes_avaliados, 5)
+
+        self.assertEqual(tendencia.reconstruir_tendencia(), 1)
+        self.assertEqual(self._hoje(), self._totais_vigentes())
+
+        self.client.delete(reverse('remover_todas_analises'))
+        self.assertEqual(self._hoje(), {'risco_alto': 0, 'risco_medio': 0, 'risco_baixo': 0, 'evasao_prevista': 0})
+
+    def test_reconstrucao_le_o_historico_na_transacao_da_regravacao(self):
+        PredicaoEvasao.objects.registrar(criar_estudante('203420000'), {
+            'probabilidade': 0.9, 'previsao': 'Evasão', 'nivel_risco': 'Alto'
+        })
+        blocos_fora = len(connection.atomic_blocks)
+        blocos_na_leitura = []
+        order_by = QuerySet.order_by
+
+        def registrar_bloco(queryset, *campos):
+            if queryset.model is PredicaoEvasao:
+                blocos_na_leitura.append(len(connection.atomic_blocks))
+            return order_by(queryset, *campos)
+
+        with mock.patch.object(QuerySet, 'order_by', registrar_bloco):
+            tendencia.reconstruir_tendencia()
+
+        self.assertEqual(blocos_na_leitura, [blocos_fora + 1])
+
+    def test_endpoint_acumula_os_dias_do_historico(self):
+        estudante = criar_estudante('203410000')
+        hoje = timezone.localdate()
+        antiga = PredicaoEvasao.objects.registrar(estudante, {
+            'probabilidade': 0.2, 'previsao': 'Não evasão', 'nivel_risco': 'Baixo'
+        })
+        PredicaoEvasao.objects.filter(id=antiga.id).update(data_predicao=timezone.now() - timedelta(days=3))
+        PredicaoEvasao.objects.registrar(estudante, {
+            'probabilidade': 0.9, 'previsao': 'Evasão', 'nivel_risco': 'Alto'
+        })
+        call_command('reconstruir_tendencia', stdout=StringIO())
+
+        response = self.client.get(reverse('tendencia_risco'), {
+            'inicio': (hoje - timedelta(days=2)).isoformat(), 'fim': hoje.isoformat()
+        })
+
+        self.assertEqual(response.status_code, 200)
+        dias = response.json()['dias']
+        self.assertEqual([d['risco_baixo'] for d in dias], [1, 1, 0])
+        self.assertEqual([d['risco_alto'] for d in dias], [0, 0, 1])
+        self.assertEqual([d['estudantes_avaliados'] for d in dias], [0, 0, 1])
+        self.assertEqual(dias[-1]['probabilidade_media'], 0.9)
+
+    def test_periodo_invalido(self):
+        self.assertEqual(self.client.get(reverse('tendencia_risco'), {'fim': '12/08/2025'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('tendencia_risco'), {
+            'inicio': '2025-08-12', 'fim': '2025-08-01'
+        }).status_code, 400)
+
+
+class AdminTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estudantes = [criar_estudante(f'20350{i:04d}', turno_aulas=i % 2) for i in range(6)]
+        for i, estudante in enumerate(cls.estudantes):
+            PredicaoEvasao.objects.registrar(estudante, {
+                'probabilidade': 0.9 if i < 2 else 0.1, 'previsao': 'Não evasão',
+                'nivel_risco': 'Alto' if i < 2 else 'Baixo'
+            })
+        cls.usuario = User.objects.create_superuser('admin', 'admin@exemplo.edu.br', 'senha')
+
+    def setUp(self):
+        snapshot_features.invalidar()
+        self.client.force_login(self.usuario)
+
+    def test_listagem_de_predicoes_nao_consulta_o_estudante_por_linha(self):
+        url = reverse('admin:analises_predicaoevasao_changelist')
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(url)
+        for i in range(6, 12):
+            PredicaoEvasao.objects.registrar(criar_estudante(f'20350{i:04d}'), {
+                'probabilidade': 0.5, 'previsao': 'Não evasão', 'nivel_risco': 'Médio'
+            })
+
+        with self.assertNumQueries(len(consultas)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '203500011')
+
+        response = self.client.get(url, {'nivel_risco__exact': 'Alto', 'q': '203500001'})
+        self.assertEqual([p.estudante.matricula for p in response.context['cl'].result_list], ['203500001'])
+
+    def test_filtros_e_busca_de_estudantes(self):
+        url = reverse('admin:estudantes_estudante_changelist')
+        response = self.client.get(url, {'risco_atual': 'Alto', 'turno_aulas__exact': 0})
+        self.assertEqual([e.matricula for e in response.context['cl'].result_list], ['203500000'])
+
+        response = self.client.get(url, {'q': ' 203500003 '})
+        self.assertEqual([e.matricula for e in response.context['cl'].result_list], ['203500003'])
+
+    def test_acao_enfileira_reavaliacao(self):
+        url = reverse('admin:estudantes_estudante_changelist')
+        selecionados = [str(e.id) for e in self.estudantes[:3]]
+        for enfileirados in (3, 0):
+            response = self.client.post(
+                url, {'action': 'reavaliar_estudantes', '_selected_action': selecionados}, follow=True
+            )
+            self.assertContains(response, f'{enfileirados} estudantes enfileirados')
+
+        # a ação só enfileira; as predições não mudam até a fila ser processada
+        self.assertEqual(ReavaliacaoSolicitada.objects.count(), 3)
+        self.assertEqual(PredicaoEvasao.objects.count(), 6)
+
+        reavaliados, erros = processar_reavaliacoes(tamanho_lote=2)
+
+        self.assertEqual((len(reavaliados), erros), (3, []))
+        self.assertFalse(ReavaliacaoSolicitada.objects.exists())
+        self.assertEqual(PredicaoEvasao.objects.count(), 9)
+        self.assertEqual(PredicaoEvasao.objects.filter(mais_recente=True).count(), 6)
+
+        # o relatório e o histograma contam só a predição vigente de cada estudante
+        relatorio = APIClient().get(reverse('gerar_relatorio_analises')).data
+        self.assertEqual(relatorio['resumo_geral']['total_analises_realizadas'], 9)
+        self.assertEqual(relatorio['resumo_geral']['alunos_sem_predicao'], 0)
+        self.assertEqual(sum(relatorio['distribuicao_risco'].values()), 6)
+        self.assertEqual(
+            relatorio['previsoes']['evasao_prevista'] + relatorio['previsoes']['nao_evasao_prevista'], 6
+        )
+        self.assertEqual(calcular_distribuicao(10)['total'], 6)
+
+    def test_acao_exige_permissao_de_reavaliar(self):
+        leitor = User.objects.create_user('leitor', password='senha', is_staff=True)
+        leitor.user_permissions.add(Permission.objects.get(codename='view_estudante'))
+        self.client.force_login(leitor)
+        url = reverse('admin:estudantes_estudante_changelist')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'reavaliar_estudantes')
+
+        self.client.post(url, {'action': 'reavaliar_estudantes', '_selected_action': [self.estudantes[0].id]})
+        self.assertFalse(ReavaliacaoSolicitada.objects.exists())
+
+        leitor.user_permissions.add(Permission.objects.get(codename='solicitar_reavaliacao'))
+        self.client.post(url, {'action': 'reavaliar_estudantes', '_selected_action': [self.estudantes[0].id]})
+        self.assertEqual(ReavaliacaoSolicitada.objects.count(), 1)
+
+    def test_tabela_pequena_usa_contagem_exata(self):
+        # sem estatísticas (SQLite) ou abaixo de ADMIN_CONTAGEM_EXATA_ATE, não há estimativa
+        self.assertIsNone(contagem_estimada(Estudante.objects.all()))
+        self.assertIsNone(contagem_estimada(Estudante.objects.filter(turno_aulas=0)))
+
+
+class PontuacaoOfflineTest(TestCase):
+    databases = set()
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        self.entrada = os.path.join(self.diretorio, 'extrato.csv')
+        dataset = os.path.join(settings.BASE_DIR.parent, 'Aprendizado_de_Máquina', 'dataset.csv')
+        with open(dataset, encoding='utf-8-sig') as origem, open(self.entrada, 'w', encoding='utf-8-sig') as destino:
+            for _ in range(51):
+                destino.write(origem.readline())
+
+    def _ler(self, caminho):
+        with open(caminho) as f:
+            return [linha.rstrip('\n').split(',') for linha in f]
+
+    def test_classificacao_nos_limites_das_faixas(self):
+        meta = {'risk_bands': {'low': 0.3, 'high': 0.7}, 'best_threshold': 0.5}
+        probabilidades = np.array([0.0, 0.29, 0.3, 0.5, 0.69, 0.7, 1.0])
+        niveis, previsoes = classificar_lote(probabilidades, meta)
+
+        self.assertEqual(niveis.tolist(), ['Baixo', 'Baixo', 'Médio', 'Médio', 'Médio', 'Alto', 'Alto'])
+        self.assertEqual(previsoes.tolist(), ['Não evasão'] * 3 + ['Evasão'] * 4)
+        self.assertEqual(classificar(0.69, meta), ('Médio', 'Evasão'))
+        self.assertIs(type(classificar(0.69, meta)[0]), str)
+
+    def test_campus_sem_modelo_e_processos_negativos_sao_recusados(self):
+        saida = os.path.join(self.diretorio, 'saida.csv')
+        with self.assertRaisesMessage(CommandError, 'campus sem modelo'):
+            call_command('pontuar_arquivo', self.entrada, saida, '--campus', 'inexistente', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, '--processos'):
+            call_command('pontuar_arquivo', self.entrada, saida, '--processos', '-1', stdout=StringIO())
+        self.assertFalse(os.path.exists(saida))
+
+    def test_pontua_em_lotes_como_o_servico(self):
+        saida = os.path.join(self.diretorio, 'saida.csv')
+        call_command('pontuar_arquivo', self.entrada, saida, '--lote', '7', '--manter', 'Target', stdout=StringIO())
+
+        linhas = self._ler(saida)
+        self.assertEqual(linhas[0], ['Target', 'probabilidade', 'previsao', 'nivel_risco'])
+        self.assertEqual(len(linhas), 51)
+
+        extrato = pd.read_csv(self.entrada, encoding='utf-8-sig')
+        esperado = modelo_service.prever_evasao_lote(
+            {feature: extrato[feature].to_numpy() for feature in modelo_service.meta['features_expected']}
+        )
+        self.assertEqual(
+            [(float(p), previsao, nivel) for _, p, previsao, nivel in linhas[1:]],
+            [(r['probabilidade'], r['previsao'], r['nivel_risco']) for r in esperado]
+        )
+
+        paralela = os.path.join(self.diretorio, 'paralela.csv')
+        call_command('pontuar_arquivo', self.entrada, paralela, '--lote', '7', '--processos', '2',
+                     '--manter', 'Target', stdout=StringIO())
+        self.assertEqual(self._ler(paralela), linhas)
+
+    def test_coluna_ausente(self):
+        with self.assertRaisesMessage(CommandError, 'Matricula'):
+            call_command('pontuar_arquivo', self.entrada, os.path.join(self.diretorio, 'saida.csv'),
+                         '--manter', 'Matricula', stdout=StringIO())
+
+
+class TreinamentoTest(TestCase):
+    databases = set()
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        self.dataset = os.path.join(self.diretorio, 'dataset.csv')
+        completo = pd.read_csv(
+            os.path.join(settings.BASE_DIR.parent, 'Aprendizado_de_Máquina', 'dataset.csv'), encoding='utf-8-sig'
+        )
+        completo.sample(300, random_state=0).to_csv(self.dataset, index=False)
+
+    @mock.patch.dict(treinamento.GRADES, {'gb': {'classifier__n_estimators': [10, 20], 'classifier__max_depth': [2]}})
+    def test_comando_grava_modelo_lido_pelo_servico(self):
+        saida = os.path.join(self.diretorio, 'ml_model')
+        call_command(
+            'treinar_modelo', '--dataset', self.dataset, '--saida', saida, '--busca', 'grid', '--cv', '2',
+            '--n-jobs', '1', '--faixa-baixa', '0.25', '--faixa-alta', '0.75', stdout=StringIO(),
+        )
+
+        carregado = ModeloCarregado(saida)
+        self.assertEqual(carregado.meta['risk_bands'], {'low': 0.25, 'high': 0.75})
+        self.assertTrue(0 < carregado.meta['best_threshold'] < 1)
+        self.assertEqual(carregado.meta['training']['best_params']['max_depth'], 2)
+
+        with self.settings(BASE_DIR=self.diretorio):
+            servico = ModeloPredicaoService()
+        extrato = pd.read_csv(self.dataset).head(5)
+        resultados = servico.prever_evasao_lote(
+            {feature: extrato[feature].to_numpy() for feature in servico.meta['features_expected']}
+        )
+
+        self.assertEqual(len(resultados), 5)
+        for resultado in resultados:
+            self.assertEqual(
+                (resultado['nivel_risco'], resultado['previsao']),
+                classificar(resultado['probabilidade'], carregado.meta)
+            )
+            self.assertEqual(resultado['versao_classificacao'], versao_classificacao(carregado.meta))
@@ -0,0 +1,189 @@
+import json
+import os
+import tempfile
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import (
+    accuracy_score, average_precision_score, f1_score, precision_recall_curve,
+    precision_score, recall_score, roc_auc_score
+)
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from .features import MAPA_FEATURES
+
+FEATURES = list(MAPA_FEATURES)
+
+FEATURES_NUMERICAS = [
+    'Age at enrollment',
+    'Curricular units 1st sem (approved)',
+    'Curricular units 1st sem (enrolled)',
+    'Curricular units 1st sem (grade)',
+    'Curricular units 2nd sem (approved)',
+    'Curricular units 2nd sem (enrolled)',
+    'Curricular units 2nd sem (grade)',
+]
+
+FEATURES_CATEGORICAS = [
+    'Gender',
+    'Daytime/evening attendance',
+    'Scholarship holder',
+    'Educational special needs',
+]
+
+NOME_MODELO = 'gradient_boosting_dropout.pkl'
+NOME_META = 'model_meta.json'
+
+# mesmas grades do notebook para o GradientBoosting; a do HistGradientBoosting segue o mesmo tamanho
+GRADES = {
+    'gb': {
+        'classifier__n_estimators': [200, 300],
+        'classifier__learning_rate': [0.05, 0.1],
+        'classifier__max_depth': [3, 4],
+        'classifier__min_samples_leaf': [20, 50],
+        'classifier__subsample': [0.8, 1.0],
+    },
+    'hgb': {
+        'classifier__max_iter': [200, 300],
+        'classifier__learning_rate': [0.05, 0.1],
+        'classifier__max_depth': [3, None],
+        'classifier__min_samples_leaf': [20, 50],
+        'classifier__l2_regularization': [0.0, 1.0],
+    },
+}
+
+
+def carregar_dataset(caminho_csv):
+    """
+    Lê o dataset original e devolve (X, y) com as linhas e features usadas pelo modelo:
+    apenas Dropout (1) e Graduate (0).
+    """
+    df = pd.read_csv(caminho_csv, encoding='utf-8-sig')
+    df = df[df['Target'].isin(['Dropout', 'Graduate'])]
+    y = (df['Target'] == 'Dropout').astype(int)
+    return df[FEATURES].copy(), y
+
+
+def dividir(X, y, random_state=42):
+    """Mesma divisão estratificada 80/20 do notebook."""
+    return train_test_split(X, y, test_size=0.2, random_state=random_state, stratify=y)
+
+
+def criar_pipeline(algoritmo, random_state=42, memoria=None):
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='median')),
+            ('scaler', StandardScaler()),
+        ]), FEATURES_NUMERICAS),
+        ('cat', Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='most_frequent')),
+            ('onehot', OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore')),
+        ]), FEATURES_CATEGORICAS),
+    ])
+
+    if algoritmo == 'hgb':
+        classificador = HistGradientBoostingClassifier(random_state=random_state)
+    else:
+        classificador = GradientBoostingClassifier(random_state=random_state)
+
+    # com `memory`, o preprocessor ajustado em cada fold é reaproveitado por todas as configurações
+    return Pipeline([('preprocessor', preprocessor), ('classifier', classificador)], memory=memoria)
+
+
+def calcular_metricas(y_teste, y_pred, y_proba):
+    return {
+        'AUC': roc_auc_score(y_teste, y_proba),
+        'PR-AUC': average_precision_score(y_teste, y_proba),
+        'Accuracy': accuracy_score(y_teste, y_pred),
+        'Precision': precision_score(y_teste, y_pred, zero_division=0),
+        'Recall': recall_score(y_teste, y_pred, zero_division=0),
+        'F1-Score': f1_score(y_teste, y_pred, zero_division=0),
+    }
+
+
+def melhor_threshold(y_teste, y_proba):
+    """Threshold de maior F1 na curva precisão-revocação, como no notebook."""
+    precisao, revocacao, thresholds = precision_recall_curve(y_teste, y_proba)
+    f1s = 2 * precisao * revocacao / np.clip(precisao + revocacao, 1e-9, None)
+    indice = int(np.argmax(f1s))
+    return float(thresholds[indice]) if indice < len(thresholds) else 0.5
+
+
+def treinar(caminho_csv, algoritmo='gb', busca='halving', cv=5, n_jobs=-1, random_state=42, faixas_risco=None):
+    """
+    Executa a busca de hiperparâmetros e devolve (modelo, meta) no formato lido pelo
+    ModeloPredicaoService, com o tempo de parede de cada etapa em meta['training_time_seconds'].
+    """
+    inicio = time.perf_counter()
+    X, y = carregar_dataset(caminho_csv)
+    X_treino, X_teste, y_treino, y_teste = dividir(X, y, random_state)
+
+    with tempfile.TemporaryDirectory(prefix='treino_cache_') as cache:
+        memoria = joblib.Memory(location=cache, verbose=0)
+        estimador = criar_pipeline(algoritmo, random_state, memoria)
+        parametros = dict(estimator=estimador, param_grid=GRADES[algoritmo], cv=cv, scoring='roc_auc', n_jobs=n_jobs)
+
+        if busca == 'halving':
+            buscador = HalvingGridSearchCV(factor=3, random_state=random_state, **parametros)
+        else:
+            buscador = GridSearchCV(**parametros)
+
+        inicio_busca = time.perf_counter()
+        buscador.fit(X_treino, y_treino)
+        tempo_busca = time.perf_counter() - inicio_busca
+
+        # o modelo salvo não pode depender do diretório temporário de cache
+        modelo = buscador.best_estimator_
+        modelo.set_params(memory=None)
+
+    y_proba = modelo.predict_proba(X_teste)[:, 1]
+    y_pred = modelo.predict(X_teste)
+
+    meta = {
+        'model_file': NOME_MODELO,
+        'features_expected': FEATURES,
+        'metrics': calcular_metricas(y_teste, y_pred, y_proba),
+        'best_threshold': melhor_threshold(y_teste, y_proba),
+        'risk_bands': faixas_risco or {'low': 0.3, 'high': 0.7},
+        'training': {
+            'algorithm': algoritmo,
+            'search': busca,
+            'cv_folds': cv,
+            'best_params': {k.replace('classifier__', ''): v for k, v in buscador.best_params_.items()},
+            'cv_best_auc': float(buscador.best_score_),
+            'n_train': int(len(X_treino)),
+            'n_test': int(len(X_teste)),
+        },
+        'training_time_seconds': {
+            'search': round(tempo_busca, 2),
+            'total': round(time.perf_counter() - inicio, 2),
+        },
+    }
+    return modelo, meta
+
+
+def salvar(modelo, meta, diretorio):
+    """Grava o par modelo + meta; cada arquivo é escrito em um temporário e renomeado."""
+    os.makedirs(diretorio, exist_ok=True)
+    caminho_modelo = os.path.join(diretorio, NOME_MODELO)
+    caminho_meta = os.path.join(diretorio, NOME_META)
+
+    joblib.dump(modelo, caminho_modelo + '.tmp')
+    with open(caminho_meta + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=2, default=_json_padrao)
+
+    os.replace(caminho_modelo + '.tmp', caminho_modelo)
+    os.replace(caminho_meta + '.tmp', caminho_meta)
+    return caminho_modelo, caminho_meta
+
+
+def _json_padrao(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f'{type(valor).__name__} não é serializável em JSON')
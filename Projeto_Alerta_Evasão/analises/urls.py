@@ -6,4 +6,10 @@ urlpatterns = [
     path('remover_todas_analises/', views.limpar_predicoes, name='remover_todas_analises'),
     path('listar_todas_analises/', views.listar_predicoes, name='listar_todas_analises'),
     path('gerar_relatorio_analises/', views.gerar_relatorio_das_analises, name='gerar_relatorio_analises'),
+    path('distribuicao_probabilidades/', views.distribuicao_probabilidades, name='distribuicao_probabilidades'),
+    path('estudantes_em_risco/', views.estudantes_em_risco, name='estudantes_em_risco'),
+    path('drift_features/', views.drift_features, name='drift_features'),
+    path('tendencia_risco/', views.tendencia_risco, name='tendencia_risco'),
+    path('snapshot_features/', views.metricas_snapshot, name='snapshot_features'),
+    path('modelos_campi/', views.metricas_modelos, name='modelos_campi'),
 ]
\ No newline at end of file
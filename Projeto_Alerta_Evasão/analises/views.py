@@ -1,12 +1,26 @@
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema, OpenApiExample
-from estudantes.models import Estudante
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from estudantes.models import Estudante, VersaoRecurso
+from estudantes.filtros import ler_filtros
+from estudantes.versionamento import resposta_condicional
 from analises.models import PredicaoEvasao
 from .serializers import PredicaoEvasaoSerializer
+from app.admissao import admissao
+from app.serializacao_rapida import serializar_rapido
 from .services import modelo_service
+from .distribuicao import calcular_distribuicao
+from .drift import calcular_drift
+from .snapshot import snapshot_features
+from .tendencia import calcular_tendencia, remover_predicoes, DIAS_PADRAO, DIAS_MAXIMO
+from .execucao import executar_analise_unica, AnaliseEmAndamento
+from .ranking import listar_estudantes_em_risco, TokenContinuacaoInvalido
+from datetime import date, timedelta
+from django.db import transaction
 from django.db.models import Avg
+from django.utils import timezone
 
 @extend_schema(
     summary='Analisar evasão para todos os estudantes',
@@ -22,6 +36,11 @@ from django.db.models import Avg
     3. Aplica o modelo ML para cada estudante
     4. Salva as predições no banco de dados
     5. Retorna relatório detalhado do processamento
+    
+    **Execução única:** apenas uma análise roda por vez. Chamadas feitas durante uma execução
+    aguardam o seu término e recebem o mesmo resultado (cabeçalho `X-Execucao-Reaproveitada: true`).
+    Com `ANALISE_INTERVALO_MINIMO_SEGUNDOS` configurado, chamadas repetidas dentro desse intervalo
+    devolvem o resultado da última execução sem processar novamente.
     ''',
     request=None,
     responses={
@@ -66,7 +85,9 @@ from django.db.models import Avg
             }
         },
         400: 'Nenhum estudante cadastrado no sistema',
-        500: 'Erro interno do servidor ou do modelo ML'
+        429: 'Este cliente já tem uma chamada da análise aguardando',
+        500: 'Erro interno do servidor ou do modelo ML',
+        503: 'Servidor ocupado (fila de espera cheia ou tempo de espera esgotado) ou análise em andamento não terminou dentro do tempo máximo de espera'
     },
     tags=['Análises de Evasão'],
     examples=[
@@ -98,59 +119,24 @@ from django.db.models import Avg
     ]
 )
 @api_view(['POST'])
+@admissao('analise')
 def analise_evasao_todos_estudantes(request):
-    estudantes = Estudante.objects.all()
-
-    if not estudantes.exists():
+    if not Estudante.objects.exists():
         return Response({
             'erro' : 'Nenhum estudante cadastrado'
         }, status=400)
-    
-    predicoes_criadas = []
-    predicoes_com_erro = []
-    
-    for estudante in estudantes:
-        if PredicaoEvasao.objects.filter(estudante=estudante).exists():
-            continue
-        
-        try:
-            resultado = modelo_service.prever_evasao_estudante(estudante)
-
-            predicao = PredicaoEvasao.objects.create(
-                estudante = estudante,
-                probabilidade = resultado['probabilidade'],
-                previsao = resultado['previsao'],
-                nivel_risco = resultado['nivel_risco']
-            )
-
-            predicoes_criadas.append({
-                'estudante_id': estudante.id,
-                'matricula_estudante': estudante.matricula,
-                'previsao': resultado['previsao'],
-                'nivel_risco': resultado['nivel_risco'],
-                'probabilidade': f"{resultado['probabilidade']:.2%}"
-            })
-
-        except Exception as ex:
-            predicoes_com_erro.append({
-                'estudante_id': estudante.id,
-                'erro' : str(ex) 
-            })
-            continue
-
-    if len(predicoes_criadas) == 0:
-        return Response({
-            'mensagem': 'Nenhuma predição foi realizada, pois todos os alunos já possuem predições cadastradas ou não há alunos disponíveis'
-        })
-    else:
+
+    try:
+        execucao, reaproveitada = executar_analise_unica()
+    except AnaliseEmAndamento:
         return Response({
-            'mensagem': f'{len(predicoes_criadas)} predições criadas',
-            'total_alunos_analisados': estudantes.count(),
-            'predicoes_criadas': len(predicoes_criadas),
-            'predicoes_com_erro': len(predicoes_com_erro),
-            'detalhes_predicoes': predicoes_criadas,
-            'erros': predicoes_com_erro if predicoes_com_erro else None
-        })
+            'erro': 'Uma análise ainda está em andamento, tente novamente em instantes'
+        }, status=503, headers={'Retry-After': '30'})
+
+    return Response(execucao.resultado, headers={
+        'X-Execucao-Analise': str(execucao.id),
+        'X-Execucao-Reaproveitada': 'true' if reaproveitada else 'false',
+    })
 
 @extend_schema(
     summary='Listar todas as predições de evasão',
@@ -160,10 +146,17 @@ def analise_evasao_todos_estudantes(request):
     
     Cada predição inclui informações do estudante, resultado da análise ML,
     probabilidade calculada e nível de risco atribuído.
+    
+    **Formatos:** JSON (padrão), MessagePack (`Accept: application/msgpack` ou `?format=msgpack`)
+    e colunar, com um array por campo (`Accept: application/vnd.observatorio.colunar+json`
+    ou `?format=colunar`).
     ''',
     responses={
         200: PredicaoEvasaoSerializer(many=True),
-        404: 'Nenhuma predição encontrada'
+        304: 'Predições e estudantes inalterados desde o ETag/data informados em If-None-Match/If-Modified-Since',
+        404: 'Nenhuma predição encontrada',
+        429: 'Limite de requisições simultâneas deste cliente atingido',
+        503: 'Servidor ocupado: fila de espera cheia ou tempo de espera esgotado'
     },
     tags=['Análises de Evasão'],
     examples=[
@@ -186,13 +179,14 @@ def analise_evasao_todos_estudantes(request):
         )
     ]
 )
+# cada predição embute os dados do estudante: a resposta muda também quando ele é editado
+@resposta_condicional('estudantes', 'predicoes')
 @api_view(['GET'])
+@admissao('relatorios')
 def listar_predicoes(request):
     predicoes = PredicaoEvasao.objects.all().order_by('-data_predicao')
-       
-    serializer = PredicaoEvasaoSerializer(predicoes, many=True)
     
-    return Response(serializer.data)
+    return Response(serializar_rapido(predicoes, PredicaoEvasaoSerializer))
 
 
 @extend_schema(
@@ -217,7 +211,9 @@ def listar_predicoes(request):
                     'description': 'Número total de estudantes que permaneceram no sistema'
                 }
             }
-        }
+        },
+        429: 'Limite de requisições simultâneas deste cliente atingido',
+        503: 'Servidor ocupado: fila de espera cheia ou tempo de espera esgotado'
     },
     tags=['Análises de Evasão'],
     examples=[
@@ -231,10 +227,14 @@ def listar_predicoes(request):
     ]
 )
 @api_view(['DELETE'])
+@admissao('relatorios')
 def limpar_predicoes(request):
     
-    total_removidas = PredicaoEvasao.objects.count()
-    PredicaoEvasao.objects.all().delete()
+    with transaction.atomic():
+        total_removidas = PredicaoEvasao.objects.count()
+        remover_predicoes(PredicaoEvasao.objects.filter(mais_recente=True))
+        PredicaoEvasao.objects.all().delete()
+    VersaoRecurso.incrementar('predicoes')
     
     return Response({
         'mensagem': f'{total_removidas} predições removidas',
@@ -253,6 +253,10 @@ def limpar_predicoes(request):
     - Métricas como probabilidade média de evasão
     
     Ideal para análises gerenciais e tomada de decisões institucionais.
+
+    Um estudante reavaliado tem várias predições: `total_analises_realizadas` conta todas elas,
+    enquanto a distribuição de risco, as previsões e a probabilidade média consideram só a
+    predição vigente (a mais recente) de cada estudante.
     ''',
     request=None,
     responses={
@@ -295,7 +299,10 @@ def limpar_predicoes(request):
                     }
                 }
             }
-        }
+        },
+        304: 'Relatório inalterado desde o ETag/data informados em If-None-Match/If-Modified-Since',
+        429: 'Limite de requisições simultâneas deste cliente atingido',
+        503: 'Servidor ocupado: fila de espera cheia ou tempo de espera esgotado'
     },
     tags=['Relatórios'],
     examples=[
@@ -326,22 +333,28 @@ def limpar_predicoes(request):
         )
     ]
 )
+@resposta_condicional('estudantes', 'predicoes')
 @api_view(['GET'])
+@admissao('relatorios')
 def gerar_relatorio_das_analises(request):
     total_alunos = Estudante.objects.count()
     total_predicoes = PredicaoEvasao.objects.count()
 
-    risco_alto = PredicaoEvasao.objects.filter(nivel_risco='Alto').count()
-    risco_medio = PredicaoEvasao.objects.filter(nivel_risco='Médio').count()
-    risco_baixo = PredicaoEvasao.objects.filter(nivel_risco='Baixo').count()
+    # predições substituídas por reavaliações ficam no histórico, fora dos totais de risco
+    vigentes = PredicaoEvasao.objects.filter(mais_recente=True)
+
+    risco_alto = vigentes.filter(nivel_risco='Alto').count()
+    risco_medio = vigentes.filter(nivel_risco='Médio').count()
+    risco_baixo = vigentes.filter(nivel_risco='Baixo').count()
 
-    previsao_evasao = PredicaoEvasao.objects.filter(previsao='Evasão').count()
-    previsao_nao_evasao = PredicaoEvasao.objects.filter(previsao='Não evasão').count()
+    previsao_evasao = vigentes.filter(previsao='Evasão').count()
+    previsao_nao_evasao = vigentes.filter(previsao='Não evasão').count()
 
-    alunos_analisados = PredicaoEvasao.objects.values('estudante').distinct().count()
+    # uma predição vigente por estudante
+    alunos_analisados = vigentes.count()
     alunos_nao_analisados = total_alunos - alunos_analisados
 
-    probabilidade_media_evasao = PredicaoEvasao.objects.aggregate(Avg('probabilidade'))['probabilidade__avg']
+    probabilidade_media_evasao = vigentes.aggregate(Avg('probabilidade'))['probabilidade__avg']
 
     return Response({
         'mensagem': 'relatório criado com sucesso',
@@ -359,7 +372,7 @@ def gerar_relatorio_das_analises(request):
         'previsoes': {
             'evasao_prevista': previsao_evasao,
             'nao_evasao_prevista': previsao_nao_evasao,
-            'taxa_evasao_prevista': f"{(previsao_evasao/total_predicoes*100):.1f}%" if total_predicoes > 0 else "0%"
+            'taxa_evasao_prevista': f"{(previsao_evasao/alunos_analisados*100):.1f}%" if alunos_analisados > 0 else "0%"
         },
         'metricas': {
             'probabilidade_media_evasao': f"{probabilidade_media_evasao:.3f}" if probabilidade_media_evasao else "N/A"
@@ -367,3 +380,502 @@ def gerar_relatorio_das_analises(request):
     })
 
 
+@extend_schema(
+    summary='Histograma e quantis das probabilidades de evasão',
+    description='''
+    Retorna a distribuição das probabilidades de evasão já calculada no banco de dados,
+    sem listar as predições individualmente. Considera só a predição vigente (a mais recente)
+    de cada estudante.
+    
+    **A resposta inclui:**
+    - Contagem de predições por faixa de probabilidade (faixas de mesma largura entre 0 e 1)
+    - Quantis p10, p50, p90 e p99
+    - Limites das bandas de risco e o threshold de decisão do modelo, para sobreposição no gráfico
+    
+    O tamanho da resposta depende apenas do número de faixas, não da quantidade de predições.
+    ''',
+    parameters=[
+        OpenApiParameter(
+            name='faixas',
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description='Número de faixas do histograma (1 a 100, padrão 10)'
+        )
+    ],
+    responses={
+        200: {
+            'type': 'object',
+            'properties': {
+                'total': {'type': 'integer', 'description': 'Total de predições consideradas'},
+                'faixas': {'type': 'integer', 'description': 'Número de faixas do histograma'},
+                'largura_faixa': {'type': 'number', 'description': 'Largura de cada faixa de probabilidade'},
+                'contagens': {
+                    'type': 'array',
+                    'items': {'type': 'integer'},
+                    'description': 'Quantidade de predições em cada faixa, da menor para a maior probabilidade'
+                },
+                'quantis': {
+                    'type': 'object',
+                    'properties': {
+                        'p10': {'type': 'number', 'nullable': True},
+                        'p50': {'type': 'number', 'nullable': True},
+                        'p90': {'type': 'number', 'nullable': True},
+                        'p99': {'type': 'number', 'nullable': True}
+                    }
+                },
+                'limites': {
+                    'type': 'object',
+                    'properties': {
+                        'risco_medio': {'type': 'number', 'description': 'Início da banda de risco médio'},
+                        'risco_alto': {'type': 'number', 'description': 'Início da banda de risco alto'},
+                        'threshold_evasao': {'type': 'number', 'description': 'Probabilidade a partir da qual a previsão é Evasão'}
+                    }
+                }
+            }
+        },
+        400: 'Número de faixas inválido',
+        429: 'Limite de requisições simultâneas deste cliente atingido',
+        503: 'Servidor ocupado: fila de espera cheia ou tempo de espera esgotado'
+    },
+    tags=['Relatórios'],
+    examples=[
+        OpenApiExample(
+            'Distribuição com 10 faixas',
+            value={
+                'total': 180,
+                'faixas': 10,
+                'largura_faixa': 0.1,
+                'contagens': [40, 22, 15, 12, 10, 9, 11, 14, 20, 27],
+                'quantis': {'p10': 0.021, 'p50': 0.318, 'p90': 0.912, 'p99': 0.987},
+                'limites': {'risco_medio': 0.3, 'risco_alto': 0.7, 'threshold_evasao': 0.6102}
+            }
+        )
+    ]
+)
+@api_view(['GET'])
+@admissao('relatorios')
+def distribuicao_probabilidades(request):
+    try:
+        faixas = int(request.query_params.get('faixas', 10))
+    except ValueError:
+        faixas = 0
+
+    if not 1 <= faixas <= 100:
+        return Response({
+            'erro': 'O parâmetro faixas deve ser um inteiro entre 1 e 100'
+        }, status=400)
+
+    distribuicao = calcular_distribuicao(faixas)
+    meta = modelo_service.meta
+
+    return Response({
+        'total': distribuicao['total'],
+        'faixas': faixas,
+        'largura_faixa': 1 / faixas,
+        'contagens': distribuicao['contagens'],
+        'quantis': distribuicao['quantis'],
+        'limites': {
+            'risco_medio': meta['risk_bands']['low'],
+            'risco_alto': meta['risk_bands']['high'],
+            'threshold_evasao': meta['best_threshold']
+        }
+    })
+
+
+def _ler_filtros_ranking(params):
+    filtros = {}
+
+    if 'nivel_risco' in params:
+        if params['nivel_risco'] not in ('Alto', 'Médio', 'Baixo'):
+            raise ValueError('nivel_risco deve ser Alto, Médio ou Baixo')
+        filtros['nivel_risco'] = params['nivel_risco']
+
+    filtros.update(ler_filtros(params, campos=('turno_aulas', 'bolsista', 'genero')))
+    return filtros
+
+
+@extend_schema(
+    summary='Listar estudantes com maior risco de evasão',
+    description='''
+    Retorna os estudantes ordenados pela probabilidade de evasão da sua predição mais recente,
+    do maior para o menor risco, para montar listas de acompanhamento.
+    
+    **Filtros opcionais:** nível de risco, turno, bolsista e gênero.
+    
+    **Paginação:** cada resposta traz `proxima_pagina`; envie esse valor no parâmetro
+    `continuacao` para obter a página seguinte. Quando `proxima_pagina` é nulo, a lista terminou.
+    ''',
+    parameters=[
+        OpenApiParameter(name='limite', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False,
+                         description='Quantidade de estudantes por página (1 a 500, padrão 50)'),
+        OpenApiParameter(name='nivel_risco', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False,
+                         enum=['Alto', 'Médio', 'Baixo'], description='Nível de risco da predição mais recente'),
+        OpenApiParameter(name='turno_aulas', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False,
+                         enum=[0, 1], description='0 = Noturno, 1 = Diurno'),
+        OpenApiParameter(name='bolsista', type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY, required=False,
+                         description='Filtra bolsistas ou não bolsistas'),
+        OpenApiParameter(name='genero', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False,
+                         enum=[0, 1], description='0 = Feminino, 1 = Masculino'),
+        OpenApiParameter(name='continuacao', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False,
+                         description='Token `proxima_pagina` da resposta anterior'),
+    ],
+    responses={
+        200: {
+            'type': 'object',
+            'properties': {
+                'resultados': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'estudante_id': {'type': 'integer'},
+                            'matricula': {'type': 'string'},
+                            'probabilidade': {'type': 'number'},
+                            'nivel_risco': {'type': 'string', 'enum': ['Alto', 'Médio', 'Baixo']},
+                            'previsao': {'type': 'string', 'enum': ['Evasão', 'Não evasão']},
+                            'turno_aulas': {'type': 'integer'},
+                            'bolsista': {'type': 'boolean'},
+                            'genero': {'type': 'integer'},
+                            'data_predicao': {'type': 'string', 'format': 'date-time'}
+                        }
+                    }
+                },
+                'proxima_pagina': {'type': 'string', 'nullable': True}
+            }
+        },
+        400: 'Filtros, limite ou token de continuação inválidos',
+        429: 'Limite de requisições simultâneas deste cliente atingido',
+        503: 'Servidor ocupado: fila de espera cheia ou tempo de espera esgotado'
+    },
+    tags=['Análises de Evasão'],
+    examples=[
+        OpenApiExample(
+            'Bolsistas do noturno com maior risco',
+            value={
+                'resultados': [
+                    {
+                        'estudante_id': 12,
+                        'matricula': '202401012',
+                        'probabilidade': 0.934,
+                        'nivel_risco': 'Alto',
+                        'previsao': 'Evasão',
+                        'turno_aulas': 0,
+                        'bolsista': True,
+                        'genero': 1,
+                        'data_predicao': '2025-08-10T14:30:00Z'
+                    }
+                ],
+                'proxima_pagina': 'WzAuOTM0LDE3XQ'
+            }
+        )
+    ]
+)
+@api_view(['GET'])
+@admissao('relatorios')
+def estudantes_em_risco(request):
+    try:
+        limite = int(request.query_params.get('limite', 50))
+    except ValueError:
+        limite = 0
+
+    if not 1 <= limite <= 500:
+        return Response({
+            'erro': 'O parâmetro limite deve ser um inteiro entre 1 e 500'
+        }, status=400)
+
+    try:
+        filtros = _ler_filtros_ranking(request.query_params)
+        resultados, proxima = listar_estudantes_em_risco(
+            filtros, limite, request.query_params.get('continuacao')
+        )
+    except (ValueError, TokenContinuacaoInvalido) as ex:
+        return Response({'erro': str(ex)}, status=400)
+
+    return Response({
+        'resultados': resultados,
+        'proxima_pagina': proxima
+    })
+
+
+@extend_schema(
+    summary='Drift das features dos estudantes em relação ao treino',
+    description='''
+    Compara a distribuição atual das 11 features usadas pelo modelo, calculada a partir dos
+    estudantes cadastrados, com a distribuição do dataset de treino.
+    
+    O resumo dos estudantes é mantido de forma incremental a cada inclusão, alteração ou remoção,
+    então o custo deste endpoint não depende da quantidade de estudantes.
+    
+    **Métricas por feature:**
+    - PSI (Population Stability Index): abaixo de 0.1 estável, entre 0.1 e 0.25 moderado, acima de 0.25 significativo
+    - KS calculado sobre as faixas do histograma (maior diferença entre as distribuições acumuladas)
+    - Média e desvio padrão na referência e na produção
+    
+    Para reconstruir a referência ou o resumo, use `manage.py monitor_drift`.
+    ''',
+    request=None,
+    responses={
+        200: {
+            'type': 'object',
+            'properties': {
+                'total_producao': {'type': 'integer', 'description': 'Estudantes considerados no resumo'},
+                'referencia_gerada_em': {'type': 'string', 'format': 'date-time'},
+                'atualizado_em': {'type': 'string', 'format': 'date-time', 'nullable': True},
+                'features': {
+                    'type': 'object',
+                    'additionalProperties': {
+                        'type': 'object',
+                        'properties': {
+                            'campo_estudante': {'type': 'string'},
+                            'media_referencia': {'type': 'number'},
+                            'desvio_referencia': {'type': 'number'},
+                            'media_producao': {'type': 'number', 'nullable': True},
+                            'desvio_producao': {'type': 'number', 'nullable': True},
+                            'psi': {'type': 'number', 'nullable': True},
+                            'ks': {'type': 'number', 'nullable': True},
+                            'situacao': {
+                                'type': 'string',
+                                'enum': ['estável', 'moderado', 'significativo', 'sem dados', 'resumo desatualizado']
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        500: 'Referência de drift não encontrada'
+    },
+    tags=['Relatórios'],
+    examples=[
+        OpenApiExample(
+            'Drift por feature',
+            value={
+                'total_producao': 200,
+                'referencia_gerada_em': '2025-08-10T14:30:00+00:00',
+                'atualizado_em': '2025-08-12T09:12:00Z',
+                'features': {
+                    'Age at enrollment': {
+                        'campo_estudante': 'idade_ingresso',
+                        'media_referencia': 23.4763,
+                        'desvio_referencia': 7.6572,
+                        'media_producao': 21.37,
+                        'desvio_producao': 4.102,
+                        'psi': 0.0812,
+                        'ks': 0.0931,
+                        'situacao': 'estável'
+                    }
+                }
+            }
+        )
+    ]
+)
+@api_view(['GET'])
+def drift_features(request):
+    try:
+        return Response(calcular_drift())
+    except FileNotFoundError as ex:
+        return Response({'erro': str(ex)}, status=500)
+
+
+@extend_schema(
+    summary='Métricas do snapshot de features',
+    description='''
+    Estado do snapshot colunar das features dos estudantes mantido em memória por este processo
+    e usado pela análise em lote.
+
+    **Retorna:**
+    - Linhas, capacidade e memória ocupada (e o limite de SNAPSHOT_MEMORIA_MAXIMA_MB)
+    - Quantidade e latência (média, última e máxima, em ms) das leituras, das atualizações
+      incrementais a partir do log de alterações e das recargas completas
+
+    Cada processo do servidor tem o seu snapshot; os números são do processo que atendeu.
+    ''',
+    responses={
+        200: {
+            'type': 'object',
+            'properties': {
+                'linhas': {'type': 'integer'},
+                'capacidade': {'type': 'integer'},
+                'memoria_bytes': {'type': 'integer'},
+                'memoria_maxima_bytes': {'type': 'integer'},
+                'carregado_em': {'type': 'string', 'format': 'date-time', 'nullable': True},
+                'verificado_em': {'type': 'string', 'format': 'date-time', 'nullable': True},
+                'leituras': {'type': 'object'},
+                'atualizacoes_incrementais': {'type': 'object'},
+                'linhas_atualizadas': {'type': 'integer'},
+                'recargas_completas': {'type': 'object'}
+            }
+        }
+    },
+    tags=['Relatórios'],
+    examples=[
+        OpenApiExample(
+            'Snapshot carregado',
+            value={
+                'linhas': 3630,
+                'capacidade': 3630,
+                'memoria_bytes': 348480,
+                'memoria_maxima_bytes': 67108864,
+                'carregado_em': '2025-08-12T09:00:00Z',
+                'verificado_em': '2025-08-12T09:12:00Z',
+                'leituras': {'quantidade': 12, 'media_ms': 1.84, 'ultima_ms': 0.91, 'maxima_ms': 3.2},
+                'atualizacoes_incrementais': {'quantidade': 3, 'media_ms': 2.1, 'ultima_ms': 1.7, 'maxima_ms': 2.9},
+                'linhas_atualizadas': 5,
+                'recargas_completas': {'quantidade': 1, 'media_ms': 48.3, 'ultima_ms': 48.3, 'maxima_ms': 48.3}
+            }
+        )
+    ]
+)
+@api_view(['GET'])
+def metricas_snapshot(request):
+    return Response(snapshot_features.metricas())
+
+
+@extend_schema(
+    summary='Métricas do cache de modelos por campus',
+    description='''
+    Estado do cache LRU dos modelos por campus deste processo.
+
+    **Retorna:**
+    - Campi com modelo em memória (do menos para o mais usado) e campi sem modelo próprio já consultados
+    - Memória ocupada e o limite de MODELOS_MEMORIA_MAXIMA_MB
+    - Acertos, carregamentos do disco e descartes por falta de memória
+
+    Cada processo do servidor tem o seu cache; os números são do processo que atendeu.
+    ''',
+    responses={
+        200: {
+            'type': 'object',
+            'properties': {
+                'campi_carregados': {'type': 'array', 'items': {'type': 'string'}},
+                'campi_sem_modelo': {'type': 'array', 'items': {'type': 'string'}},
+                'memoria_bytes': {'type': 'integer'},
+                'memoria_maxima_bytes': {'type': 'integer'},
+                'acertos': {'type': 'integer'},
+                'carregamentos': {'type': 'integer'},
+                'descartes': {'type': 'integer'}
+            }
+        }
+    },
+    tags=['Relatórios'],
+    examples=[
+        OpenApiExample(
+            'Cache com dois campi',
+            value={
+                'campi_carregados': ['sul', 'norte'],
+                'campi_sem_modelo': ['leste'],
+                'memoria_bytes': 1843200,
+                'memoria_maxima_bytes': 536870912,
+                'acertos': 418,
+                'carregamentos': 2,
+                'descartes': 0
+            }
+        )
+    ]
+)
+@api_view(['GET'])
+def metricas_modelos(request):
+    return Response(modelo_service.modelos_campi.metricas())
+
+
+@extend_schema(
+    summary='Tendência diária do risco de evasão',
+    description='''
+    Série diária dos totais das predições vigentes: quantidade por nível de risco e por previsão,
+    probabilidade média e quantos estudantes foram avaliados em cada dia.
+
+    Os números vêm de um rollup diário atualizado junto com as predições, então o custo depende
+    da quantidade de dias pedida, não do histórico de predições. Dias sem alterações repetem os
+    totais do dia anterior. Para reconstruir o rollup a partir do histórico, use
+    `manage.py reconstruir_tendencia`.
+    ''',
+    parameters=[
+        OpenApiParameter(name='inicio', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY, required=False,
+                         description=f'Primeiro dia da série (padrão: {DIAS_PADRAO} dias antes do fim)'),
+        OpenApiParameter(name='fim', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY, required=False,
+                         description='Último dia da série (padrão: hoje)'),
+    ],
+    responses={
+        200: {
+            'type': 'object',
+            'properties': {
+                'inicio': {'type': 'string', 'format': 'date'},
+                'fim': {'type': 'string', 'format': 'date'},
+                'dias': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'data': {'type': 'string', 'format': 'date'},
+                            'risco_alto': {'type': 'integer'},
+                            'risco_medio': {'type': 'integer'},
+                            'risco_baixo': {'type': 'integer'},
+                            'total_vigentes': {'type': 'integer'},
+                            'evasao_prevista': {'type': 'integer'},
+                            'nao_evasao_prevista': {'type': 'integer'},
+                            'probabilidade_media': {'type': 'number', 'nullable': True},
+                            'estudantes_avaliados': {'type': 'integer', 'description': 'Predições gravadas no dia'}
+                        }
+                    }
+                }
+            }
+        },
+        400: f'Datas inválidas ou período maior que {DIAS_MAXIMO} dias'
+    },
+    tags=['Relatórios'],
+    examples=[
+        OpenApiExample(
+            'Dois dias de tendência',
+            value={
+                'inicio': '2025-08-11',
+                'fim': '2025-08-12',
+                'dias': [
+                    {
+                        'data': '2025-08-11',
+                        'risco_alto': 45,
+                        'risco_medio': 90,
+                        'risco_baixo': 45,
+                        'total_vigentes': 180,
+                        'evasao_prevista': 50,
+                        'nao_evasao_prevista': 130,
+                        'probabilidade_media': 0.342,
+                        'estudantes_avaliados': 180
+                    },
+                    {
+                        'data': '2025-08-12',
+                        'risco_alto': 48,
+                        'risco_medio': 88,
+                        'risco_baixo': 44,
+                        'total_vigentes': 180,
+                        'evasao_prevista': 53,
+                        'nao_evasao_prevista': 127,
+                        'probabilidade_media': 0.351,
+                        'estudantes_avaliados': 20
+                    }
+                ]
+            }
+        )
+    ]
+)
+@api_view(['GET'])
+def tendencia_risco(request):
+    try:
+        fim = date.fromisoformat(request.query_params.get('fim') or timezone.localdate().isoformat())
+        inicio = date.fromisoformat(
+            request.query_params.get('inicio') or (fim - timedelta(days=DIAS_PADRAO - 1)).isoformat()
+        )
+    except ValueError:
+        return Response({
+            'erro': 'Os parâmetros inicio e fim devem ser datas no formato AAAA-MM-DD'
+        }, status=400)
+
+    if not 1 <= (fim - inicio).days + 1 <= DIAS_MAXIMO:
+        return Response({
+            'erro': f'O período deve ter entre 1 e {DIAS_MAXIMO} dias, com inicio antes de fim'
+        }, status=400)
+
+    return Response({
+        'inicio': inicio.isoformat(),
+        'fim': fim.isoformat(),
+        'dias': calcular_tendencia(inicio, fim)
+    })
@@ -0,0 +1,120 @@
+import hashlib
+import math
+import os
+import random
+import time
+from functools import wraps
+from django.conf import settings
+from django.http import JsonResponse
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INTERVALO_ESPERA = 0.05
+
+
+class Vagas:
+    """
+    Conjunto de vagas compartilhado pelos processos do host: cada vaga é um arquivo e ocupá-la é
+    obter um flock exclusivo sobre ele. O sistema libera as vagas de um processo que morre.
+    """
+
+    def __init__(self, prefixo, quantidade):
+        self.prefixo = prefixo
+        self.quantidade = quantidade
+
+    def ocupar(self):
+        """Tenta ocupar uma vaga sem esperar; devolve o descritor do arquivo ou None."""
+        diretorio = settings.ADMISSAO_DIRETORIO
+        os.makedirs(diretorio, exist_ok=True)
+
+        # começar de uma vaga aleatória evita que todos disputem sempre o mesmo arquivo
+        inicio = random.randrange(self.quantidade) if self.quantidade else 0
+        for i in range(self.quantidade):
+            caminho = os.path.join(diretorio, f'{self.prefixo}-{(inicio + i) % self.quantidade}.lock')
+            fd = os.open(caminho, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            return fd
+        return None
+
+
+def liberar(fd):
+    if fd is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _cliente(request):
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return f'usuario:{usuario.pk}'
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def chave_cliente(request):
+    # o hash do identificador completo serve de nome de arquivo: clientes distintos não
+    # compartilham vagas (um hash curto faria clientes sem relação receberem 429 uns pelos outros)
+    return hashlib.sha256(_cliente(request).encode()).hexdigest()
+
+
+def _recusar(status, mensagem, espera):
+    response = JsonResponse({'erro': mensagem}, status=status)
+    response['Retry-After'] = str(max(1, math.ceil(espera)))
+    return response
+
+
+def admissao(classe):
+    """
+    Decorator de controle de admissão. Cada `classe` de ADMISSAO_LIMITES agrupa views de custo
+    parecido e tem um limite de requisições simultâneas por cliente e outro global.
+
+    - cliente já no seu limite: 429 imediato;
+    - limite global atingido: a requisição aguarda em uma fila de tamanho limitado por até
+      `espera_segundos`; com a fila cheia ou a espera esgotada, 503.
+
+    As respostas recusadas trazem Retry-After. Sem fcntl (Windows), não há limitação.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if fcntl is None:
+                return view(request, *args, **kwargs)
+
+            limites = settings.ADMISSAO_LIMITES[classe]
+            espera = limites['espera_segundos']
+
+            vaga_cliente = Vagas(f'{classe}-cliente-{chave_cliente(request)}', limites['por_cliente']).ocupar()
+            if vaga_cliente is None:
+                return _recusar(429, 'Limite de requisições simultâneas deste cliente atingido', espera)
+
+            vaga = None
+            try:
+                globais = Vagas(f'{classe}-global', limites['global'])
+                vaga = globais.ocupar()
+                if vaga is None:
+                    lugar_fila = Vagas(f'{classe}-fila', limites['fila']).ocupar()
+                    if lugar_fila is None:
+                        return _recusar(503, 'Servidor ocupado: fila de espera cheia', espera)
+                    try:
+                        limite_espera = time.monotonic() + espera
+                        while vaga is None and time.monotonic() < limite_espera:
+                            time.sleep(INTERVALO_ESPERA)
+                            vaga = globais.ocupar()
+                    finally:
+                        liberar(lugar_fila)
+                    if vaga is None:
+                        return _recusar(503, 'Servidor ocupado: tempo de espera esgotado', espera)
+
+                return view(request, *args, **kwargs)
+            finally:
+                liberar(vaga)
+                liberar(vaga_cliente)
+
+        return wrapper
+    return decorator
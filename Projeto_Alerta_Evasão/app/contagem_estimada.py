@@ -0,0 +1,49 @@
+import json
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def contagem_estimada(queryset):
+    """
+    Estimativa do número de linhas de `queryset` pelas estatísticas do PostgreSQL, sem COUNT(*):
+    reltuples do pg_class para a tabela inteira e a estimativa do planejador (EXPLAIN) para
+    consultas filtradas. Devolve None em outros bancos, sem estatísticas ou quando a estimativa
+    fica abaixo de ADMIN_CONTAGEM_EXATA_ATE, casos em que a contagem exata é barata.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            linha = cursor.fetchone()
+            estimativa = linha[0] if linha else -1
+        else:
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plano = cursor.fetchone()[0]
+            if isinstance(plano, str):
+                plano = json.loads(plano)
+            estimativa = int(plano[0]['Plan']['Plan Rows'])
+
+    # -1: tabela ainda não analisada pelo autovacuum
+    if estimativa < getattr(settings, 'ADMIN_CONTAGEM_EXATA_ATE', 10000):
+        return None
+    return estimativa
+
+
+class PaginadorEstimado(Paginator):
+    """Paginador do admin que usa `contagem_estimada` no lugar do COUNT(*) em tabelas grandes."""
+
+    @cached_property
+    def count(self):
+        estimativa = contagem_estimada(self.object_list) if hasattr(self.object_list, 'query') else None
+        if estimativa is None:
+            return super().count
+        return estimativa
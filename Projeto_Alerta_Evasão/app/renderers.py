@@ -0,0 +1,75 @@
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_encoder = JSONEncoder()
+
+
+class JSONRapidoRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer que usa o orjson quando disponível. A saída é a mesma do renderer padrão
+    (datas e Decimals passam pelo encoder do DRF); com indentação ou sem orjson, delega ao padrão.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if msgpack is None:
+            raise RuntimeError('msgpack não está instalado')
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+def _linhas_para_colunas(linhas):
+    if linhas and any(isinstance(valor, dict) for valor in linhas[0].values()):
+        linhas = [dict(_achatar(linha)) for linha in linhas]
+    campos = dict.fromkeys(campo for linha in linhas for campo in linha)
+    return {campo: [linha.get(campo) for linha in linhas] for campo in campos}
+
+
+def _achatar(linha, prefixo=''):
+    for campo, valor in linha.items():
+        if isinstance(valor, dict):
+            yield from _achatar(valor, f'{prefixo}{campo}.')
+        else:
+            yield f'{prefixo}{campo}', valor
+
+
+class ColunarRenderer(JSONRapidoRenderer):
+    """
+    Renderiza listas de objetos como um array por campo: {"total": n, "colunas": {"campo": [...]}}.
+    Objetos aninhados viram colunas com nome pontuado ("estudante_dados.matricula").
+    Respostas que não são listas de objetos saem como JSON comum.
+    """
+    media_type = 'application/vnd.observatorio.colunar+json'
+    format = 'colunar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list) and all(isinstance(linha, dict) for linha in data):
+            data = {'total': len(data), 'colunas': _linhas_para_colunas(data)}
+        return super().render(data, accepted_media_type, renderer_context)
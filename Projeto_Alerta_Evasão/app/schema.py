@@ -0,0 +1,79 @@
+import hashlib
+import json
+import threading
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+from django.views.decorators.vary import vary_on_headers
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+_trava = threading.Lock()
+_cache = {}
+
+
+def gerar_schema():
+    """Gera o schema OpenAPI da API em JSON (bytes), como o /api/schema/?format=json do drf-spectacular."""
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema, renderer_context={})
+
+
+def schema_atual():
+    """
+    Conteúdo em JSON (bytes) do schema pré-gerado por `manage.py gerar_schema`, lido uma vez por
+    processo. Se o arquivo não existir, o schema é gerado na primeira chamada.
+    """
+    with _trava:
+        if 'json' not in _cache:
+            caminho = settings.SCHEMA_OPENAPI_ARQUIVO
+            if caminho.exists():
+                _cache['json'] = caminho.read_bytes()
+            else:
+                _cache['json'] = gerar_schema()
+            _cache['etag'] = hashlib.sha256(_cache['json']).hexdigest()[:32]
+        return _cache['json']
+
+
+def _variante(request):
+    # o SpectacularAPIView responde YAML por padrão e JSON com ?format=json ou Accept com json
+    formato = request.GET.get('format')
+    if formato:
+        return 'json' if formato == 'json' else 'yaml'
+    return 'json' if 'json' in request.META.get('HTTP_ACCEPT', '') else 'yaml'
+
+
+def _conteudo(variante):
+    conteudo = schema_atual()
+    if variante == 'json':
+        return conteudo
+    with _trava:
+        if 'yaml' not in _cache:
+            _cache['yaml'] = OpenApiYamlRenderer().render(json.loads(conteudo), renderer_context={})
+        return _cache['yaml']
+
+
+def _etag(request):
+    schema_atual()
+    return f"{_cache['etag']}-{_variante(request)}"
+
+
+def limpar_cache():
+    with _trava:
+        _cache.clear()
+
+
+@vary_on_headers('Accept')
+@require_GET
+@condition(etag_func=_etag)
+def schema_pre_gerado(request):
+    """Serve o schema OpenAPI pré-gerado com ETag forte, sem introspecção das views a cada requisição."""
+    variante = _variante(request)
+    if variante == 'json':
+        content_type = f'{OpenApiJsonRenderer.media_type}; charset=utf-8'
+    else:
+        content_type = f'{OpenApiYamlRenderer.media_type}; charset=utf-8'
+
+    response = HttpResponse(_conteudo(variante), content_type=content_type)
+    patch_cache_control(response, no_cache=True)
+    return response
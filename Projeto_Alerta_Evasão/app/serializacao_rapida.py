@@ -0,0 +1,101 @@
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# campos cujo to_representation não altera o valor vindo do banco
+CAMPOS_DIRETOS = (
+    serializers.IntegerField,
+    serializers.FloatField,
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class SerializacaoNaoSuportada(Exception):
+    pass
+
+
+def _conversor_data_hora(campo):
+    """
+    Equivalente ao DateTimeField.to_representation para saída ISO 8601, resolvendo o fuso
+    horário uma vez por resposta em vez de uma vez por valor.
+    """
+    formato = getattr(campo, 'format', api_settings.DATETIME_FORMAT)
+    fuso = campo.timezone if hasattr(campo, 'timezone') else campo.default_timezone()
+    if formato is None or formato.lower() != ISO_8601 or fuso is None:
+        return campo.to_representation
+
+    def converter(valor):
+        if isinstance(valor, str) or not timezone.is_aware(valor):
+            return campo.to_representation(valor)
+        texto = valor.astimezone(fuso).isoformat()
+        return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+
+    return converter
+
+
+def _compilar(serializer, prefixo=''):
+    plano = []
+    for nome, campo in serializer.fields.items():
+        if campo.write_only:
+            continue
+        if campo.source == '*' or isinstance(campo, (serializers.ListSerializer, serializers.SerializerMethodField)):
+            raise SerializacaoNaoSuportada(nome)
+
+        caminho = prefixo + campo.source.replace('.', '__')
+
+        if isinstance(campo, serializers.Serializer):
+            plano.append((nome, _compilar(campo, caminho + '__'), None))
+        elif isinstance(campo, serializers.RelatedField) and not isinstance(campo, serializers.PrimaryKeyRelatedField):
+            raise SerializacaoNaoSuportada(nome)
+        else:
+            if isinstance(campo, CAMPOS_DIRETOS):
+                conversor = None
+            elif isinstance(campo, serializers.DateTimeField):
+                conversor = _conversor_data_hora(campo)
+            else:
+                conversor = campo.to_representation
+            plano.append((nome, caminho, conversor))
+    return plano
+
+
+def _caminhos(plano):
+    for _, caminho, _ in plano:
+        if isinstance(caminho, list):
+            yield from _caminhos(caminho)
+        else:
+            yield caminho
+
+
+def _montar(plano, valores):
+    linha = {}
+    for nome, caminho, conversor in plano:
+        if isinstance(caminho, list):
+            linha[nome] = _montar(caminho, valores)
+        else:
+            valor = next(valores)
+            linha[nome] = conversor(valor) if conversor is not None and valor is not None else valor
+    return linha
+
+
+def serializar_rapido(queryset, serializer_class):
+    """
+    Gera a mesma saída de `serializer_class(queryset, many=True).data` a partir de tuplas de
+    `values_list`, sem instanciar modelos nem um serializer por linha.
+
+    Os campos do serializer são inspecionados uma única vez; apenas campos simples,
+    chaves primárias de relações e serializers aninhados de um único objeto são suportados.
+    Para qualquer outro campo, cai no caminho normal do serializer.
+    """
+    try:
+        plano = _compilar(serializer_class())
+    except SerializacaoNaoSuportada:
+        return serializer_class(queryset, many=True).data
+
+    caminhos = list(_caminhos(plano))
+    return [
+        _montar(plano, iter(tupla))
+        for tupla in queryset.values_list(*caminhos)
+    ]
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -135,8 +136,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'app.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'app.renderers.MessagePackRenderer',
+        'app.renderers.ColunarRenderer',
+    ],
 }
 
+# Schema OpenAPI pré-gerado por `manage.py gerar_schema` e servido em /api/schema/
+SCHEMA_OPENAPI_ARQUIVO = BASE_DIR / 'app' / 'openapi.json'
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Observatório de Permanência API',
     'DESCRIPTION': 'API para predição de evasão usando ML',
@@ -178,6 +188,47 @@ CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = list(default_headers) + [
     "x-csrftoken",
     "content-type",
+    "if-none-match",
+    "if-modified-since",
 ]
 
-ALLOWED_HOSTS = ["localhost", "127.0.0.1", "[::1]"]
\ No newline at end of file
+CORS_EXPOSE_HEADERS = [
+    "etag",
+    "last-modified",
+    "retry-after",
+]
+
+ALLOWED_HOSTS = ["localhost", "127.0.0.1", "[::1]"]
+
+# Análise de todos os estudantes: reaproveita a última execução concluída há menos de N segundos
+# (0 desativa) e limita quanto tempo uma chamada espera a execução em andamento terminar
+ANALISE_INTERVALO_MINIMO_SEGUNDOS = 0
+ANALISE_ESPERA_MAXIMA_SEGUNDOS = 300
+
+# Snapshot colunar das features dos estudantes mantido em memória por processo: acima do
+# orçamento as análises voltam a ler pelo ORM; após a idade máxima o snapshot é recarregado
+SNAPSHOT_MEMORIA_MAXIMA_MB = 64
+SNAPSHOT_IDADE_MAXIMA_SEGUNDOS = 3600
+
+# Modelos próprios de cada campus (ml_model/campi/<campus>/) ficam em um cache LRU com este
+# orçamento, medido pelo tamanho dos arquivos .pkl; o modelo padrão fica fora do orçamento
+MODELOS_MEMORIA_MAXIMA_MB = 512
+
+# Changelists do admin (app/contagem_estimada.py): no PostgreSQL, acima deste número de linhas
+# estimado pelas estatísticas da tabela, a paginação usa a estimativa em vez de COUNT(*)
+ADMIN_CONTAGEM_EXATA_ATE = 10000
+
+# Controle de admissão (app/admissao.py): requisições simultâneas por cliente e no total, por
+# classe de custo, compartilhadas entre os processos do host por arquivos com flock em
+# ADMISSAO_DIRETORIO. Acima do limite global a requisição espera em uma fila limitada.
+ADMISSAO_DIRETORIO = os.path.join(tempfile.gettempdir(), 'observatorio_admissao')
+ADMISSAO_LIMITES = {
+    # relatórios, listagens e remoção de predições: agregações e varreduras no banco
+    'relatorios': {'global': 4, 'por_cliente': 2, 'fila': 16, 'espera_segundos': 10},
+    # CRUD de estudantes
+    'crud': {'global': 32, 'por_cliente': 8, 'fila': 64, 'espera_segundos': 5},
+    # análise de todos os estudantes: só uma execução roda por vez (ANALISE_*), mas quem chama
+    # durante uma execução ocupa uma thread esperando por ela; o limite global é o número
+    # máximo dessas threads
+    'analise': {'global': 8, 'por_cliente': 1, 'fila': 8, 'espera_segundos': 10},
+}
@@ -0,0 +1,217 @@
+"""
+Gerador de carga para a API do Observatório, usando apenas a biblioteca padrão.
+
+Simula, ao mesmo tempo e contra um servidor local:
+- dashboards que consultam o relatório periodicamente (com ETag, como o Dashboard_Evasao);
+- a secretaria cadastrando, consultando, alterando e removendo estudantes;
+- disparos periódicos da análise de todos os estudantes.
+
+Ao final imprime (ou grava com --saida) um JSON com p50/p95/p99 de latência, taxa de erro,
+vazão e contagem de status por endpoint.
+
+Exemplo:
+    python carga/gerador_carga.py --url http://localhost:8000 --duracao 60 --dashboards 20 --secretaria 5
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+RELATORIO = '/api/analises/gerar_relatorio_analises/'
+ANALISAR = '/api/analises/analisar_todos_estudantes/'
+ESTUDANTES = '/api/estudantes/estudantes/'
+
+
+class Metricas:
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._latencias = defaultdict(list)
+        self._erros = defaultdict(int)
+        self._status = defaultdict(lambda: defaultdict(int))
+
+    def registrar(self, endpoint, status, duracao):
+        with self._trava:
+            self._latencias[endpoint].append(duracao)
+            self._status[endpoint][str(status)] += 1
+            if status == 0 or status >= 400:
+                self._erros[endpoint] += 1
+
+    def resumo(self, duracao_total):
+        endpoints = {}
+        for endpoint, latencias in sorted(self._latencias.items()):
+            ordenadas = sorted(latencias)
+            total = len(ordenadas)
+            endpoints[endpoint] = {
+                'requisicoes': total,
+                'erros': self._erros[endpoint],
+                'taxa_erro': round(self._erros[endpoint] / total, 4),
+                'vazao_rps': round(total / duracao_total, 2),
+                'latencia_ms': {
+                    'p50': _percentil(ordenadas, 0.50),
+                    'p95': _percentil(ordenadas, 0.95),
+                    'p99': _percentil(ordenadas, 0.99),
+                    'max': round(ordenadas[-1] * 1000, 2),
+                },
+                'status': dict(self._status[endpoint]),
+            }
+
+        total = sum(e['requisicoes'] for e in endpoints.values())
+        erros = sum(e['erros'] for e in endpoints.values())
+        return {
+            'duracao_segundos': round(duracao_total, 2),
+            'total_requisicoes': total,
+            'taxa_erro': round(erros / total, 4) if total else 0,
+            'vazao_rps': round(total / duracao_total, 2),
+            'endpoints': endpoints,
+        }
+
+
+def _percentil(ordenadas, q):
+    posicao = q * (len(ordenadas) - 1)
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenadas) - 1)
+    valor = ordenadas[inferior] + (ordenadas[superior] - ordenadas[inferior]) * (posicao - inferior)
+    return round(valor * 1000, 2)
+
+
+class Cliente:
+    def __init__(self, base_url, metricas, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.metricas = metricas
+        self.timeout = timeout
+
+    def requisitar(self, metodo, caminho, endpoint, corpo=None, cabecalhos=None):
+        """Executa a requisição e devolve (status, cabeçalhos, corpo decodificado ou None)."""
+        dados = json.dumps(corpo).encode() if corpo is not None else None
+        requisicao = urllib.request.Request(self.base_url + caminho, data=dados, method=metodo)
+        requisicao.add_header('Accept', 'application/json')
+        if dados is not None:
+            requisicao.add_header('Content-Type', 'application/json')
+        for nome, valor in (cabecalhos or {}).items():
+            requisicao.add_header(nome, valor)
+
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+                status, headers, conteudo = resposta.status, resposta.headers, resposta.read()
+        except urllib.error.HTTPError as ex:
+            status, headers, conteudo = ex.code, ex.headers, ex.read()
+        except (urllib.error.URLError, OSError):
+            status, headers, conteudo = 0, {}, b''
+        self.metricas.registrar(f'{metodo} {endpoint}', status, time.perf_counter() - inicio)
+
+        try:
+            return status, headers, json.loads(conteudo) if conteudo else None
+        except ValueError:
+            return status, headers, None
+
+
+def dashboard(cliente, parar, intervalo):
+    etag = None
+    while not parar.is_set():
+        cabecalhos = {'If-None-Match': etag} if etag else {}
+        status, headers, _ = cliente.requisitar('GET', RELATORIO, RELATORIO, cabecalhos=cabecalhos)
+        if status == 200:
+            etag = headers.get('ETag')
+        parar.wait(random.uniform(0.5, 1.5) * intervalo)
+
+
+def _novo_estudante():
+    return {
+        'matricula': f'C{random.randrange(10 ** 8):08d}',
+        'idade_ingresso': random.randint(17, 45),
+        'genero': random.randint(0, 1),
+        'turno_aulas': random.randint(0, 1),
+        'bolsista': random.random() < 0.3,
+        'necessidades_especiais': random.random() < 0.02,
+        'disciplinas_aprovadas_1per': random.randint(0, 6),
+        'disciplinas_matriculadas_1per': 6,
+        'nota_media_1per': round(random.uniform(0, 20), 2),
+        'disciplinas_aprovadas_2per': random.randint(0, 6),
+        'disciplinas_matriculadas_2per': 6,
+        'nota_media_2per': round(random.uniform(0, 20), 2),
+    }
+
+
+def secretaria(cliente, parar, intervalo, fracao_listagem, fracao_remocao):
+    """Ciclo de cadastro: cria, consulta, altera e às vezes remove o estudante ou lista todos."""
+    detalhe = ESTUDANTES + '{id}/'
+    while not parar.is_set():
+        status, _, criado = cliente.requisitar('POST', ESTUDANTES, ESTUDANTES, corpo=_novo_estudante())
+        if status == 201 and criado:
+            caminho = f"{ESTUDANTES}{criado['id']}/"
+            cliente.requisitar('GET', caminho, detalhe)
+            cliente.requisitar('PATCH', caminho, detalhe, corpo={'nota_media_2per': round(random.uniform(0, 20), 2)})
+            if random.random() < fracao_remocao:
+                cliente.requisitar('DELETE', caminho, detalhe)
+
+        if random.random() < fracao_listagem:
+            cliente.requisitar('GET', ESTUDANTES, ESTUDANTES)
+
+        parar.wait(random.uniform(0.5, 1.5) * intervalo)
+
+
+def analises(cliente, parar, intervalo):
+    while not parar.is_set():
+        cliente.requisitar('POST', ANALISAR, ANALISAR)
+        parar.wait(intervalo)
+
+
+def executar(args):
+    metricas = Metricas()
+    cliente = Cliente(args.url, metricas, args.timeout)
+    parar = threading.Event()
+
+    usuarios = (
+        [threading.Thread(target=dashboard, args=(cliente, parar, args.intervalo_dashboard))
+         for _ in range(args.dashboards)]
+        + [threading.Thread(target=secretaria,
+                            args=(cliente, parar, args.intervalo_secretaria, args.fracao_listagem, args.fracao_remocao))
+           for _ in range(args.secretaria)]
+    )
+    if args.intervalo_analise > 0:
+        usuarios.append(threading.Thread(target=analises, args=(cliente, parar, args.intervalo_analise)))
+
+    inicio = time.perf_counter()
+    for usuario in usuarios:
+        usuario.daemon = True
+        usuario.start()
+
+    time.sleep(args.duracao)
+    parar.set()
+    for usuario in usuarios:
+        usuario.join(args.timeout)
+
+    return metricas.resumo(time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerador de carga para a API do Observatório de Permanência')
+    parser.add_argument('--url', default='http://localhost:8000', help='Endereço do servidor (padrão: http://localhost:8000)')
+    parser.add_argument('--duracao', type=float, default=60, help='Duração do teste em segundos')
+    parser.add_argument('--dashboards', type=int, default=20, help='Dashboards consultando o relatório')
+    parser.add_argument('--intervalo-dashboard', type=float, default=5, help='Segundos entre consultas de cada dashboard')
+    parser.add_argument('--secretaria', type=int, default=5, help='Usuários da secretaria fazendo CRUD de estudantes')
+    parser.add_argument('--intervalo-secretaria', type=float, default=2, help='Segundos entre ciclos de cadastro')
+    parser.add_argument('--fracao-listagem', type=float, default=0.1, help='Probabilidade de listar todos os estudantes por ciclo')
+    parser.add_argument('--fracao-remocao', type=float, default=0.5, help='Probabilidade de remover o estudante criado')
+    parser.add_argument('--intervalo-analise', type=float, default=30, help='Segundos entre disparos da análise (0 desativa)')
+    parser.add_argument('--timeout', type=float, default=30, help='Timeout de cada requisição em segundos')
+    parser.add_argument('--saida', help='Arquivo JSON para gravar o resultado (padrão: stdout)')
+    args = parser.parse_args()
+
+    resultado = executar(args)
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,53 @@
 from django.contrib import admin
+from django.db.models import Exists, OuterRef
+from analises.models import PredicaoEvasao, ReavaliacaoSolicitada
+from app.contagem_estimada import PaginadorEstimado
+from .models import Estudante
 
-# Register your models here.
+
+class FiltroRiscoAtual(admin.SimpleListFilter):
+    """Nível de risco da predição vigente, pelo índice parcial de predições vigentes por risco."""
+    title = 'nível de risco atual'
+    parameter_name = 'risco_atual'
+
+    def lookups(self, request, model_admin):
+        return [('Alto', 'Alto'), ('Médio', 'Médio'), ('Baixo', 'Baixo')]
+
+    def queryset(self, request, queryset):
+        if self.value() not in ('Alto', 'Médio', 'Baixo'):
+            return queryset
+        return queryset.filter(Exists(PredicaoEvasao.objects.filter(
+            estudante=OuterRef('pk'), mais_recente=True, nivel_risco=self.value()
+        )))
+
+
+@admin.action(description='Reavaliar os estudantes selecionados (em segundo plano)', permissions=['reavaliar'])
+def reavaliar_estudantes(modeladmin, request, queryset):
+    total = ReavaliacaoSolicitada.solicitar(queryset.values_list('id', flat=True).iterator(chunk_size=1000))
+    modeladmin.message_user(
+        request,
+        f'{total} estudantes enfileirados para reavaliação; a fila é processada por manage.py processar_reavaliacoes.'
+    )
+
+
+@admin.register(Estudante)
+class EstudanteAdmin(admin.ModelAdmin):
+    list_display = ('matricula', 'campus', 'turno_aulas', 'bolsista', 'genero', 'idade_ingresso', 'atualizado_em')
+    list_filter = ('turno_aulas', 'bolsista', FiltroRiscoAtual)
+    search_fields = ('matricula',)
+    search_help_text = 'Matrícula completa'
+    # -id segue a ordem de criação pela chave primária, sem ordenar pela coluna criado_em
+    ordering = ('-id',)
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    actions = [reavaliar_estudantes]
+
+    def get_search_results(self, request, queryset, search_term):
+        # igualdade na matrícula usa o índice único; o icontains padrão varreria a tabela
+        termo = search_term.strip()
+        if not termo:
+            return queryset, False
+        return queryset.filter(matricula=termo), False
+
+    def has_reavaliar_permission(self, request):
+        return request.user.has_perm('analises.solicitar_reavaliacao')
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EstudantesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'estudantes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
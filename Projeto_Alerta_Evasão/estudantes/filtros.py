@@ -0,0 +1,58 @@
+import math
+
+MATRICULA_TAMANHO = 9
+
+FILTROS_BINARIOS = ('turno_aulas', 'genero')
+FILTROS_BOOLEANOS = ('bolsista', 'necessidades_especiais')
+# parâmetro -> (lookup, conversão)
+FILTROS_FAIXA = {
+    'idade_ingresso_min': ('idade_ingresso__gte', int),
+    'idade_ingresso_max': ('idade_ingresso__lte', int),
+    'nota_media_1per_min': ('nota_media_1per__gte', float),
+    'nota_media_1per_max': ('nota_media_1per__lte', float),
+    'nota_media_2per_min': ('nota_media_2per__gte', float),
+    'nota_media_2per_max': ('nota_media_2per__lte', float),
+}
+
+
+def ler_filtros(params, campos=None):
+    """
+    Converte os parâmetros da listagem de estudantes em lookups do ORM. Levanta ValueError com
+    a mensagem para o cliente quando algum valor é inválido. Com `campos`, só esses parâmetros
+    são lidos (o ranking de risco usa apenas os filtros de perfil).
+    """
+    if campos is not None:
+        params = {campo: params[campo] for campo in campos if campo in params}
+    filtros = {}
+
+    if 'matricula' in params:
+        prefixo = params['matricula'].strip()
+        if not prefixo or len(prefixo) > MATRICULA_TAMANHO:
+            raise ValueError(f'matricula deve ter de 1 a {MATRICULA_TAMANHO} caracteres')
+        # LIKE 'prefixo%' usa o índice varchar_pattern_ops que o Django cria para a matrícula única
+        filtros['matricula__startswith'] = prefixo
+
+    for campo in FILTROS_BINARIOS:
+        if campo in params:
+            if params[campo] not in ('0', '1'):
+                raise ValueError(f'{campo} deve ser 0 ou 1')
+            filtros[campo] = int(params[campo])
+
+    for campo in FILTROS_BOOLEANOS:
+        if campo in params:
+            valor = params[campo].lower()
+            if valor not in ('true', 'false', '1', '0'):
+                raise ValueError(f'{campo} deve ser true ou false')
+            filtros[campo] = valor in ('true', '1')
+
+    for parametro, (lookup, conversao) in FILTROS_FAIXA.items():
+        if parametro in params:
+            try:
+                valor = conversao(params[parametro])
+            except ValueError:
+                valor = math.nan
+            if not math.isfinite(valor):
+                raise ValueError(f'{parametro} deve ser um número')
+            filtros[lookup] = valor
+
+    return filtros
@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 
 class Estudante(models.Model):
     matricula = models.CharField(max_length=9, unique=True, verbose_name="Matrícula")
+    campus = models.SlugField(max_length=30, blank=True, default='', db_index=False, verbose_name="Campus")
     idade_ingresso = models.IntegerField(verbose_name="Idade de Ingresso")
     genero = models.IntegerField(choices=[(0, 'Feminino'), (1, 'Masculino')], verbose_name="Gênero")
     turno_aulas = models.IntegerField(choices=[(0, 'Noturno'), (1, 'Diurno')], verbose_name="Turno das Aulas")
@@ -20,6 +23,51 @@ class Estudante(models.Model):
         verbose_name = "Estudante"
         verbose_name_plural = "Estudantes"
         ordering = ['-criado_em']
+        # a busca por prefixo da matrícula usa o índice varchar_pattern_ops (sufixo _like) que o
+        # Django cria no PostgreSQL para CharField com unique=True
+        indexes = [
+            models.Index(fields=['turno_aulas', 'bolsista', 'genero'], name='estudante_perfil_idx'),
+            models.Index(fields=['campus', 'id'], name='estudante_campus_idx'),
+            # turno e bolsista por igualdade e faixa de idade, a combinação mais comum da listagem
+            models.Index(fields=['turno_aulas', 'bolsista', 'idade_ingresso'], name='estudante_turno_idade_idx'),
+            models.Index(fields=['idade_ingresso'], name='estudante_idade_idx'),
+            models.Index(fields=['nota_media_1per'], name='estudante_nota_1per_idx'),
+            models.Index(fields=['nota_media_2per'], name='estudante_nota_2per_idx'),
+            # poucos estudantes têm necessidades especiais: índice parcial só com eles
+            models.Index(fields=['id'], name='estudante_necessidades_idx', condition=Q(necessidades_especiais=True)),
+        ]
 
     def __str__(self):
-        return f"Estudante {self.matricula}"
\ No newline at end of file
+        return f"Estudante {self.matricula}"
+
+    def save(self, *args, **kwargs):
+        # os sinais de pre_save/post_save (resumo de drift) leem a linha anterior com
+        # select_for_update e gravam a variação na mesma transação do save
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+class VersaoRecurso(models.Model):
+    """
+    Contador de alterações por recurso da API ('estudantes', 'predicoes'), incrementado a cada
+    escrita. Serve de validador barato para as respostas condicionais (ETag/Last-Modified).
+    """
+    recurso = models.CharField(max_length=30, primary_key=True)
+    versao = models.BigIntegerField(default=0)
+    atualizado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Versão de Recurso"
+        verbose_name_plural = "Versões de Recursos"
+
+    def __str__(self):
+        return f"{self.recurso} v{self.versao}"
+
+    @classmethod
+    def incrementar(cls, recurso):
+        agora = timezone.now()
+        registros = cls.objects.filter(recurso=recurso)
+        if registros.update(versao=F('versao') + 1, atualizado_em=agora):
+            return
+        _, criado = cls.objects.get_or_create(recurso=recurso, defaults={'versao': 1, 'atualizado_em': agora})
+        if not criado:
+            registros.update(versao=F('versao') + 1, atualizado_em=agora)
@@ -1,10 +1,31 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from rest_framework import serializers
 from .models import Estudante
 
+# faixa da coluna integer do PostgreSQL; declarada aqui para que a validação e o schema OpenAPI
+# não dependam do banco (o SQLite, por exemplo, informa a faixa de 64 bits)
+INTEIRO_MINIMO, INTEIRO_MAXIMO = -2147483648, 2147483647
+
+
+def _limites_inteiro(campo):
+    # campos com choices viram ChoiceField, que não aceita min_value/max_value
+    if campo.choices:
+        return {'validators': [MinValueValidator(INTEIRO_MINIMO), MaxValueValidator(INTEIRO_MAXIMO)]}
+    return {'min_value': INTEIRO_MINIMO, 'max_value': INTEIRO_MAXIMO}
+
+
+LIMITES_CAMPOS_INTEIROS = {
+    campo.name: _limites_inteiro(campo)
+    for campo in Estudante._meta.fields
+    if campo.get_internal_type() == 'IntegerField'
+}
+
+
 class EstudanteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Estudante
         fields = '__all__'
+        extra_kwargs = LIMITES_CAMPOS_INTEIROS
 
         def validar_Matricula(self, value):
             if Estudante.objects.filter(matricula=value).exists(): raise serializers.ValidationError("Matrícula já cadastrada")
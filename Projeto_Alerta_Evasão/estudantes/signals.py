@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Estudante, VersaoRecurso
+
+
+@receiver(post_save, sender=Estudante)
+def registrar_alteracao_estudante(sender, **kwargs):
+    VersaoRecurso.incrementar('estudantes')
+
+
+@receiver(post_delete, sender=Estudante)
+def registrar_remocao_estudante(sender, **kwargs):
+    VersaoRecurso.incrementar('estudantes')
+    # as predições do estudante são removidas em cascata sem sinais próprios
+    VersaoRecurso.incrementar('predicoes')
@@ -1,7 +1,11 @@
 from django.test import TestCase
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from .filtros import ler_filtros
 from .models import Estudante
+from .views import EstudanteViewSet
 
 class EstudanteModelTest(TestCase):
 
@@ -78,3 +82,123 @@ class EstudanteModelTest(TestCase):
         with self.assertRaises(ValidationError):
             estudante.full_clean()
 
+
+class EstudanteRespostaCondicionalTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/api/estudantes/estudantes/'
+        self.dados = {
+            'matricula': '202301010',
+            'idade_ingresso': 20,
+            'genero': 0,
+            'turno_aulas': 0,
+            'bolsista': False,
+            'necessidades_especiais': False,
+            'disciplinas_aprovadas_1per': 4,
+            'disciplinas_matriculadas_1per': 6,
+            'nota_media_1per': 6.5,
+            'disciplinas_aprovadas_2per': 3,
+            'disciplinas_matriculadas_2per': 5,
+            'nota_media_2per': 6.0
+        }
+
+    def test_lista_inalterada_retorna_304(self):
+        primeira = self.client.get(self.url)
+        etag = primeira['ETag']
+
+        segunda = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(segunda.status_code, 304)
+
+    def test_escrita_invalida_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.client.post(self.url, self.dados, format='json')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data), 1)
+
+
+class EstudanteFiltrosTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        perfis = [
+            # matricula, idade, turno, bolsista, genero, necessidades, nota 1º per, nota 2º per
+            ('202401001', 27, 0, True, 0, False, 6.0, 7.0),
+            ('202401002', 22, 0, True, 1, False, 8.0, 8.5),
+            ('202401003', 31, 0, False, 1, True, 5.5, 4.0),
+            ('202402001', 40, 1, True, 0, False, 9.0, 9.5),
+            ('202302001', 19, 1, False, 1, False, 7.0, 6.5),
+        ]
+        for matricula, idade, turno, bolsista, genero, necessidades, nota1, nota2 in perfis:
+            Estudante.objects.create(
+                matricula=matricula, idade_ingresso=idade, turno_aulas=turno, bolsista=bolsista,
+                genero=genero, necessidades_especiais=necessidades,
+                disciplinas_aprovadas_1per=5, disciplinas_matriculadas_1per=6, nota_media_1per=nota1,
+                disciplinas_aprovadas_2per=4, disciplinas_matriculadas_2per=5, nota_media_2per=nota2,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/api/estudantes/estudantes/'
+
+    def _matriculas(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(e['matricula'] for e in response.data)
+
+    def test_filtros_combinados(self):
+        self.assertEqual(self._matriculas(matricula='202401'), ['202401001', '202401002', '202401003'])
+        self.assertEqual(self._matriculas(turno_aulas=0, bolsista='true', idade_ingresso_min=26), ['202401001'])
+        self.assertEqual(self._matriculas(necessidades_especiais='true'), ['202401003'])
+        self.assertEqual(self._matriculas(genero=0, nota_media_2per_min=9), ['202402001'])
+        self.assertEqual(
+            self._matriculas(idade_ingresso_min=20, idade_ingresso_max=31, nota_media_1per_max=6),
+            ['202401001', '202401003']
+        )
+        self.assertEqual(len(self._matriculas()), 5)
+
+    def test_filtros_diferentes_tem_etags_diferentes(self):
+        todos = self.client.get(self.url)
+        filtrados = self.client.get(self.url, {'turno_aulas': 1}, HTTP_IF_NONE_MATCH=todos['ETag'])
+        self.assertEqual(filtrados.status_code, 200)
+        self.assertEqual(len(filtrados.data), 2)
+
+    def test_filtro_invalido(self):
+        for params in ({'turno_aulas': '2'}, {'bolsista': 'talvez'}, {'idade_ingresso_min': 'vinte'},
+                       {'nota_media_1per_max': 'nan'}, {'matricula': '2024010010'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('erro', response.data)
+
+    def _plano(self, params):
+        # a consulta que a listagem executa, com a ordenação do viewset (-criado_em)
+        viewset = EstudanteViewSet(request=Request(APIRequestFactory().get(self.url, params)), format_kwarg=None)
+        queryset = viewset.filter_queryset(viewset.get_queryset()).filter(**ler_filtros(viewset.request.query_params))
+        self.assertEqual(queryset.query.get_meta().ordering, ['-criado_em'])
+        if connection.vendor == 'postgresql':
+            # com poucas linhas o planejador prefere varrer a tabela; assim só resta o índice
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_filtros_usam_indices(self):
+        consultas = {
+            'estudante_turno_idade_idx': {'turno_aulas': 0, 'bolsista': 'true', 'idade_ingresso_min': 26},
+            'estudante_idade_idx': {'idade_ingresso_min': 30, 'idade_ingresso_max': 40},
+            'estudante_nota_1per_idx': {'nota_media_1per_min': 8},
+            'estudante_nota_2per_idx': {'nota_media_2per_max': 5},
+            'estudante_necessidades_idx': {'necessidades_especiais': 'true'},
+        }
+        if connection.vendor == 'postgresql':
+            # índice varchar_pattern_ops criado pelo Django para a matrícula única
+            consultas['_like'] = {'matricula': '202401'}
+
+        for indice, params in consultas.items():
+            plano = self._plano(params)
+            self.assertIn(indice, plano)
+            self.assertNotRegex(plano, r'(?m)Seq Scan|SCAN estudantes_estudante$')
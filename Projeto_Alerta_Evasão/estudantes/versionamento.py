@@ -0,0 +1,40 @@
+import zlib
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+from .models import VersaoRecurso
+
+
+def _versoes(request, recursos):
+    # etag_func e last_modified_func são chamadas separadamente; a leitura fica guardada no request
+    cache = request.__dict__.setdefault('_versoes_recursos', {})
+    if recursos not in cache:
+        registros = {v.recurso: v for v in VersaoRecurso.objects.filter(recurso__in=recursos)}
+        etag = '-'.join(
+            f"{recurso}.{registros[recurso].versao if recurso in registros else 0}"
+            for recurso in recursos
+        )
+        datas = [v.atualizado_em for v in registros.values()]
+        # JSON, MessagePack e colunar têm corpos diferentes para a mesma versão dos dados,
+        # assim como filtros diferentes na query string
+        variante = '|'.join(filter(None, [request.META.get('QUERY_STRING', ''), request.META.get('HTTP_ACCEPT', '')]))
+        if variante:
+            etag += f"-{zlib.crc32(variante.encode()):08x}"
+        cache[recursos] = (etag, max(datas) if datas else None)
+    return cache[recursos]
+
+
+def resposta_condicional(*recursos):
+    """
+    Decorator que responde 304 a GETs com If-None-Match/If-Modified-Since ainda válidos
+    para os `recursos` informados, antes de executar consultas ou serialização da view.
+    O corpo depende do Accept, então toda resposta leva Vary: Accept, inclusive o 304, que
+    não passa pela view do DRF.
+    """
+    condicional = condition(
+        etag_func=lambda request, *args, **kwargs: _versoes(request, recursos)[0],
+        last_modified_func=lambda request, *args, **kwargs: _versoes(request, recursos)[1],
+    )
+
+    def decorator(view):
+        return vary_on_headers('Accept')(condicional(view))
+    return decorator
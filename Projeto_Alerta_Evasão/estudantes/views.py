@@ -1,8 +1,14 @@
 from .models import Estudante
 from rest_framework import viewsets
+from rest_framework.response import Response
 from .serializers import EstudanteSerializer
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
+from django.utils.decorators import method_decorator
+from .filtros import ler_filtros
+from .versionamento import resposta_condicional
+from app.admissao import admissao
+from app.serializacao_rapida import serializar_rapido
 
 
 @extend_schema_view(
@@ -13,9 +19,43 @@ from drf_spectacular.types import OpenApiTypes
         
         Este endpoint permite visualizar todos os estudantes com suas informações
         acadêmicas completas, incluindo dados pessoais e desempenho acadêmico.
+        
+        Além de JSON, aceita MessagePack (`?format=msgpack`) e o formato colunar,
+        com um array por campo (`?format=colunar`).
+        
+        **Filtros opcionais**, combináveis entre si: prefixo da matrícula, turno, bolsista,
+        gênero, necessidades especiais e faixas de idade de ingresso e de nota média.
+        Por exemplo, `?turno_aulas=0&bolsista=true&idade_ingresso_min=26` lista os bolsistas
+        do noturno que ingressaram com mais de 25 anos.
         ''',
+        parameters=[
+            OpenApiParameter(name='matricula', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False,
+                             description='Prefixo da matrícula (1 a 9 caracteres)'),
+            OpenApiParameter(name='turno_aulas', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False,
+                             enum=[0, 1], description='0 = Noturno, 1 = Diurno'),
+            OpenApiParameter(name='bolsista', type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY, required=False,
+                             description='Filtra bolsistas ou não bolsistas'),
+            OpenApiParameter(name='genero', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False,
+                             enum=[0, 1], description='0 = Feminino, 1 = Masculino'),
+            OpenApiParameter(name='necessidades_especiais', type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY,
+                             required=False, description='Filtra estudantes com ou sem necessidades especiais'),
+            OpenApiParameter(name='idade_ingresso_min', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             required=False, description='Idade de ingresso mínima (inclusive)'),
+            OpenApiParameter(name='idade_ingresso_max', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             required=False, description='Idade de ingresso máxima (inclusive)'),
+            OpenApiParameter(name='nota_media_1per_min', type=OpenApiTypes.NUMBER, location=OpenApiParameter.QUERY,
+                             required=False, description='Nota média mínima do 1º período (inclusive)'),
+            OpenApiParameter(name='nota_media_1per_max', type=OpenApiTypes.NUMBER, location=OpenApiParameter.QUERY,
+                             required=False, description='Nota média máxima do 1º período (inclusive)'),
+            OpenApiParameter(name='nota_media_2per_min', type=OpenApiTypes.NUMBER, location=OpenApiParameter.QUERY,
+                             required=False, description='Nota média mínima do 2º período (inclusive)'),
+            OpenApiParameter(name='nota_media_2per_max', type=OpenApiTypes.NUMBER, location=OpenApiParameter.QUERY,
+                             required=False, description='Nota média máxima do 2º período (inclusive)'),
+        ],
         responses={
             200: EstudanteSerializer(many=True),
+            304: 'Lista inalterada desde o ETag/data informados em If-None-Match/If-Modified-Since',
+            400: 'Filtro inválido',
             401: 'Não autorizado',
             403: 'Acesso negado'
         },
@@ -183,6 +223,12 @@ from drf_spectacular.types import OpenApiTypes
         tags=['Estudantes']
     )
 )
+# admissão em cada ação, e não no dispatch, para que a listagem responda 304 antes dela
+@method_decorator(admissao('crud'), name='create')
+@method_decorator(admissao('crud'), name='retrieve')
+@method_decorator(admissao('crud'), name='update')
+@method_decorator(admissao('crud'), name='partial_update')
+@method_decorator(admissao('crud'), name='destroy')
 class EstudanteViewSet(viewsets.ModelViewSet): 
     """
     ViewSet completo para gerenciamento de estudantes.
@@ -195,3 +241,20 @@ class EstudanteViewSet(viewsets.ModelViewSet):
     """
     queryset = Estudante.objects.all()
     serializer_class = EstudanteSerializer
+
+    @method_decorator(resposta_condicional('estudantes'))
+    @method_decorator(admissao('crud'))
+    def list(self, request, *args, **kwargs):
+        try:
+            filtros = ler_filtros(request.query_params)
+        except ValueError as ex:
+            return Response({'erro': str(ex)}, status=400)
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(**filtros)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        return Response(serializar_rapido(queryset, self.get_serializer_class()))